@@ -1,4 +1,4 @@
-import React, { useCallback, useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import {
   View,
   Text,
@@ -16,6 +16,8 @@ import TaskCard from '../components/TaskCard';
 import Button from '../components/Button';
 
 const isWeb = Platform.OS === 'web';
+const JOB_POLL_MS = 1000;
+const JOB_TIMEOUT_MS = 5 * 60 * 1000;
 
 type TaskItem = {
   id: string | number;
@@ -38,6 +40,12 @@ export default function ArchiveScreen() {
   const [isSuperAdmin, setIsSuperAdmin] = useState(false);
   const [exporting, setExporting] = useState(false);
   const [expanded, setExpanded] = useState<Set<string>>(new Set());
+  const mountedRef = useRef(true);
+
+  useEffect(() => {
+    mountedRef.current = true;
+    return () => { mountedRef.current = false; };
+  }, []);
 
   const loadDone = useCallback(async () => {
     try {
@@ -85,7 +93,20 @@ export default function ArchiveScreen() {
     try {
       const r = await api('/tasks/archive/download-and-clear', { method: 'POST' });
       if (!r.ok) throw new Error('Ошибка загрузки архива');
-      const blob = await r.blob();
+      // выгрузка идёт фоновой задачей: ждём её завершения (не дольше JOB_TIMEOUT_MS) и скачиваем CSV
+      let job = await r.json();
+      const deadline = Date.now() + JOB_TIMEOUT_MS;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) throw new Error('Архив готовится слишком долго, попробуйте позже');
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+        // экран закрыт — опрос прекращаем; задача на сервере доработает сама
+        if (!mountedRef.current) return;
+        job = await getJSON<{ id: number; status: string; error?: string }>(`/jobs/${job.id}`);
+      }
+      if (job.status !== 'done') throw new Error(job.error || 'Ошибка загрузки архива');
+      const fileRes = await api(`/jobs/${job.id}/artifact`);
+      if (!fileRes.ok) throw new Error('Ошибка загрузки архива');
+      const blob = await fileRes.blob();
       if (isWeb && typeof URL !== 'undefined') {
         const blobUrl = URL.createObjectURL(blob);
         const a = document.createElement('a');
@@ -105,9 +126,9 @@ export default function ArchiveScreen() {
       }
       if (!isWeb) Alert.alert('Готово', 'Архив скачан. Завершённые задачи удалены.');
     } catch (e: any) {
-      Alert.alert('Ошибка', e?.message ?? 'Не удалось загрузить архив');
+      if (mountedRef.current) Alert.alert('Ошибка', e?.message ?? 'Не удалось загрузить архив');
     } finally {
-      setExporting(false);
+      if (mountedRef.current) setExporting(false);
     }
   }, [dispatch]);
 
@@ -66,7 +66,7 @@ export class TaskService {
   sync = async (userId: string) => {
     const uid = Number(userId);
     const canLoadMine = Number.isFinite(uid) && uid > 0;
-    const mine = canLoadMine ? await api(`/tasks?assignee_id=${uid}&limit=200`) : null;
+    const mine = canLoadMine ? await api(`/tasks/mine?limit=200`) : null;
     const seen = new Set<string>();
     const list: Task[] = [];
     if (mine?.ok) {
@@ -0,0 +1,29 @@
+"""team link on tasks
+
+Revision ID: 0a9e3f7c5b24
+Revises: 0020_task_visibility
+Create Date: 2025-10-01 12:48:30.552871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0021_tasks_team"
+down_revision = "0020_task_visibility"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("team_id", sa.BigInteger, sa.ForeignKey("teams.id", ondelete="SET NULL"), nullable=True))
+    # списки задач команды (новые первыми) и счётчики по командам
+    op.create_index("ix_tasks_team_created", "tasks", ["team_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_team_created", table_name="tasks")
+    op.drop_column("tasks", "team_id")
@@ -0,0 +1,39 @@
+"""sync ops journal for offline mutation replay
+
+Revision ID: 1f6c9e2b7d48
+Revises: 0014_tasks_version
+Create Date: 2025-09-23 16:21:09.884127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0015_sync_ops"
+down_revision = "0014_tasks_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_ops",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("user_id", sa.BigInteger, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("client_op_id", sa.String(64), nullable=False),
+        sa.Column("type", sa.String(32), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False, server_default=sa.text("'pending'")),
+        sa.Column("code", sa.SmallInteger, nullable=True),
+        sa.Column("result", sa.JSON, nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.UniqueConstraint("user_id", "client_op_id", name="uq_sync_ops_user_op"),
+    )
+    op.create_index("ix_sync_ops_created_at", "sync_ops", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_ops_created_at", table_name="sync_ops")
+    op.drop_table("sync_ops")
@@ -0,0 +1,30 @@
+"""notifications retention
+
+Revision ID: 2e9a6b4f1c73
+Revises: 0010_notification_counters
+Create Date: 2025-09-16 15:07:52.218634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_notifications_retention"
+down_revision = "0010_notification_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # очистка старых прочитанных идёт по этому индексу пачками, без полного скана
+    op.create_index(
+        "ix_notifications_read_created", "notifications", ["created_at"],
+        postgresql_where=sa.text("is_read"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_read_created", table_name="notifications")
@@ -0,0 +1,33 @@
+"""notifications push delivery
+
+Revision ID: 4b1e7c2d9a10
+Revises: 0008_audit_init
+Create Date: 2025-09-15 10:12:41.517309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_notifications_push_delivery"
+down_revision = "0008_audit_init"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("pushed_at", sa.TIMESTAMP(timezone=True), nullable=True))
+    # уже существующие уведомления не рассылаем
+    op.execute("UPDATE notifications SET pushed_at = created_at")
+    op.create_index(
+        "ix_notifications_push_pending", "notifications", ["id"],
+        postgresql_where=sa.text("pushed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_push_pending", table_name="notifications")
+    op.drop_column("notifications", "pushed_at")
@@ -0,0 +1,41 @@
+"""vehicle reservations
+
+Revision ID: 5c8f0a3e7b21
+Revises: 0011_notifications_retention
+Create Date: 2025-09-18 11:23:09.640127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_vehicle_reservations"
+down_revision = "0011_notifications_retention"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # btree_gist нужен, чтобы в одном GiST-ограничении были и "=" по vehicle_id, и "&&" по диапазону
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.create_table(
+        "vehicle_reservations",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("vehicle_id", sa.BigInteger, sa.ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.BigInteger, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("during", postgresql.TSTZRANGE, nullable=False),
+        sa.Column("note", sa.Text, nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+        postgresql.ExcludeConstraint(
+            ("vehicle_id", "="), ("during", "&&"), using="gist", name="ex_vehicle_reservations_overlap",
+        ),
+        sa.CheckConstraint("NOT isempty(during)", name="ck_vehicle_reservations_nonempty"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("vehicle_reservations")
@@ -0,0 +1,56 @@
+"""background jobs queue
+
+Revision ID: 7b3e9d1f4a62
+Revises: 0021_tasks_team
+Create Date: 2025-10-02 10:14:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0022_jobs"
+down_revision = "0021_tasks_team"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("type", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False, server_default=sa.text("'queued'")),
+        sa.Column("payload", sa.JSON, nullable=True),
+        sa.Column("created_by", sa.BigInteger, sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("attempts", sa.SmallInteger, nullable=False, server_default=sa.text("0")),
+        sa.Column("max_attempts", sa.SmallInteger, nullable=False, server_default=sa.text("3")),
+        sa.Column("run_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("locked_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("locked_by", sa.String(128), nullable=True),
+        sa.Column("progress", sa.SmallInteger, nullable=False, server_default=sa.text("0")),
+        sa.Column("progress_message", sa.String(255), nullable=True),
+        sa.Column("result", sa.JSON, nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("artifact_path", sa.String(512), nullable=True),
+        sa.Column("artifact_name", sa.String(255), nullable=True),
+        sa.Column("artifact_mime", sa.String(128), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("started_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index("ix_jobs_created_by", "jobs", ["created_by"])
+    op.create_index("ix_jobs_finished_at", "jobs", ["finished_at"])
+    op.create_index("ix_jobs_queued", "jobs", ["run_at"], postgresql_where=sa.text("status = 'queued'"))
+    op.create_index("ix_jobs_running", "jobs", ["locked_at"], postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_running", table_name="jobs")
+    op.drop_index("ix_jobs_queued", table_name="jobs")
+    op.drop_index("ix_jobs_finished_at", table_name="jobs")
+    op.drop_index("ix_jobs_created_by", table_name="jobs")
+    op.drop_table("jobs")
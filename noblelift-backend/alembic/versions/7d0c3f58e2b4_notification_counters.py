@@ -0,0 +1,40 @@
+"""notification counters
+
+Revision ID: 7d0c3f58e2b4
+Revises: 0009_notifications_push_delivery
+Create Date: 2025-09-16 09:41:27.804512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_notification_counters"
+down_revision = "0009_notifications_push_delivery"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.BigInteger, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("unread", sa.Integer, nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    op.execute(
+        "INSERT INTO notification_counters (user_id, unread) "
+        "SELECT user_id, count(*) FROM notifications WHERE NOT is_read GROUP BY user_id"
+    )
+    op.create_index(
+        "ix_notifications_user_unread_created", "notifications", ["user_id", "created_at"],
+        postgresql_where=sa.text("NOT is_read"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_unread_created", table_name="notifications")
+    op.drop_table("notification_counters")
@@ -0,0 +1,64 @@
+"""vehicle usage rollups
+
+Revision ID: 8a4d2e6c0f95
+Revises: 0012_vehicle_reservations
+Create Date: 2025-09-19 14:48:33.175902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_vehicle_usage_rollups"
+down_revision = "0012_vehicle_reservations"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vehicle_usage_intervals",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("vehicle_id", sa.BigInteger, sa.ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.BigInteger, nullable=False),
+        sa.Column("take_log_id", sa.BigInteger, nullable=False, unique=True),
+        sa.Column("release_log_id", sa.BigInteger, nullable=True),
+        sa.Column("taken_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("released_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_vehicle_usage_intervals_open", "vehicle_usage_intervals", ["vehicle_id"],
+        postgresql_where=sa.text("released_at IS NULL"),
+    )
+
+    op.create_table(
+        "vehicle_usage_daily",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("vehicle_id", sa.BigInteger, sa.ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("user_id", sa.BigInteger, primary_key=True),
+        sa.Column("seconds_in_use", sa.BigInteger, nullable=False, server_default=sa.text("0")),
+        sa.Column("takes", sa.Integer, nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index("ix_vehicle_usage_daily_user_day", "vehicle_usage_daily", ["user_id", "day"])
+
+    op.create_table(
+        "rollup_state",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column("last_id", sa.BigInteger, nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+
+    # источник выборки по водяному знаку
+    op.create_index("ix_vehicle_logs_action_id", "vehicle_logs", ["action", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_vehicle_logs_action_id", table_name="vehicle_logs")
+    op.drop_table("rollup_state")
+    op.drop_index("ix_vehicle_usage_daily_user_day", table_name="vehicle_usage_daily")
+    op.drop_table("vehicle_usage_daily")
+    op.drop_index("ix_vehicle_usage_intervals_open", table_name="vehicle_usage_intervals")
+    op.drop_table("vehicle_usage_intervals")
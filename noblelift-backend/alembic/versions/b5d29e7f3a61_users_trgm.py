@@ -0,0 +1,33 @@
+"""trigram indexes for user typeahead
+
+Revision ID: b5d29e7f3a61
+Revises: 0016_idempotency_keys
+Create Date: 2025-09-25 09:18:26.740215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0017_users_trgm"
+down_revision = "0016_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # GIN по триграммам обслуживает LIKE '%q%' и оператор похожести % для /users/suggest
+    op.execute("CREATE INDEX ix_users_full_name_trgm ON users USING gin (lower(full_name) gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)")
+    # недавние назначения текущего пользователя — для ранжирования подсказок
+    op.create_index("ix_tasks_creator_created", "tasks", ["creator_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_creator_created", table_name="tasks")
+    op.execute("DROP INDEX IF EXISTS ix_users_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_full_name_trgm")
@@ -0,0 +1,52 @@
+"""user task inbox and available tasks index
+
+Revision ID: c81f4a6d2e07
+Revises: 0017_users_trgm
+Create Date: 2025-09-26 14:33:08.915402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0018_user_task_inbox"
+down_revision = "0017_users_trgm"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_task_inbox",
+        sa.Column("user_id", sa.BigInteger, sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("task_id", sa.BigInteger, sa.ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("role", sa.String(16), primary_key=True),
+        sa.Column("sort_key", sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_index("ix_user_task_inbox_list", "user_task_inbox", ["user_id", "role", "sort_key"])
+    op.create_index("ix_user_task_inbox_task_id", "user_task_inbox", ["task_id"])
+    # бэкфилл; дальше таблицу ведут мутации задач (app/core/task_inbox.py)
+    op.execute(
+        """
+        INSERT INTO user_task_inbox (user_id, task_id, role, sort_key)
+        SELECT creator_id, id, 'creator', created_at FROM tasks WHERE archived_at IS NULL
+        UNION ALL
+        SELECT assignee_id, id, 'assignee', created_at FROM tasks
+        WHERE archived_at IS NULL AND assignee_id IS NOT NULL
+        """
+    )
+    # доступные для взятия задачи — малая доля таблицы
+    op.execute(
+        "CREATE INDEX ix_tasks_available ON tasks (created_at DESC) "
+        "WHERE type = 'common' AND is_private = false AND assignee_id IS NULL AND archived_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tasks_available")
+    op.drop_index("ix_user_task_inbox_task_id", table_name="user_task_inbox")
+    op.drop_index("ix_user_task_inbox_list", table_name="user_task_inbox")
+    op.drop_table("user_task_inbox")
@@ -0,0 +1,27 @@
+"""tasks version for optimistic concurrency
+
+Revision ID: d3b7f1a9c520
+Revises: 0013_vehicle_usage_rollups
+Create Date: 2025-09-22 11:07:41.512384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0014_tasks_version"
+down_revision = "0013_vehicle_usage_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # server_default заполняет существующие строки без отдельного UPDATE
+    op.add_column("tasks", sa.Column("version", sa.Integer, nullable=False, server_default=sa.text("1")))
+
+
+def downgrade() -> None:
+    op.drop_column("tasks", "version")
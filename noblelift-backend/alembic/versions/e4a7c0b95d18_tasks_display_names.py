@@ -0,0 +1,61 @@
+"""denormalized topic/assignee/creator names on tasks
+
+Revision ID: e4a7c0b95d18
+Revises: 0018_user_task_inbox
+Create Date: 2025-09-29 10:05:44.183960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0019_tasks_display_names"
+down_revision = "0018_user_task_inbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("topic_name", sa.String(128), nullable=True))
+    op.add_column("tasks", sa.Column("assignee_name", sa.String(255), nullable=True))
+    op.add_column("tasks", sa.Column("creator_name", sa.String(255), nullable=True))
+
+    op.execute("UPDATE tasks t SET topic_name = tt.name FROM task_topics tt WHERE tt.id = t.topic_id")
+    op.execute("UPDATE tasks t SET assignee_name = u.full_name FROM users u WHERE u.id = t.assignee_id")
+    op.execute("UPDATE tasks t SET creator_name = u.full_name FROM users u WHERE u.id = t.creator_id")
+
+    # имена подставляются при любой записи tasks, меняющей ссылку, — в том числе
+    # из ON DELETE SET NULL; переименования раздают update_user и update_topic
+    op.execute(
+        """
+        CREATE FUNCTION tasks_fill_names() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.topic_id IS DISTINCT FROM OLD.topic_id THEN
+                NEW.topic_name := (SELECT name FROM task_topics WHERE id = NEW.topic_id);
+            END IF;
+            IF TG_OP = 'INSERT' OR NEW.assignee_id IS DISTINCT FROM OLD.assignee_id THEN
+                NEW.assignee_name := (SELECT full_name FROM users WHERE id = NEW.assignee_id);
+            END IF;
+            IF TG_OP = 'INSERT' OR NEW.creator_id IS DISTINCT FROM OLD.creator_id THEN
+                NEW.creator_name := (SELECT full_name FROM users WHERE id = NEW.creator_id);
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fill_names BEFORE INSERT OR UPDATE OF topic_id, assignee_id, creator_id "
+        "ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_fill_names()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tasks_fill_names ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_fill_names()")
+    op.drop_column("tasks", "creator_name")
+    op.drop_column("tasks", "assignee_name")
+    op.drop_column("tasks", "topic_name")
@@ -0,0 +1,29 @@
+"""indexes for task visibility predicate
+
+Revision ID: f2c6d8a41b57
+Revises: 0019_tasks_display_names
+Create Date: 2025-09-30 16:21:12.604377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0020_task_visibility"
+down_revision = "0019_tasks_display_names"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # «с кем я в одной команде»: по user_id находим команды, по (team_id, user_id) — участников;
+    # второе покрывает уже существующий uq_team_user
+    op.create_index("ix_team_members_user_team", "team_members", ["user_id", "team_id"])
+    # проверки «автор/исполнитель — я» обслуживают ix_tasks_creator_created и ix_tasks_assignee
+
+
+def downgrade() -> None:
+    op.drop_index("ix_team_members_user_team", table_name="team_members")
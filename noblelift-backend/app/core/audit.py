@@ -1,16 +1,33 @@
 from __future__ import annotations
-from typing import Any, Mapping, Optional
+from typing import Any, Iterable, Mapping, Optional
 from fastapi import Request
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, Mapped
 from app.models.audit_log import AuditLog
 
+def _client(request: Request | None) -> tuple[Optional[str], Optional[str]]:
+    if request is None:
+        return None, None
+    return (request.client.host if request.client else None), request.headers.get("user-agent")
+
 def write_audit(db: Session, *, actor_id: Optional[Mapped[int]] | int,
                 action: str, entity: str, entity_id: Optional[Mapped[int]] | int = None,
-                payload: Mapping[str, Any] | None = None, request: Request | None = None) -> None:
-    ip = None
-    ua = None
-    if request is not None:
-        ip = request.client.host if request.client else None
-        ua = request.headers.get("user-agent")
+                payload: Mapping[str, Any] | None = None, request: Request | None = None,
+                commit: bool = True) -> None:
+    ip, ua = _client(request)
     db.add(AuditLog(actor_id=actor_id, action=action, entity=entity, entity_id=entity_id, payload=dict(payload) if payload else None, ip=ip, ua=ua))
-    db.commit()
+    # commit=False: запись войдёт в транзакцию вызывающего (пакетные операции)
+    if commit:
+        db.commit()
+
+def write_audit_many(db: Session, *, actor_id: int, action: str, entity: str, entity_ids: Iterable[int],
+                     payload: Mapping[str, Any] | None = None, request: Request | None = None) -> None:
+    """Одна запись на каждый entity_id одним INSERT; в транзакции вызывающего, без commit."""
+    ip, ua = _client(request)
+    rows = [
+        {"actor_id": actor_id, "action": action, "entity": entity, "entity_id": eid,
+         "payload": dict(payload) if payload else None, "ip": ip, "ua": ua}
+        for eid in entity_ids
+    ]
+    if rows:
+        db.execute(insert(AuditLog), rows)
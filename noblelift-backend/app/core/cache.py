@@ -0,0 +1,136 @@
+from __future__ import annotations
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+
+from app.core.config import settings
+
+# Кэш готовых JSON-ответов в памяти процесса. Хранит байты тела и ETag, поэтому
+# попадание не трогает ни БД, ни сериализацию. Каждый воркер держит свою копию:
+# записи живут не дольше ttl, а изменения сбрасывают их через invalidate(prefix).
+
+
+@dataclass(slots=True)
+class Entry:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # сравнение слабое: после сжатия ETag приходит с префиксом W/
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        # поколение растёт при каждой инвалидации; загрузка, начатая до неё, результат не сохраняет
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        _registry.append(self)
+
+    def get(self, key: str) -> Entry | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], etag: Callable[[Any], str] | None = None) -> Entry:
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        generation = self._generation
+        value = loader()
+        body = to_json(value, by_alias=True)
+        entry = Entry(body=body, etag=etag(value) if etag else make_etag(body), expires_at=time.monotonic() + self.ttl)
+        with self._lock:
+            if generation == self._generation:
+                self._data[key] = entry
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+        return entry
+
+    def invalidate(self, prefix: str = "") -> int:
+        with self._lock:
+            self._generation += 1
+            if not prefix:
+                n = len(self._data)
+                self._data.clear()
+                return n
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_registry: list[ResponseCache] = []
+
+
+def invalidate_local(prefix: str = "") -> int:
+    """Сбросить ключи с префиксом во всех кэшах этого процесса; пустой префикс — всё."""
+    return sum(c.invalidate(prefix) for c in _registry)
+
+
+def cache_stats() -> list[dict]:
+    return [c.stats() for c in _registry]
+
+
+def cached_response(request: Request, cache: ResponseCache, key: str, loader: Callable[[], Any],
+                    etag: Callable[[Any], str] | None = None) -> Response:
+    """etag — свой ETag по значению (например, версия записи) вместо хэша тела."""
+    entry = cache.get_or_load(key, loader, etag)
+    # no-cache: клиент хранит ответ, но каждый раз сверяет ETag и получает дешёвый 304
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def entity_key(kind: str, id: int) -> str:
+    # двоеточие в конце: префикс "task:1:" не задевает "task:10:"
+    return f"{kind}:{id}:"
+
+
+# сводки зависят от многих задач сразу, поэтому любое изменение задачи сбрасывает все
+DASHBOARD_PREFIX = "dashboard:"
+
+
+# справочники: роли, статусы, темы задач, каталоги документов
+ref_cache = ResponseCache("ref", ttl=settings.REF_CACHE_TTL_SEC, max_entries=64)
+# карточки сущностей (GET /tasks/{id}, /users/{id}, /vehicles/{id})
+entity_cache = ResponseCache("entity", ttl=settings.ENTITY_CACHE_TTL_SEC, max_entries=settings.ENTITY_CACHE_MAX_ENTRIES)
+# сводки задач по пользователям (GET /tasks/dashboard)
+dashboard_cache = ResponseCache("dashboard", ttl=settings.DASHBOARD_CACHE_TTL_SEC, max_entries=settings.ENTITY_CACHE_MAX_ENTRIES)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:  # brotli необязателен: без него отдаём только gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Сжатие ответов по Accept-Encoding. Чистый ASGI (без BaseHTTPMiddleware), поэтому
+# потоковые ответы (CSV-экспорт, файлы) сжимаются по частям, не собираясь в памяти.
+
+# типы, которые уже сжаты или не выигрывают от сжатия
+_SKIP_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+_SKIP_TYPES = {"application/zip", "application/gzip", "application/x-gzip", "application/pdf", "application/octet-stream"}
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        out[token] = q
+    return out
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli is not None else ("gzip",))
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    ct = content_type.split(";", 1)[0].strip().lower()
+    if not ct or ct in _SKIP_TYPES:
+        return False
+    return not ct.startswith(_SKIP_PREFIXES)
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            c = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._process, self._flush, self._finish = c.process, c.flush, c.finish
+        else:
+            c = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._process, self._flush, self._finish = c.compress, lambda: c.flush(zlib.Z_SYNC_FLUSH), c.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        # flush после каждой части, чтобы клиент получал поток без задержек
+        return self._process(data) + self._flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._process(data) + self._finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start: Message | None = None
+        self.passthrough = False
+        self.compressor: _Compressor | None = None
+        self.buffer = bytearray()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            self.passthrough = (
+                "content-encoding" in headers
+                or status < 200 or status in (204, 304)
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message  # заголовки отправим, когда станет ясен размер
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if kind != "http.response.body":
+            # например, http.response.pathsend: отдаём как есть
+            if self.start is not None:
+                await self.send(self.start)
+                self.start = None
+            self.passthrough = True
+            await self.send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.compressor is None:
+            # копим начало ответа, пока не станет ясно, дотягивает ли он до порога:
+            # вложенные middleware часто шлют тело частями, последняя из которых пустая
+            self.buffer += body
+            if more_body and len(self.buffer) < self.minimum_size:
+                return
+            body, self.buffer = bytes(self.buffer), bytearray()
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start)
+                self.start = None
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # сжатое представление не побайтно равно исходному
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                del headers["Content-Length"]
+                data = self.compressor.chunk(body)
+            else:
+                data = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(data))
+            await self.send(self.start)
+            self.start = None
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        data = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
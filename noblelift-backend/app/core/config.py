@@ -23,5 +23,53 @@ class Settings(BaseSettings):
 
     # STORAGE
     STORAGE_DIR: str = "var/storage"
+    STAGED_UPLOAD_TTL_SEC: int = 7 * 24 * 3600  # неприкреплённые офлайн-загрузки удаляются после этого
+
+    # WEB PUSH (ключи VAPID: base64url приватного ключа P-256 или PEM)
+    VAPID_PRIVATE_KEY: str = ""
+    VAPID_SUBJECT: str = "mailto:admin@example.com"
+    VAPID_TOKEN_TTL_SEC: int = 12 * 60 * 60
+    PUSH_TTL_SEC: int = 24 * 60 * 60
+    PUSH_BATCH_SIZE: int = 500            # уведомлений за один проход воркера
+    PUSH_CONCURRENCY: int = 200           # одновременных запросов всего
+    PUSH_PER_ORIGIN_CONCURRENCY: int = 50 # одновременных запросов к одному push-сервису
+    PUSH_MAX_ATTEMPTS: int = 5
+    PUSH_BACKOFF_BASE_SEC: float = 0.5
+    PUSH_POLL_INTERVAL_SEC: float = 1.0
+
+    # УВЕДОМЛЕНИЯ: хранение и дайджесты
+    NOTIFICATIONS_RETENTION_DAYS: int = 30   # прочитанные старше N дней удаляются
+    NOTIFICATIONS_MAX_PER_USER: int = 1000   # сверх лимита удаляются самые старые прочитанные
+    NOTIFICATIONS_DIGEST_PERIOD: str = "day" # hour|day|week; пусто — дайджесты выключены
+    NOTIFICATIONS_DIGEST_MIN: int = 5        # сколько однотипных уведомлений за период сворачивать
+    NOTIFICATIONS_CLEANUP_BATCH: int = 5000
+
+    # СЖАТИЕ ОТВЕТОВ И СТАТИКА
+    COMPRESSION_MIN_SIZE: int = 1024       # ответы меньше порога отдаются как есть
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4                # br используется, только если установлен пакет brotli
+    STATIC_MAX_AGE_SEC: int = 7 * 24 * 3600 # аватары сохраняются под уникальными именами
+
+    # КЭШ СПРАВОЧНИКОВ (роли, статусы, темы, каталоги) в памяти процесса
+    REF_CACHE_TTL_SEC: float = 10.0        # страховка, если сообщение шины инвалидации потерялось
+    CACHE_BUS_ENABLED: bool = True         # LISTEN/NOTIFY-шина инвалидации между воркерами
+    ENTITY_CACHE_TTL_SEC: float = 300.0    # карточки задач, пользователей, автомобилей
+    ENTITY_CACHE_MAX_ENTRIES: int = 5000
+    DASHBOARD_CACHE_TTL_SEC: float = 60.0  # «просрочено» зависит от времени, поэтому TTL короче
+
+    # IDEMPOTENCY-KEY для POST
+    IDEMPOTENCY_TTL_SEC: int = 24 * 3600   # сколько хранится сохранённый ответ
+    IDEMPOTENCY_WAIT_SEC: float = 30.0     # сколько дубль ждёт завершения первого запроса
+    IDEMPOTENCY_LOCK_SEC: int = 120        # после этого «зависшую» обработку можно перехватить
+    IDEMPOTENCY_MAX_BODY: int = 5 * 1024 * 1024  # ответы больше не сохраняются
+
+    # ФОНОВЫЕ ЗАДАЧИ (python -m app.workers.jobs)
+    JOBS_WORKERS: int = 2                  # процессов в пуле воркера
+    JOBS_POLL_INTERVAL_SEC: float = 1.0    # пауза, когда очередь пуста
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_BACKOFF_BASE_SEC: float = 10.0    # задержка повтора: base * 2^(попытка-1)
+    JOBS_LOCK_TIMEOUT_SEC: int = 3600      # задача «зависшего» воркера после этого берётся снова
+    JOBS_HEARTBEAT_SEC: float = 60.0       # как часто воркер продлевает блокировку выполняемой задачи
+    JOBS_RETENTION_DAYS: int = 7           # завершённые задачи и их артефакты
 
 settings = Settings()
\ No newline at end of file
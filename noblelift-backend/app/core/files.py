@@ -1,7 +1,10 @@
 from __future__ import annotations
 import os
+import re
+import time
+import uuid
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, Optional, Tuple
 from app.core.config import settings
 
 def task_dir(task_id: int) -> Path:
@@ -9,12 +12,62 @@ def task_dir(task_id: int) -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+def safe_filename(filename: str) -> str:
+    """Имя файла без разделителей пути; ValueError для пустого, "." и ".."."""
+    safe = (filename or "").replace("/", "_").replace("\\", "_").strip()
+    if safe in ("", ".", ".."):
+        raise ValueError("Invalid file name")
+    return safe
+
 def save_task_file(task_id: int, filename: str, data: bytes) -> Tuple[str, int]:
+    safe = safe_filename(filename)
     base = task_dir(task_id)
-    safe = filename.replace("/", "_").replace("\\", "_")
     path = base / safe
     with open(path, "wb") as f:
         f.write(data)
     size = path.stat().st_size
     rel = str(path)
     return rel, size
+
+def job_dir(job_id: int) -> Path:
+    p = Path(settings.STORAGE_DIR) / "jobs" / str(job_id)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+# Загрузки без задачи (офлайн-клиент): файл ждёт в staging, пока операция
+# upload_ref из /sync/mutations не привяжет его к задаче.
+_TOKEN_RE = re.compile(r"^[0-9a-f]{32}$")
+
+def staging_dir(user_id: int) -> Path:
+    return Path(settings.STORAGE_DIR) / "staging" / str(user_id)
+
+def save_staged_upload(user_id: int, filename: str, data: bytes) -> Tuple[str, int]:
+    safe = safe_filename(filename)
+    token = uuid.uuid4().hex
+    base = staging_dir(user_id) / token
+    base.mkdir(parents=True, exist_ok=True)
+    path = base / safe
+    with open(path, "wb") as f:
+        f.write(data)
+    return token, path.stat().st_size
+
+def find_staged_upload(user_id: int, token: str) -> Optional[Path]:
+    if not _TOKEN_RE.match(token or ""):
+        return None
+    base = staging_dir(user_id) / token
+    if not base.is_dir():
+        return None
+    return next((p for p in base.iterdir() if p.is_file()), None)
+
+def expired_staged_uploads(ttl_sec: float) -> Iterator[Path]:
+    """Каталоги загрузок staging/<user>/<token> старше ttl_sec."""
+    root = Path(settings.STORAGE_DIR) / "staging"
+    if not root.is_dir():
+        return
+    cutoff = time.time() - ttl_sec
+    for user_dir in root.iterdir():
+        if not user_dir.is_dir():
+            continue
+        for base in user_dir.iterdir():
+            if base.is_dir() and _TOKEN_RE.match(base.name) and base.stat().st_mtime < cutoff:
+                yield base
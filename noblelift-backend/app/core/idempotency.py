@@ -0,0 +1,222 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.session import engine
+from app.models.idempotency_key import IdempotencyKey
+
+# Idempotency-Key для POST. Первый запрос с ключом «захватывает» его строкой в
+# idempotency_keys и выполняется; ответ (кроме 5xx) сохраняется и на повторы
+# отдаётся побайтно. Дубли, пришедшие во время выполнения, ждут результата.
+# Тот же ключ с другим телом запроса — 422.
+
+log = logging.getLogger("app.idempotency")
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+_OWNER, _REPLAY, _MISMATCH, _BUSY = "owner", "replay", "mismatch", "busy"
+
+
+def _scope_of(headers: Headers) -> str:
+    auth = headers.get("authorization", "")
+    token = auth[7:].strip() if auth[:7].lower() == "bearer " else ""
+    if token:
+        try:
+            sub = decode_token(token).get("sub")
+            if sub:
+                return f"user:{sub}"
+        except ValueError:
+            pass
+    return "anon:" + hashlib.sha256(auth.encode()).hexdigest()[:32]
+
+
+def _fingerprint(scope: Scope, headers: Headers, body: bytes) -> str:
+    content_type = headers.get("content-type", "")
+    if "boundary=" in content_type:
+        # клиент при повторе генерирует новую границу multipart — она не часть запроса
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip('"')
+        body = body.replace(boundary.encode("latin-1"), b"")
+    h = hashlib.sha256()
+    h.update(scope["method"].encode())
+    h.update(b"\0" + scope["path"].encode())
+    h.update(b"\0" + scope.get("query_string", b""))
+    h.update(b"\0" + body)
+    return h.hexdigest()
+
+
+def _claim(scope_key: str, key: str, fingerprint: str):
+    T = IdempotencyKey
+    where = (T.scope == scope_key, T.key == key)
+    with engine.begin() as conn:
+        conn.execute(delete(T).where(*where, T.expires_at < func.now()))
+        inserted = conn.execute(
+            pg_insert(T)
+            .values(scope=scope_key, key=key, fingerprint=fingerprint,
+                    expires_at=func.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SEC))
+            .on_conflict_do_nothing()
+            .returning(T.key)
+        ).first()
+        if inserted:
+            return _OWNER, None
+        # владелец упал, не записав результат: перехватываем после IDEMPOTENCY_LOCK_SEC
+        taken = conn.execute(
+            update(T)
+            .where(*where, T.status == "processing", T.fingerprint == fingerprint,
+                   T.created_at < func.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SEC))
+            .values(created_at=func.now())
+            .returning(T.key)
+        ).first()
+        if taken:
+            return _OWNER, None
+        row = conn.execute(
+            select(T.fingerprint, T.status, T.status_code, T.headers, T.body).where(*where)
+        ).first()
+    if row is None:
+        return None, None  # строку только что удалили (5xx у владельца) — пробуем снова
+    if row.fingerprint != fingerprint:
+        return _MISMATCH, None
+    if row.status == "done":
+        return _REPLAY, row
+    return _BUSY, None
+
+
+def _finish(scope_key: str, key: str, status: int, headers: list, body: bytes) -> None:
+    T = IdempotencyKey
+    where = (T.scope == scope_key, T.key == key)
+    with engine.begin() as conn:
+        if status >= 500 or len(body) > settings.IDEMPOTENCY_MAX_BODY:
+            # 5xx не фиксируем: повтор должен выполниться заново
+            conn.execute(delete(T).where(*where))
+        else:
+            conn.execute(
+                update(T).where(*where)
+                .values(status="done", status_code=status, headers=headers, body=body)
+            )
+
+
+def _release(scope_key: str, key: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(IdempotencyKey).where(IdempotencyKey.scope == scope_key, IdempotencyKey.key == key))
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(HEADER)
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)(scope, receive, send)
+            return
+
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        scope_key = _scope_of(headers)
+        fingerprint = _fingerprint(scope, headers, body)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SEC
+        delay = 0.05
+        while True:
+            state, row = await run_in_threadpool(_claim, scope_key, key, fingerprint)
+            if state == _OWNER:
+                break
+            if state == _REPLAY:
+                await self._replay(row, send)
+                return
+            if state == _MISMATCH:
+                await JSONResponse(
+                    {"detail": "Idempotency-Key was used with a different request"}, status_code=422
+                )(scope, receive, send)
+                return
+            if time.monotonic() >= deadline:
+                await JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"}, status_code=409
+                )(scope, receive, send)
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        await self._execute(scope, receive, send, body, scope_key, key)
+
+    async def _replay(self, row, send: Send) -> None:
+        raw = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in (row.headers or [])]
+        raw.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": row.status_code, "headers": raw})
+        await send({"type": "http.response.body", "body": row.body or b"", "more_body": False})
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, body: bytes, scope_key: str, key: str) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        resp_headers: list = []
+        resp_body: list[bytes] = []
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status, resp_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                resp_headers = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                resp_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await run_in_threadpool(_release, scope_key, key)
+            raise
+        try:
+            await run_in_threadpool(_finish, scope_key, key, status, resp_headers, b"".join(resp_body))
+        except Exception:
+            # ответ клиенту уже отправлен; строка дождётся IDEMPOTENCY_LOCK_SEC и будет перехвачена
+            log.exception("failed to store idempotent response")
+
+
+def purge_expired(batch: int = 5000) -> int:
+    T = IdempotencyKey
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            n = conn.execute(
+                delete(T).where(tuple_(T.scope, T.key).in_(
+                    select(T.scope, T.key).where(T.expires_at < func.now()).limit(batch)
+                ))
+            ).rowcount
+        total += n
+        if n < batch:
+            return total
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.core.cache import invalidate_local
+from app.core.config import settings
+from app.db.session import engine
+
+# Шина инвалидации кэшей между воркерами и узлами поверх Postgres LISTEN/NOTIFY.
+# publish(prefix) вызывается после коммита: сразу чистит свой процесс и рассылает
+# NOTIFY; фоновый поток в каждом процессе слушает канал и чистит свои кэши.
+# Если соединение рвалось, сообщения могли потеряться — после переподключения
+# кэши процесса сбрасываются целиком.
+
+log = logging.getLogger("app.invalidation")
+
+CHANNEL = "cache_invalidate"
+ORIGIN = f"{socket.gethostname()}:{os.getpid()}"
+
+_metrics = {
+    "published": 0,
+    "publish_errors": 0,
+    "received": 0,
+    "reconnects": 0,
+    "connected": False,
+    "last_lag_ms": None,
+    "max_lag_ms": 0.0,
+    "avg_lag_ms": None,
+    "last_message_at": None,
+}
+_metrics_lock = threading.Lock()
+_listener: "_Listener | None" = None
+
+
+def publish(prefix: str) -> None:
+    """Инвалидировать ключи с префиксом во всех процессах. Вызывать после commit."""
+    invalidate_local(prefix)
+    payload = json.dumps({"p": prefix, "t": time.time(), "o": ORIGIN}, separators=(",", ":"))
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:ch, :payload)"), {"ch": CHANNEL, "payload": payload})
+    except Exception:
+        # не валим запрос: соседние процессы догонят по TTL кэша
+        log.exception("cache invalidation publish failed: %s", prefix)
+        with _metrics_lock:
+            _metrics["publish_errors"] += 1
+        return
+    with _metrics_lock:
+        _metrics["published"] += 1
+
+
+def _handle(payload: str) -> None:
+    try:
+        msg = json.loads(payload)
+        prefix, sent_at, origin = str(msg["p"]), float(msg["t"]), msg.get("o")
+    except (ValueError, KeyError, TypeError):
+        log.warning("bad invalidation payload: %r", payload)
+        return
+    if origin == ORIGIN:
+        return  # свой процесс уже почищен в publish()
+    invalidate_local(prefix)
+    # задержка по часам отправителя: между узлами включает расхождение часов
+    lag_ms = max((time.time() - sent_at) * 1000, 0.0)
+    with _metrics_lock:
+        _metrics["received"] += 1
+        _metrics["last_lag_ms"] = round(lag_ms, 2)
+        _metrics["max_lag_ms"] = round(max(_metrics["max_lag_ms"], lag_ms), 2)
+        avg = _metrics["avg_lag_ms"]
+        _metrics["avg_lag_ms"] = round(lag_ms if avg is None else avg * 0.9 + lag_ms * 0.1, 2)
+        _metrics["last_message_at"] = time.time()
+
+
+class _Listener(threading.Thread):
+    def __init__(self):
+        super().__init__(name="cache-invalidation", daemon=True)
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _connect(self):
+        # отдельное соединение вне пула: LISTEN держит его всё время жизни процесса
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def run(self) -> None:
+        backoff = 1.0
+        first = True
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with _metrics_lock:
+                    _metrics["connected"] = True
+                    if not first:
+                        _metrics["reconnects"] += 1
+                if not first:
+                    invalidate_local("")
+                first = False
+                backoff = 1.0
+                log.info("cache invalidation listener connected")
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            _handle(conn.notifies.pop(0).payload)
+            except Exception as e:
+                log.warning("cache invalidation listener failed (%s), reconnecting in %.0fs", e, backoff)
+                with _metrics_lock:
+                    _metrics["connected"] = False
+                first = False
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+        with _metrics_lock:
+            _metrics["connected"] = False
+
+
+def start_listener() -> None:
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = _Listener()
+        _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=5)
+        _listener = None
+
+
+def bus_metrics() -> dict:
+    with _metrics_lock:
+        out = dict(_metrics)
+    out["origin"] = ORIGIN
+    out["listening"] = _listener is not None and _listener.is_alive()
+    return out
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import logging
+import shutil
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.files import job_dir
+from app.db.session import SessionLocal, engine
+from app.models.job import Job
+
+# Очередь фоновых задач в таблице jobs. Запрос ставит задачу (enqueue) и сразу
+# отвечает 202; воркеры (python -m app.workers.jobs) забирают готовые задачи
+# через FOR UPDATE SKIP LOCKED и не пересекаются. Упавшая задача повторяется с
+# экспоненциальной задержкой до max_attempts; задача, чей воркер умер, после
+# JOBS_LOCK_TIMEOUT_SEC снова становится доступной.
+
+log = logging.getLogger("app.jobs")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_handlers: dict[str, Callable[["JobContext"], Optional[dict]]] = {}
+
+
+class JobLostError(RuntimeError):
+    """Задачу перехватил другой воркер (наша блокировка истекла) — результат не записываем."""
+
+
+def job_handler(type: str):
+    """Зарегистрировать обработчик задачи типа type. Модуль должен быть импортирован воркером."""
+    def register(fn):
+        _handlers[type] = fn
+        return fn
+    return register
+
+
+def enqueue(db: Session, type: str, payload: dict | None = None, *, created_by: int | None = None,
+            run_at: datetime | None = None, max_attempts: int | None = None) -> Job:
+    """Поставить задачу в очередь в транзакции вызывающего (commit — за ним)."""
+    job = Job(type=type, payload=payload, created_by=created_by,
+              max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS)
+    if run_at is not None:
+        job.run_at = run_at
+    db.add(job)
+    db.flush()
+    return job
+
+
+class JobContext:
+    """Что видит обработчик: payload, своя сессия БД, отчёт о прогрессе и артефакт."""
+
+    def __init__(self, job_id: int, type: str, payload: dict | None, created_by: int | None,
+                 attempt: int, max_attempts: int, worker_id: str):
+        self.id = job_id
+        self.type = type
+        self.payload = payload or {}
+        self.created_by = created_by
+        self.attempt = attempt
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id
+        self.db: Session = None  # type: ignore[assignment]  # открывается в execute()
+        self.artifact: tuple[str, str, str] | None = None
+
+    def progress(self, percent: int, message: str | None = None) -> None:
+        # отдельным соединением: прогресс виден сразу, даже пока транзакция обработчика открыта
+        if not _update_owned(self, progress=max(0, min(100, int(percent))), progress_message=message,
+                             locked_at=func.now()):
+            raise JobLostError(f"job {self.id} is no longer owned by {self.worker_id}")
+
+    def artifact_path(self, name: str, mime: str = "application/octet-stream") -> Path:
+        """Путь для файла-результата; после успеха его можно скачать через /jobs/{id}/artifact."""
+        safe = name.replace("/", "_").replace("\\", "_")
+        path = job_dir(self.id) / safe
+        self.artifact = (str(path), safe, mime)
+        return path
+
+
+def claim(worker_id: str) -> Optional[JobContext]:
+    """Захватить одну готовую задачу; None — очередь пуста."""
+    ready = (
+        select(Job.id)
+        .where(Job.status == QUEUED, Job.run_at <= func.now())
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    with engine.begin() as conn:
+        row = conn.execute(
+            update(Job).where(Job.id == ready.scalar_subquery())
+            .values(status=RUNNING, locked_at=func.now(), locked_by=worker_id, attempts=Job.attempts + 1,
+                    started_at=func.coalesce(Job.started_at, func.now()))
+            .returning(Job.id, Job.type, Job.payload, Job.created_by, Job.attempts, Job.max_attempts)
+        ).first()
+    if row is None:
+        return None
+    return JobContext(row.id, row.type, row.payload, row.created_by, row.attempts, row.max_attempts, worker_id)
+
+
+def _update_owned(ctx: JobContext, **values: Any) -> bool:
+    """UPDATE задачи, только пока она наша: RUNNING и заблокирована этим воркером."""
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Job).where(Job.id == ctx.id, Job.status == RUNNING, Job.locked_by == ctx.worker_id)
+            .values(**values)
+        ).rowcount > 0
+
+
+@contextmanager
+def heartbeat(ctx: JobContext):
+    """Продлевать блокировку фоновым потоком, пока выполняется обработчик,
+    чтобы долгую задачу без вызовов progress() не перехватили как зависшую."""
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(settings.JOBS_HEARTBEAT_SEC):
+            try:
+                if not _update_owned(ctx, locked_at=func.now()):
+                    log.warning("job %s: lock lost", ctx.id)
+                    return
+            except Exception:
+                log.exception("job %s: heartbeat failed", ctx.id)
+
+    thread = threading.Thread(target=beat, name=f"job-{ctx.id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale() -> int:
+    """Вернуть в очередь задачи, чей воркер не отчитывался дольше JOBS_LOCK_TIMEOUT_SEC.
+    Исчерпавшие попытки завершаются с ошибкой: задача, убивающая воркер (OOM и т.п.),
+    иначе перезапускалась бы бесконечно."""
+    stale = (Job.status == RUNNING, Job.locked_at < func.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SEC))
+    with engine.begin() as conn:
+        failed = conn.execute(
+            update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status=FAILED, error="Worker lost", finished_at=func.now(), locked_at=None, locked_by=None)
+        ).rowcount
+        requeued = conn.execute(
+            update(Job).where(*stale)
+            .values(status=QUEUED, locked_at=None, locked_by=None)
+        ).rowcount
+    if failed or requeued:
+        log.warning("stale jobs: requeued=%s failed=%s", requeued, failed)
+    return failed + requeued
+
+
+def _retry_delay(attempt: int) -> timedelta:
+    return timedelta(seconds=settings.JOBS_BACKOFF_BASE_SEC * (2 ** (attempt - 1)))
+
+
+def _finish(ctx: JobContext, **values: Any) -> None:
+    if not _update_owned(ctx, locked_at=None, locked_by=None, **values):
+        # после перехвата итог пишет новый владелец, наш не должен его затереть
+        log.warning("job %s: lock lost, result of attempt %s discarded", ctx.id, ctx.attempt)
+
+
+def execute(ctx: JobContext) -> str:
+    """Выполнить захваченную задачу и записать итог. Возвращает новый статус."""
+    handler = _handlers.get(ctx.type)
+    if handler is None:
+        _finish(ctx, status=FAILED, error=f"Unknown job type: {ctx.type}", finished_at=func.now())
+        log.error("job %s: unknown type %s", ctx.id, ctx.type)
+        return FAILED
+    try:
+        with SessionLocal() as db:
+            ctx.db = db
+            result = handler(ctx)
+            db.commit()
+    except JobLostError:
+        log.warning("job %s (%s) attempt %s aborted: lock lost", ctx.id, ctx.type, ctx.attempt)
+        return RUNNING
+    except Exception:
+        error = traceback.format_exc(limit=20)
+        if ctx.attempt < ctx.max_attempts:
+            delay = _retry_delay(ctx.attempt)
+            _finish(ctx, status=QUEUED, error=error, run_at=func.now() + delay)
+            log.warning("job %s (%s) attempt %s/%s failed, retry in %ss",
+                        ctx.id, ctx.type, ctx.attempt, ctx.max_attempts, delay.total_seconds(), exc_info=True)
+            return QUEUED
+        _finish(ctx, status=FAILED, error=error, finished_at=func.now())
+        log.error("job %s (%s) failed after %s attempts", ctx.id, ctx.type, ctx.attempt, exc_info=True)
+        return FAILED
+    path, name, mime = ctx.artifact or (None, None, None)
+    _finish(ctx, status=DONE, progress=100, result=result, error=None, finished_at=func.now(),
+            artifact_path=path, artifact_name=name, artifact_mime=mime)
+    log.info("job %s (%s) done", ctx.id, ctx.type)
+    return DONE
+
+
+def purge_finished(batch: int = 1000) -> int:
+    """Удалить завершённые задачи старше JOBS_RETENTION_DAYS вместе с артефактами."""
+    cutoff = func.now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(Job.id).where(Job.status.in_((DONE, FAILED)), Job.finished_at < cutoff)
+                .order_by(Job.id).limit(batch).with_for_update(skip_locked=True)
+            ).scalars().all()
+            if ids:
+                conn.execute(Job.__table__.delete().where(Job.id.in_(ids)))
+        for id in ids:
+            shutil.rmtree(Path(settings.STORAGE_DIR) / "jobs" / str(id), ignore_errors=True)
+        total += len(ids)
+        if len(ids) < batch:
+            return total
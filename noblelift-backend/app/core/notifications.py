@@ -0,0 +1,44 @@
+from __future__ import annotations
+from typing import Any, Iterable, Mapping
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+
+# Счётчик непрочитанных ведётся инкрементально в той же транзакции, что и изменение уведомлений.
+# Функции ничего не коммитят — это делает вызывающий код.
+
+def adjust_unread(db: Session, user_id: int, delta: int) -> None:
+    if not delta:
+        return
+    stmt = pg_insert(NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            "unread": func.greatest(NotificationCounter.unread + delta, 0),
+            "updated_at": func.now(),
+        },
+    ))
+
+def unread_count(db: Session, user_id: int) -> int:
+    value = db.execute(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    ).scalar_one_or_none()
+    return int(value or 0)
+
+def unread_counts(db: Session, user_ids: Iterable[int]) -> dict[int, int]:
+    ids = list(set(user_ids))
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(NotificationCounter.user_id, NotificationCounter.unread).where(NotificationCounter.user_id.in_(ids))
+    ).all()
+    return {r.user_id: int(r.unread) for r in rows}
+
+def create_notification(db: Session, *, user_id: int, type: str, title: str,
+                        message: str | None = None, data: Mapping[str, Any] | None = None) -> Notification:
+    n = Notification(user_id=user_id, type=type, title=title, message=message, data=dict(data) if data else None)
+    db.add(n)
+    adjust_unread(db, user_id, 1)
+    return n
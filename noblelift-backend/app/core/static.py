@@ -0,0 +1,55 @@
+from __future__ import annotations
+import mimetypes
+import os
+import stat
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.compression import parse_accept_encoding
+from app.core.config import settings
+
+# Статика с заранее сжатыми копиями (file.js.br / file.js.gz рядом с оригиналом)
+# и заголовками кэширования. ETag/Last-Modified и 304 даёт сам StaticFiles.
+
+_SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args, max_age: int | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = settings.STATIC_MAX_AGE_SEC if max_age is None else max_age
+
+    def _sidecar(self, full_path: str, request_headers: Headers) -> tuple[str, str, os.stat_result] | None:
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in _SIDECARS:
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            try:
+                st = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                return encoding, full_path + suffix, st
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+
+        sidecar = self._sidecar(full_path, request_headers)
+        if sidecar is not None:
+            encoding, path, st = sidecar
+            media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+            response = FileResponse(path, status_code=status_code, stat_result=st, media_type=media_type)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        response.headers.add_vary_header("Accept-Encoding")
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from typing import Iterable
+
+from sqlalchemy import delete, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.task import Task as TaskModel
+from app.models.user_task_inbox import UserTaskInbox
+
+# Входящие задачи пользователя (fan-out on write): строка на пару (пользователь,
+# неархивная задача) для каждой роли — автор и исполнитель. Мутации задач
+# пересобирают строки своих задач в той же транзакции, поэтому «мои задачи» —
+# диапазон по индексу (user_id, role, sort_key) без фильтрации tasks.
+
+ROLES = ("creator", "assignee")
+
+
+def expected_rows(task_ids: Iterable[int] | None = None):
+    """SELECT строк inbox, которые должны существовать (по всем задачам или по task_ids)."""
+    T = TaskModel
+    ids = list(task_ids) if task_ids is not None else None
+
+    def part(user_col, role: str, *where):
+        stmt = select(
+            user_col.label("user_id"), T.id.label("task_id"),
+            literal(role).label("role"), T.created_at.label("sort_key"),
+        ).where(T.archived_at.is_(None), user_col.is_not(None), *where)
+        return stmt.where(T.id.in_(ids)) if ids is not None else stmt
+
+    return union_all(part(T.creator_id, "creator"), part(T.assignee_id, "assignee"))
+
+
+def _insert_from(stmt):
+    I = UserTaskInbox
+    return I.__table__.insert().from_select(["user_id", "task_id", "role", "sort_key"], stmt)
+
+
+def sync_task_inbox(db: Session, task_ids: Iterable[int]) -> None:
+    """Пересобрать строки inbox для задач; вызывать до commit в транзакции мутации."""
+    ids = list(task_ids)
+    if not ids:
+        return
+    db.execute(delete(UserTaskInbox).where(UserTaskInbox.task_id.in_(ids)))
+    db.execute(_insert_from(expected_rows(ids)))
+
+
+def rebuild_task_inbox(db: Session) -> int:
+    """Полная пересборка (бэкфилл). Возвращает число строк."""
+    db.execute(delete(UserTaskInbox))
+    n = db.execute(_insert_from(expected_rows())).rowcount
+    db.commit()
+    return n
+
+
+def check_task_inbox(db: Session, fix: bool = False) -> dict:
+    """Сверить inbox с tasks: лишние и недостающие строки; fix — пересобрать расходящиеся задачи."""
+    I = UserTaskInbox
+    expected = expected_rows().subquery()
+    actual = select(I.user_id, I.task_id, I.role, I.sort_key)
+    exp = select(expected.c.user_id, expected.c.task_id, expected.c.role, expected.c.sort_key)
+    missing = db.execute(select(exp.except_(actual).subquery().c.task_id)).scalars().all()
+    extra = db.execute(select(actual.except_(exp).subquery().c.task_id)).scalars().all()
+    broken = sorted(set(missing) | set(extra))
+    if fix and broken:
+        sync_task_inbox(db, broken)
+        db.commit()
+    return {"missing": len(missing), "extra": len(extra), "tasks": len(broken), "fixed": bool(fix and broken)}
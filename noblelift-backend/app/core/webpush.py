@@ -0,0 +1,103 @@
+from __future__ import annotations
+import base64
+import json
+import os
+import struct
+import time
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.core.config import settings
+
+# Web Push: шифрование полезной нагрузки (RFC 8291, aes128gcm) и VAPID-подпись (RFC 8292)
+
+RECORD_SIZE = 4096
+
+
+def b64url_decode(value: str) -> bytes:
+    value = value.strip()
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _hkdf(salt: bytes, ikm: bytes, info: bytes, length: int) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=salt, info=info).derive(ikm)
+
+
+def _public_bytes(key: ec.EllipticCurvePublicKey) -> bytes:
+    return key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+
+
+def encrypt_payload(payload: bytes, p256dh: str, auth: str) -> bytes:
+    """Зашифровать payload для подписки (один record, Content-Encoding: aes128gcm)."""
+    ua_public = b64url_decode(p256dh)
+    auth_secret = b64url_decode(auth)
+    ua_key = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), ua_public)
+
+    as_private = ec.generate_private_key(ec.SECP256R1())
+    as_public = _public_bytes(as_private.public_key())
+    ecdh_secret = as_private.exchange(ec.ECDH(), ua_key)
+
+    ikm = _hkdf(auth_secret, ecdh_secret, b"WebPush: info\x00" + ua_public + as_public, 32)
+    salt = os.urandom(16)
+    cek = _hkdf(salt, ikm, b"Content-Encoding: aes128gcm\x00", 16)
+    nonce = _hkdf(salt, ikm, b"Content-Encoding: nonce\x00", 12)
+
+    if len(payload) + 1 + 16 > RECORD_SIZE:
+        raise ValueError("Push payload is too large")
+    ciphertext = AESGCM(cek).encrypt(nonce, payload + b"\x02", None)
+    header = salt + struct.pack("!IB", RECORD_SIZE, len(as_public)) + as_public
+    return header + ciphertext
+
+
+@lru_cache(maxsize=1)
+def _vapid_key() -> ec.EllipticCurvePrivateKey:
+    raw = settings.VAPID_PRIVATE_KEY
+    if not raw:
+        raise RuntimeError("VAPID_PRIVATE_KEY is not configured")
+    if raw.lstrip().startswith("-----BEGIN"):
+        key = serialization.load_pem_private_key(raw.encode("utf-8"), password=None)
+        if not isinstance(key, ec.EllipticCurvePrivateKey):
+            raise RuntimeError("VAPID_PRIVATE_KEY must be an EC P-256 key")
+        return key
+    try:
+        return ec.derive_private_key(int.from_bytes(b64url_decode(raw), "big"), ec.SECP256R1())
+    except ValueError as e:
+        raise RuntimeError(f"VAPID_PRIVATE_KEY is invalid: {e}") from e
+
+
+def vapid_public_key() -> str:
+    return b64url_encode(_public_bytes(_vapid_key().public_key()))
+
+
+_vapid_tokens: dict[str, tuple[str, int]] = {}
+
+
+def vapid_authorization(endpoint: str) -> str:
+    """Заголовок Authorization для push-сервиса; токен кэшируется по origin до истечения."""
+    parts = urlsplit(endpoint)
+    aud = f"{parts.scheme}://{parts.netloc}"
+    now = int(time.time())
+    cached = _vapid_tokens.get(aud)
+    if cached and cached[1] - 60 > now:
+        return cached[0]
+
+    exp = now + settings.VAPID_TOKEN_TTL_SEC
+    header = b64url_encode(json.dumps({"typ": "JWT", "alg": "ES256"}, separators=(",", ":")).encode())
+    claims = b64url_encode(json.dumps({"aud": aud, "exp": exp, "sub": settings.VAPID_SUBJECT}, separators=(",", ":")).encode())
+    signing_input = f"{header}.{claims}".encode("ascii")
+    r, s = decode_dss_signature(_vapid_key().sign(signing_input, ec.ECDSA(hashes.SHA256())))
+    token = f"{header}.{claims}.{b64url_encode(r.to_bytes(32, 'big') + s.to_bytes(32, 'big'))}"
+
+    value = f"vapid t={token}, k={vapid_public_key()}"
+    _vapid_tokens[aud] = (value, exp)
+    return value
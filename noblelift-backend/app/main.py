@@ -1,8 +1,8 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from fastapi.exceptions import RequestValidationError
@@ -11,6 +11,10 @@ from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
 
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.static import CachedStaticFiles
+from app.core.invalidation import start_listener, stop_listener
 from app.core.logs import setup_logging, gen_request_id, set_request_id
 from app.core.errors import (
     http_exception_handler,
@@ -26,13 +30,27 @@ from app.routes import vehicles
 from app.routes import directories, documents, permissions
 from app.routes import notifications, push, teams
 from app.routes import audit
+from app.routes import sync, batch, bootstrap, jobs
 
 setup_logging(debug=settings.DEBUG)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # слушатель шины инвалидации кэшей: по одному на процесс uvicorn
+    if settings.CACHE_BUS_ENABLED:
+        start_listener()
+    try:
+        yield
+    finally:
+        stop_listener()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="API для корпоративного приложения Noblelift",
+    lifespan=lifespan,
 )
 
 # if settings.CORS_ORIGINS:
@@ -61,7 +79,11 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
         response.headers["X-Request-ID"] = rid
         return response
 
+# внутри RequestIdMiddleware: повтор получает свой X-Request-ID
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(RequestIdMiddleware)
+# последним = внешним: сжимает всё, включая статику и ответы об ошибках
+app.add_middleware(CompressionMiddleware)
 
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -87,8 +109,12 @@ app.include_router(notifications.router, prefix="/api/v1")
 app.include_router(push.router, prefix="/api/v1")
 app.include_router(teams.router, prefix="/api/v1")
 app.include_router(audit.router, prefix="/api/v1")
+app.include_router(sync.router, prefix="/api/v1")
+app.include_router(batch.router, prefix="/api/v1")
+app.include_router(bootstrap.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
 
 # Static files (avatars etc.)
 uploads_dir = Path(__file__).resolve().parent.parent / "uploads"
 uploads_dir.mkdir(exist_ok=True)
-app.mount("/api/v1/static", StaticFiles(directory=str(uploads_dir)), name="static")
+app.mount("/api/v1/static", CachedStaticFiles(directory=str(uploads_dir)), name="static")
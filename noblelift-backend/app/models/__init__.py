@@ -9,16 +9,25 @@ from .task_file import TaskFile
 from .task_event import TaskEvent
 from .vehicle import Vehicle
 from .vehicle_log import VehicleLog
+from .vehicle_reservation import VehicleReservation
+from .vehicle_usage import VehicleUsageInterval, VehicleUsageDaily, RollupState
 from .directory import Directory
 from .document import Document
 from .document_version import DocumentVersion
 from .permission import Permission
 from .notification import Notification
+from .notification_counter import NotificationCounter
 from .push_subscription import PushSubscription
 from .team import Team
 from .team_member import TeamMember
 from .audit_log import AuditLog
+from .sync_op import SyncOp
+from .idempotency_key import IdempotencyKey
+from .user_task_inbox import UserTaskInbox
+from .job import Job
 
 __all__ = ["Base", "Role", "ProfileStatus", "User", "Profile", "TaskTopic", "Task", "TaskFile", "TaskEvent"]
-__all__ += ["Vehicle", "VehicleLog", "Directory", "Document", "DocumentVersion", "Permission"]
-__all__ += ["Notification", "PushSubscription", "Team", "TeamMember", "AuditLog"]
+__all__ += ["Vehicle", "VehicleLog", "VehicleReservation", "Directory", "Document", "DocumentVersion", "Permission"]
+__all__ += ["VehicleUsageInterval", "VehicleUsageDaily", "RollupState"]
+__all__ += ["Notification", "NotificationCounter", "PushSubscription", "Team", "TeamMember", "AuditLog", "SyncOp"]
+__all__ += ["IdempotencyKey", "UserTaskInbox", "Job"]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import String, SmallInteger, TIMESTAMP, JSON, LargeBinary, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    """Ответы на POST с заголовком Idempotency-Key; scope — пользователь из токена."""
+    __tablename__ = "idempotency_keys"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default=text("'processing'"))  # processing|done
+    status_code: Mapped[int | None] = mapped_column(SmallInteger)
+    headers: Mapped[list | None] = mapped_column(JSON)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, index=True)
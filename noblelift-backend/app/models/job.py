@@ -0,0 +1,39 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, String, SmallInteger, TIMESTAMP, JSON, Text, ForeignKey, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class Job(Base):
+    """Фоновая задача: ставится запросом, выполняется воркером app.workers.jobs."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # очередь: готовые к запуску в порядке run_at; выполненные в индекс не попадают
+        Index("ix_jobs_queued", "run_at", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "locked_at", postgresql_where=text("status = 'running'")),
+        Index("ix_jobs_finished_at", "finished_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    type: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default=text("'queued'"))  # queued|running|done|failed
+    payload: Mapped[dict | None] = mapped_column(JSON)
+    created_by: Mapped[int | None] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="SET NULL"), index=True)
+
+    attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, server_default=text("0"))
+    max_attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, server_default=text("3"))
+    run_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    locked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    locked_by: Mapped[str | None] = mapped_column(String(128))
+
+    progress: Mapped[int] = mapped_column(SmallInteger, nullable=False, server_default=text("0"))  # 0..100
+    progress_message: Mapped[str | None] = mapped_column(String(255))
+    result: Mapped[dict | None] = mapped_column(JSON)
+    error: Mapped[str | None] = mapped_column(Text)
+    artifact_path: Mapped[str | None] = mapped_column(String(512))
+    artifact_name: Mapped[str | None] = mapped_column(String(255))
+    artifact_mime: Mapped[str | None] = mapped_column(String(128))
+
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    started_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
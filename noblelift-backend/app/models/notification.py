@@ -16,5 +16,6 @@ class Notification(Base):
     is_read: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("false"))
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
     read_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    pushed_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
 
     user = relationship("User")
@@ -0,0 +1,12 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, TIMESTAMP, ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
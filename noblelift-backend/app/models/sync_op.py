@@ -0,0 +1,19 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, String, SmallInteger, TIMESTAMP, JSON, ForeignKey, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class SyncOp(Base):
+    """Журнал операций, принятых через /sync/mutations; ключ идемпотентности — (user_id, client_op_id)."""
+    __tablename__ = "sync_ops"
+    __table_args__ = (UniqueConstraint("user_id", "client_op_id", name="uq_sync_ops_user_op"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    client_op_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    type: Mapped[str] = mapped_column(String(32), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default=text("'pending'"))  # pending|applied|failed
+    code: Mapped[int | None] = mapped_column(SmallInteger)
+    result: Mapped[dict | None] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
@@ -23,8 +23,17 @@ class Task(Base):
     topic_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("task_topics.id", ondelete="SET NULL"))
     assignee_id: Mapped[int | None] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="SET NULL"))
     creator_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="RESTRICT"))
+    team_id: Mapped[int | None] = mapped_column(BigInteger, ForeignKey("teams.id", ondelete="SET NULL"))
+
+    # копии имён для списков и экспорта без join-ов; заполняет триггер tasks_fill_names,
+    # переименования раздают update_user и update_topic
+    topic_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    assignee_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    creator_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     archived_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    # растёт при каждом изменении задачи; отдаётся как ETag, проверяется по If-Match
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
 
     topic: Mapped["TaskTopic | None"] = relationship("TaskTopic", lazy="joined")  # noqa
     assignee: Mapped["User | None"] = relationship("User", foreign_keys=[assignee_id], lazy="joined")  # noqa
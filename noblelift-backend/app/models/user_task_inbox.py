@@ -0,0 +1,15 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, String, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class UserTaskInbox(Base):
+    """Неархивные задачи пользователя по ролям (creator|assignee); ведётся мутациями задач."""
+    __tablename__ = "user_task_inbox"
+    __table_args__ = (Index("ix_user_task_inbox_list", "user_id", "role", "sort_key"),)
+
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    task_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True, index=True)
+    role: Mapped[str] = mapped_column(String(16), primary_key=True)
+    sort_key: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)  # tasks.created_at
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import BigInteger, Text, ForeignKey, TIMESTAMP, CheckConstraint, text
+from sqlalchemy.dialects.postgresql import TSTZRANGE, Range, ExcludeConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class VehicleReservation(Base):
+    __tablename__ = "vehicle_reservations"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    vehicle_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    during: Mapped[Range[datetime]] = mapped_column(TSTZRANGE, nullable=False)  # [начало, конец)
+    note: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+    # пересечения броней одной машины отсекает сама БД; GiST-индекс ограничения
+    # обслуживает и проверки доступности
+    __table_args__ = (
+        ExcludeConstraint((vehicle_id, "="), (during, "&&"), using="gist", name="ex_vehicle_reservations_overlap"),
+        CheckConstraint("NOT isempty(during)", name="ck_vehicle_reservations_nonempty"),
+    )
+
+    @property
+    def starts_at(self) -> datetime:
+        return self.during.lower
+
+    @property
+    def ends_at(self) -> datetime:
+        return self.during.upper
@@ -0,0 +1,43 @@
+from __future__ import annotations
+from datetime import date, datetime
+from sqlalchemy import BigInteger, Integer, String, Date, ForeignKey, TIMESTAMP, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+# пара take/release из vehicle_logs; released_at пуст, пока машина на руках
+class VehicleUsageInterval(Base):
+    __tablename__ = "vehicle_usage_intervals"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    vehicle_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)  # 0 — пользователь неизвестен
+    take_log_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False)
+    release_log_id: Mapped[int | None] = mapped_column(BigInteger)
+    taken_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    released_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        Index("ix_vehicle_usage_intervals_open", "vehicle_id", postgresql_where=text("released_at IS NULL")),
+    )
+
+# суточные агрегаты использования (по UTC-дням)
+class VehicleUsageDaily(Base):
+    __tablename__ = "vehicle_usage_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    vehicle_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    seconds_in_use: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    takes: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+    __table_args__ = (
+        Index("ix_vehicle_usage_daily_user_day", "user_id", "day"),
+    )
+
+# водяные знаки инкрементальных пересчётов: последний обработанный id источника
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
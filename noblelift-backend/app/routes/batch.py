@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from typing import Any, Literal, Optional
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import Field
+
+from app.routes.deps import get_current_user
+from app.models.user import User as UserModel
+from app.schemas import CamelModel
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+log = logging.getLogger("app.batch")
+
+# Несколько вызовов API за один round trip. Подзапросы выполняются внутри
+# процесса через ASGI-приложение (со всеми middleware), токен проверяется один
+# раз: id пользователя передаётся подзапросам через scope["state"].
+# Подряд идущие GET выполняются параллельно, остальные — строго по порядку.
+
+API_PREFIX = "/api/v1"
+MAX_SUBREQUESTS = 20
+_INTERNAL_ERROR = (500, [(b"content-type", b"application/json")],
+                   b'{"error":{"code":"internal_error","message":"Internal server error","details":null}}')
+# заголовки подзапроса, которые клиент может задать сам
+_ALLOWED_HEADERS = {"if-none-match", "if-match", "accept-language"}
+
+
+class SubRequest(CamelModel):
+    id: str = Field(min_length=1, max_length=64)
+    method: Literal["GET", "POST", "PATCH", "PUT", "DELETE"] = "GET"
+    path: str = Field(min_length=1, max_length=2048)  # относительно /api/v1, с query string
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+class BatchRequest(CamelModel):
+    requests: list[SubRequest] = Field(min_length=1, max_length=MAX_SUBREQUESTS)
+
+
+def _build_scope(parent: Request, sub: SubRequest, user_id: int, body: bytes) -> dict:
+    parts = urlsplit(sub.path)
+    path = parts.path if parts.path.startswith(API_PREFIX + "/") else API_PREFIX + "/" + parts.path.lstrip("/")
+    if path.rstrip("/") == API_PREFIX + router.prefix:
+        raise HTTPException(status_code=400, detail="Nested batch requests are not allowed")
+
+    headers = [(b"authorization", parent.headers.get("authorization", "").encode("latin-1"))]
+    for k, v in sub.headers.items():
+        if k.lower() in _ALLOWED_HEADERS:
+            headers.append((k.lower().encode("latin-1"), v.encode("latin-1")))
+    if body:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+    rid = parent.headers.get("x-request-id")
+    if rid:
+        headers.append((b"x-request-id", f"{rid}.{sub.id}".encode("latin-1")))
+
+    scope = parent.scope
+    return {
+        "type": "http",
+        "asgi": scope.get("asgi", {"version": "3.0"}),
+        "http_version": scope.get("http_version", "1.1"),
+        "method": sub.method,
+        "scheme": scope.get("scheme", "http"),
+        "server": scope.get("server"),
+        "client": scope.get("client"),
+        "root_path": scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": parts.query.encode(),
+        "headers": headers,
+        "state": {"batch_user_id": user_id},
+    }
+
+
+async def _run(app, scope: dict, body: bytes) -> tuple[int, list, bytes]:
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # подзапрос не разрывает соединение сам
+
+    status = 500
+    headers: list = []
+    chunks: list[bytes] = []
+    started = False
+
+    async def send(message):
+        nonlocal status, headers, started
+        if message["type"] == "http.response.start":
+            started = True
+            status = message["status"]
+            headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware отправляет 500 и пробрасывает исключение дальше;
+        # ошибка одного подзапроса не должна ронять весь пакет
+        log.exception("batch sub-request %s %s failed", scope["method"], scope["path"])
+        if not started:
+            return _INTERNAL_ERROR
+    return status, headers, b"".join(chunks)
+
+
+def _encode_item(sub_id: str, status: int, headers: list, body: bytes) -> bytes:
+    hdrs = {k.decode("latin-1"): v.decode("latin-1") for k, v in headers}
+    meta = {"id": sub_id, "status": status}
+    if "etag" in hdrs:
+        meta["etag"] = hdrs["etag"]
+    head = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))[:-1]
+    if not body:
+        return (head + ',"body":null}').encode()
+    if hdrs.get("content-type", "").startswith("application/json"):
+        # JSON подзапроса вставляется как есть, без повторного разбора и сериализации
+        return head.encode() + b',"body":' + body + b"}"
+    return (head + ',"body":' + json.dumps(body.decode("utf-8", "replace"), ensure_ascii=False) + "}").encode()
+
+
+@router.post("")
+async def run_batch(
+    payload: BatchRequest,
+    request: Request,
+    current: UserModel = Depends(get_current_user),
+):
+    ids = [r.id for r in payload.requests]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Sub-request ids must be unique")
+
+    app = request.app
+    prepared = []
+    for sub in payload.requests:
+        body = json.dumps(sub.body).encode() if sub.body is not None else b""
+        prepared.append((sub, _build_scope(request, sub, current.id, body), body))
+
+    results: list[bytes] = []
+    i = 0
+    while i < len(prepared):
+        j = i
+        while j < len(prepared) and prepared[j][0].method == "GET":
+            j += 1
+        if j > i:
+            group = prepared[i:j]
+            outs = await asyncio.gather(*(_run(app, scope, body) for _, scope, body in group), return_exceptions=True)
+            outs = [_INTERNAL_ERROR if isinstance(out, BaseException) else out for out in outs]
+            results.extend(_encode_item(sub.id, *out) for (sub, _, _), out in zip(group, outs))
+            i = j
+        else:
+            sub, scope, body = prepared[i]
+            results.append(_encode_item(sub.id, *await _run(app, scope, body)))
+            i += 1
+
+    return Response(content=b'{"items":[' + b",".join(results) + b"]}", media_type="application/json")
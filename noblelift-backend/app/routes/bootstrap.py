@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import Entry, entity_cache, entity_key, make_etag, ref_cache
+from app.db.session import get_db
+from app.routes.deps import get_current_user
+from app.routes.directories import load_directories
+from app.routes.roles import load_roles
+from app.routes.statuses import load_statuses
+from app.routes.task_topics import load_topics
+from app.routes.tasks import task_list_select
+from app.routes.users import USER_DIRECTORY_KEY, load_user, load_user_directory
+from app.models.task import Task as TaskModel
+from app.models.user_task_inbox import UserTaskInbox as InboxModel
+from app.models.user import User as UserModel
+from app.schemas.task import Task as TaskSchema
+from app.utils.projection import project
+
+router = APIRouter(prefix="/bootstrap", tags=["Bootstrap"])
+
+# Контекст сессии одним запросом при старте клиента. Каждая часть имеет версию
+# (ETag её тела); клиент передаёт известные ему версии в ?have=part:version,...
+# и получает только изменившиеся части, остальные просто отсутствуют в ответе.
+# Справочники и карточка пользователя берутся из тех же кэшей, что и отдельные
+# эндпоинты, поэтому их инвалидация действует и здесь.
+
+MY_TASKS_LIMIT = 200
+
+
+def _my_tasks(db: Session, current: UserModel) -> dict:
+    items = project(
+        db.execute(
+            task_list_select()
+            # полусоединение с inbox: задача, где я и автор, и исполнитель, попадает один раз
+            .where(TaskModel.id.in_(select(InboxModel.task_id).where(InboxModel.user_id == current.id)))
+            .order_by(TaskModel.created_at.desc())
+            .limit(MY_TASKS_LIMIT)
+        ),
+        TaskSchema,
+    )
+    return {"items": items}
+
+
+def _fresh(value) -> Entry:
+    body = to_json(value, by_alias=True)
+    return Entry(body=body, etag=make_etag(body), expires_at=0.0)
+
+
+def _parts(db: Session, current: UserModel) -> dict[str, Callable[[], Entry]]:
+    return {
+        "me": lambda: entity_cache.get_or_load(entity_key("user", current.id), lambda: load_user(db, current.id)),
+        "roles": lambda: ref_cache.get_or_load("ref:roles", lambda: load_roles(db)),
+        "statuses": lambda: ref_cache.get_or_load("ref:statuses", lambda: load_statuses(db)),
+        "topics": lambda: ref_cache.get_or_load("ref:topics", lambda: load_topics(db)),
+        "directories": lambda: ref_cache.get_or_load("ref:directories", lambda: load_directories(db)),
+        "users": lambda: ref_cache.get_or_load(USER_DIRECTORY_KEY, lambda: load_user_directory(db)),
+        "tasks": lambda: _fresh(_my_tasks(db, current)),
+    }
+
+
+def _parse_have(raw: Optional[str]) -> dict[str, str]:
+    out = {}
+    for item in (raw or "").split(","):
+        part, sep, version = item.strip().partition(":")
+        if sep and version:
+            out[part] = version.strip('"')
+    return out
+
+
+@router.get("")
+def get_bootstrap(
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    have: Optional[str] = Query(None, description="Известные клиенту версии: me:abc,roles:def,..."),
+):
+    known = _parse_have(have)
+    versions: dict[str, str] = {}
+    chunks: list[bytes] = []
+    for name, load in _parts(db, current).items():
+        entry = load()
+        version = entry.etag.strip('"')
+        versions[name] = version
+        if known.get(name) != version:
+            # тело части уже сериализовано (кэш) — вставляем байты как есть
+            chunks.append(b'"' + name.encode() + b'":' + entry.body)
+    body = b'{"versions":' + to_json(versions) + b"".join(b"," + c for c in chunks) + b"}"
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "private, no-cache"})
@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.orm import Session, Mapped
@@ -12,9 +12,18 @@ from app.models.permission import Permission
 bearer = HTTPBearer(auto_error=True)
 
 def get_current_user(
+    request: Request,
     cred: HTTPAuthorizationCredentials = Depends(bearer),
     db: Session = Depends(get_db),
 ) -> User | None:
+    # подзапрос /batch: токен уже проверен родительским запросом
+    batch_user_id = getattr(request.state, "batch_user_id", None)
+    if batch_user_id is not None:
+        user = db.get(User, batch_user_id)
+        if not user or not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User disabled or not found")
+        return user
+
     token = cred.credentials
     try:
         payload = decode_token(token)
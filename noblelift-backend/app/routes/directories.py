@@ -1,7 +1,9 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.core.cache import ref_cache, cached_response
+from app.core.invalidation import publish
 from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.directory import Directory as DirectoryModel
@@ -15,17 +17,22 @@ def is_super_admin(current: UserModel) -> bool:
     return bool(current.role and current.role.code == "super_admin")
 
 
-@router.get("", response_model=dict)
-def list_directories(db: Session = Depends(get_db), current=Depends(get_current_user)):
+def load_directories(db: Session) -> dict:
     rows = db.execute(select(DirectoryModel).order_by(DirectoryModel.parent_id.nullsfirst(), DirectoryModel.name)).scalars().all()
     return {"items": [DirectorySchema.model_validate(r) for r in rows]}
 
+
+@router.get("", response_model=dict)
+def list_directories(request: Request, db: Session = Depends(get_db), current=Depends(get_current_user)):
+    return cached_response(request, ref_cache, "ref:directories", lambda: load_directories(db))
+
 @router.post("", response_model=DirectorySchema, status_code=201)
 def create_directory(body: DirectoryCreate, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
     if not is_super_admin(current):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     d = DirectoryModel(parent_id=body.parent_id, name=body.name)
     db.add(d); db.commit(); db.refresh(d)
+    publish("ref:directories")
     return DirectorySchema.model_validate(d)
 
 @router.patch("/{id}", response_model=DirectorySchema)
@@ -35,6 +42,7 @@ def update_directory(id: int, body: DirectoryUpdate, db: Session = Depends(get_d
     if body.parent_id is not None: d.parent_id = body.parent_id
     if body.name is not None: d.name = body.name
     db.add(d); db.commit(); db.refresh(d)
+    publish("ref:directories")
     return DirectorySchema.model_validate(d)
 
 @router.delete("/{id}", status_code=204)
@@ -44,4 +52,5 @@ def delete_directory(id: int, db: Session = Depends(get_db), current: UserModel
     d = db.get(DirectoryModel, id)
     if not d: raise HTTPException(status_code=404, detail="Not found")
     db.delete(d); db.commit()
+    publish("ref:directories")
     return
@@ -17,10 +17,13 @@ from app.models.permission import Permission as PermissionModel
 from app.schemas.document import Document as DocumentSchema, DocumentCreate, DocumentUpdate, DocumentVersion as DocVerSchema
 from app.schemas.permission import Permission as PermissionSchema, PermissionCreate
 from app.core.files_docs import save_document_version
+from app.utils.pagination import Page
+from app.utils.projection import columns_for, project
+from app.utils.responses import page_response
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-@router.get("", response_model=dict)
+@router.get("", response_model=Page[DocumentSchema])
 def list_documents(
     db: Session = Depends(get_db),
     current=Depends(get_current_user),
@@ -29,7 +32,7 @@ def list_documents(
     limit: int = Query(20, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
-    stmt = select(DocumentModel)
+    stmt = select(*columns_for(DocumentSchema, DocumentModel))
     filters = []
     if directory_id is not None:
         filters.append(DocumentModel.directory_id == directory_id)
@@ -44,12 +47,11 @@ def list_documents(
         else select(func.count(distinct(DocumentModel.id)))
     ).scalar_one()
 
-    rows = db.execute(
-        stmt.order_by(DocumentModel.updated_at.desc()).limit(limit).offset(offset)
-    ).scalars().all()
-
-    items: List[DocumentSchema] = [DocumentSchema.model_validate(r) for r in rows]
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+    items: List[DocumentSchema] = project(
+        db.execute(stmt.order_by(DocumentModel.updated_at.desc()).limit(limit).offset(offset)),
+        DocumentSchema,
+    )
+    return page_response(DocumentSchema, items, total, limit, offset)
 
 @router.get("/{id}", response_model=DocumentSchema)
 def get_document(id: int, db: Session = Depends(get_db), current=Depends(get_current_user)):
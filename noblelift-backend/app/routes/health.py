@@ -1,6 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 import time
 from app.core.config import settings
+from app.core.cache import cache_stats
+from app.core.invalidation import bus_metrics
+from app.routes.deps import get_current_user
+from app.models.user import User as UserModel
 
 router = APIRouter()
 _start = time.time()
@@ -13,3 +17,10 @@ def health():
 @router.get("/version", tags=["Health"])
 def version():
     return {"app": "noblelift-backend", "version": settings.APP_VERSION, "commit": "dev"}
+
+@router.get("/health/cache", tags=["Health"])
+def cache_health(current: UserModel = Depends(get_current_user)):
+    # метрики раскрывают имя хоста и pid процесса (origin шины) — только для super_admin
+    if not current.role or current.role.code != "super_admin":
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return {"bus": bus_metrics(), "caches": cache_stats()}
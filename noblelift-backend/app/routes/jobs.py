@@ -0,0 +1,57 @@
+from __future__ import annotations
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.routes.deps import get_current_user
+from app.models.job import Job as JobModel
+from app.models.user import User as UserModel
+from app.schemas.job import Job as JobSchema
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Статус фоновых задач. Видит задачу тот, кто её поставил, и super_admin.
+
+
+def _job_out(job: JobModel) -> JobSchema:
+    out = JobSchema.model_validate(job)
+    out.has_artifact = bool(job.artifact_path) and job.status == "done"
+    if job.error:
+        # в БД хранится traceback; клиенту — только последняя строка
+        out.error = job.error.strip().splitlines()[-1]
+    return out
+
+
+def job_accepted(job: JobModel) -> JSONResponse:
+    """Ответ 202 на постановку задачи: тело — статус задачи, Location — где его опрашивать."""
+    return JSONResponse(
+        status_code=202,
+        content=_job_out(job).model_dump(mode="json", by_alias=True),
+        headers={"Location": f"/api/v1/jobs/{job.id}"},
+    )
+
+
+def _get_job(db: Session, id: int, current: UserModel) -> JobModel:
+    job = db.get(JobModel, id)
+    is_admin = bool(current.role and current.role.code == "super_admin")
+    if not job or (job.created_by != current.id and not is_admin):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{id}", response_model=JobSchema)
+def get_job(id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    return _job_out(_get_job(db, id, current))
+
+
+@router.get("/{id}/artifact")
+def download_job_artifact(id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    job = _get_job(db, id, current)
+    if job.status != "done" or not job.artifact_path:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not os.path.isfile(job.artifact_path):
+        raise HTTPException(status_code=404, detail="Artifact missing in storage")
+    return FileResponse(job.artifact_path, media_type=job.artifact_mime or "application/octet-stream",
+                        filename=job.artifact_name)
@@ -1,16 +1,21 @@
 from __future__ import annotations
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, and_, func, distinct, update
+from sqlalchemy import select, and_, func, distinct, update, delete
 from sqlalchemy.orm import Session
 
+from app.core.notifications import adjust_unread, unread_count, create_notification
 from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.notification import Notification as NotificationModel
-from app.schemas.notification import Notification as NotificationSchema
+from app.models.user import User as UserModel
+from app.schemas.notification import Notification as NotificationSchema, NotificationCreate
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+def is_manager(u: UserModel) -> bool:
+    return bool(u.role and u.role.code in ("super_admin", "manager"))
+
 @router.get("", response_model=dict)
 def list_notifications(
     db: Session = Depends(get_db),
@@ -25,7 +30,10 @@ def list_notifications(
     elif unread is False:
         filters.append(NotificationModel.is_read.is_(True))
 
-    total = db.execute(select(func.count(distinct(NotificationModel.id))).where(and_(*filters))).scalar_one()
+    if unread is True:
+        total = unread_count(db, current.id)
+    else:
+        total = db.execute(select(func.count(distinct(NotificationModel.id))).where(and_(*filters))).scalar_one()
     rows = db.execute(
         select(NotificationModel)
         .where(and_(*filters))
@@ -35,6 +43,21 @@ def list_notifications(
     items: List[NotificationSchema] = [NotificationSchema.model_validate(n) for n in rows]
     return {"items": items, "total": total, "limit": limit, "offset": offset}
 
+@router.get("/unread-count", response_model=dict)
+def get_unread_count(db: Session = Depends(get_db), current = Depends(get_current_user)):
+    return {"unread": unread_count(db, current.id)}
+
+@router.post("", response_model=NotificationSchema, status_code=201)
+def send_notification(body: NotificationCreate, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    if not is_manager(current):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if not db.get(UserModel, body.user_id):
+        raise HTTPException(status_code=400, detail="User not found")
+    n = create_notification(db, user_id=body.user_id, type=body.type, title=body.title,
+                            message=body.message, data=body.data)
+    db.commit(); db.refresh(n)
+    return NotificationSchema.model_validate(n)
+
 @router.post("/{id}/read", status_code=204)
 def mark_read(id: int, db: Session = Depends(get_db), current = Depends(get_current_user)):
     n = db.get(NotificationModel, id)
@@ -42,26 +65,41 @@ def mark_read(id: int, db: Session = Depends(get_db), current = Depends(get_curr
         raise HTTPException(status_code=404, detail="Not found")
     if not n.is_read:
         from datetime import datetime, timezone
-        n.is_read = True
-        n.read_at = datetime.now(tz=timezone.utc)
-        db.add(n); db.commit()
+        res = db.execute(
+            update(NotificationModel)
+            .where(NotificationModel.id == id, NotificationModel.is_read.is_(False))
+            .values(is_read=True, read_at=datetime.now(tz=timezone.utc))
+            .returning(NotificationModel.id)
+        ).first()
+        if res:
+            adjust_unread(db, current.id, -1)
+        db.commit()
     return
 
 @router.post("/read-all", status_code=204)
 def mark_all_read(db: Session = Depends(get_db), current = Depends(get_current_user)):
     from datetime import datetime, timezone
-    db.execute(
+    n = db.execute(
         update(NotificationModel)
         .where(NotificationModel.user_id == current.id, NotificationModel.is_read.is_(False))
         .values(is_read=True, read_at=datetime.now(tz=timezone.utc))
-    )
+    ).rowcount
+    # вычитаем ровно прочитанные: уведомление, созданное параллельно, остаётся в счётчике
+    adjust_unread(db, current.id, -n)
     db.commit()
     return
 
 @router.delete("/{id}", status_code=204)
 def delete_notification(id: int, db: Session = Depends(get_db), current = Depends(get_current_user)):
-    n = db.get(NotificationModel, id)
-    if not n or n.user_id != current.id:
+    # is_read берём из самой удалённой строки: параллельный mark_read не даст вычесть дважды
+    was_read = db.execute(
+        delete(NotificationModel)
+        .where(NotificationModel.id == id, NotificationModel.user_id == current.id)
+        .returning(NotificationModel.is_read)
+    ).scalar_one_or_none()
+    if was_read is None:
         raise HTTPException(status_code=404, detail="Not found")
-    db.delete(n); db.commit()
+    if not was_read:
+        adjust_unread(db, current.id, -1)
+    db.commit()
     return
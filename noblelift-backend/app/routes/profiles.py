@@ -8,8 +8,11 @@ from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.cache import entity_key
+from app.core.invalidation import publish
 from app.db.session import get_db
 from app.routes.deps import get_current_user
+from app.routes.users import users_changed
 from app.models.user import User as UserModel
 from app.models.profile import Profile as ProfileModel
 from app.models.status import ProfileStatus as ProfileStatusModel
@@ -86,6 +89,7 @@ def update_my_profile(
 
     db.add(prof)
     db.commit()
+    users_changed(current.id)
 
     prof = db.execute(
         select(ProfileModel).options(joinedload(ProfileModel.status)).where(ProfileModel.user_id == current.id)
@@ -122,6 +126,7 @@ async def upload_my_avatar(
     current.avatar_url = url
     db.add(current)
     db.commit()
+    users_changed(current.id)
     return {"avatarUrl": url}
 
 
@@ -143,6 +148,7 @@ def change_my_status(
     prof.status_payload = body.statusPayload
     db.add(prof)
     db.commit()
+    publish(entity_key("user", current.id))
 
     return {
         "userId": current.id,
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.core.cache import ref_cache, cached_response
 from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.role import Role as RoleModel
@@ -21,11 +22,16 @@ class RoleOut(BaseModel):
         from_attributes = True
 
 
+def load_roles(db: Session) -> dict:
+    rows = db.execute(select(RoleModel).order_by(RoleModel.id)).scalars().all()
+    items: List[RoleOut] = [RoleOut.model_validate(r) for r in rows]
+    return {"items": items}
+
+
 @router.get("", response_model=dict)
 def list_roles(
+    request: Request,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    rows = db.execute(select(RoleModel).order_by(RoleModel.id)).scalars().all()
-    items: List[RoleOut] = [RoleOut.model_validate(r) for r in rows]
-    return {"items": items}
+    return cached_response(request, ref_cache, "ref:roles", lambda: load_roles(db))
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.cache import ref_cache, cached_response
 from app.db.session import get_db
 from app.models.status import ProfileStatus as ProfileStatusModel
 
 router = APIRouter(prefix="/statuses", tags=["Statuses"])
 
-@router.get("")
-def list_statuses(db: Session = Depends(get_db)):
+def load_statuses(db: Session) -> dict:
     rows = db.execute(select(ProfileStatusModel).order_by(ProfileStatusModel.code)).scalars().all()
     return {"items": [{"code": r.code, "label": r.label} for r in rows]}
+
+@router.get("")
+def list_statuses(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, ref_cache, "ref:statuses", lambda: load_statuses(db))
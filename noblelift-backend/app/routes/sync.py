@@ -0,0 +1,294 @@
+from __future__ import annotations
+import logging
+import mimetypes
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.audit import write_audit
+from app.core.cache import entity_key, DASHBOARD_PREFIX
+from app.core.files import find_staged_upload, save_staged_upload
+from app.core.invalidation import publish
+from app.core.task_inbox import sync_task_inbox
+from app.db.session import get_db
+from app.routes.deps import get_current_user
+from app.routes.tasks import TASK_STATUS_CODES, _task_update, _raise_update_failed, ensure_task_visible, insert_task
+from app.routes.vehicles import _reserved_by_other
+from app.models.sync_op import SyncOp as SyncOpModel
+from app.models.task import Task as TaskModel
+from app.models.task_event import TaskEvent as TaskEventModel
+from app.models.task_file import TaskFile as TaskFileModel
+from app.models.user import User as UserModel
+from app.models.vehicle import Vehicle as VehicleModel
+from app.models.vehicle_log import VehicleLog as VehicleLogModel
+from app.schemas.sync import SyncBatch, SyncOperation, SyncOpResult
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+log = logging.getLogger("app.sync")
+
+# Пакетное применение операций, накопленных офлайн-клиентом.
+# Весь пакет — одна транзакция; каждая операция — в своём SAVEPOINT, поэтому
+# отказ одной не откатывает остальные. Результат каждой операции пишется в
+# sync_ops, и повтор того же opId возвращает сохранённый результат.
+
+
+class _Ctx:
+    def __init__(self, db: Session, current: UserModel, request: Request):
+        self.db = db
+        self.current = current
+        self.request = request
+        self.created: dict[str, int] = {}   # opId create_task -> id задачи в этом пакете
+        self.changed: set[str] = set()      # ключи кэша для publish после commit
+
+    def task_id(self, op: SyncOperation) -> int:
+        if op.task_id is not None:
+            return op.task_id
+        if not op.task_ref:
+            raise HTTPException(status_code=400, detail="taskId or taskRef is required")
+        if op.task_ref in self.created:
+            return self.created[op.task_ref]
+        # ссылка на create_task из прошлого пакета
+        row = self.db.execute(
+            select(SyncOpModel.result).where(
+                SyncOpModel.user_id == self.current.id,
+                SyncOpModel.client_op_id == op.task_ref,
+                SyncOpModel.type == "create_task",
+                SyncOpModel.status == "applied",
+            )
+        ).scalar_one_or_none()
+        if not row or "id" not in row:
+            raise HTTPException(status_code=409, detail="Referenced task operation is not applied")
+        return int(row["id"])
+
+    def audit(self, action: str, entity: str, entity_id: int, payload: dict | None = None) -> None:
+        write_audit(self.db, actor_id=self.current.id, action=action, entity=entity, entity_id=entity_id,
+                    payload=payload, request=self.request, commit=False)
+
+
+def _create_task(ctx: _Ctx, op: SyncOperation) -> dict:
+    body = op.task
+    if body is None:
+        raise HTTPException(status_code=400, detail="task is required")
+    t = insert_task(ctx.db, ctx.current, body)
+    ctx.audit("create", "task", t.id, {"title": t.title})
+    ctx.created[op.op_id] = t.id
+    ctx.changed.add(DASHBOARD_PREFIX)
+    return {"id": t.id, "version": 1}
+
+
+def _set_task_status(ctx: _Ctx, op: SyncOperation) -> dict:
+    id = ctx.task_id(op)
+    ensure_task_visible(ctx.db, ctx.current, id)
+    code = (op.status_code or "").strip().lower()
+    if code not in TASK_STATUS_CODES:
+        raise HTTPException(status_code=400, detail=f"Invalid status_code. Allowed: {sorted(TASK_STATUS_CODES)}")
+    version = ctx.db.execute(_task_update(id, op.version).values(status_code=code)).scalar_one_or_none()
+    if version is None:
+        _raise_update_failed(ctx.db, id, op.version)
+    ctx.db.add(TaskEventModel(task_id=id, actor_id=ctx.current.id, type="updated", payload={"statusCode": code}))
+    ctx.audit("update", "task", id, {"statusCode": code})
+    ctx.changed.update((entity_key("task", id), DASHBOARD_PREFIX))
+    return {"id": id, "version": version}
+
+
+def _take_task(ctx: _Ctx, op: SyncOperation) -> dict:
+    id = ctx.task_id(op)
+    version = ctx.db.execute(
+        _task_update(id).where(
+            TaskModel.assignee_id.is_(None),
+            TaskModel.type == "common",
+            TaskModel.is_private.is_(False),
+            TaskModel.archived_at.is_(None),
+        ).values(assignee_id=ctx.current.id, status_code="in_progress")
+    ).scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=409, detail="Task is not available to take")
+    sync_task_inbox(ctx.db, [id])
+    ctx.db.add(TaskEventModel(task_id=id, actor_id=ctx.current.id, type="taken"))
+    ctx.audit("take", "task", id)
+    ctx.changed.update((entity_key("task", id), DASHBOARD_PREFIX))
+    return {"id": id, "version": version}
+
+
+def _release_task(ctx: _Ctx, op: SyncOperation) -> dict:
+    id = ctx.task_id(op)
+    version = ctx.db.execute(
+        _task_update(id).where(TaskModel.assignee_id == ctx.current.id, TaskModel.archived_at.is_(None))
+        .values(assignee_id=None, status_code="new")
+    ).scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=409, detail="Task is not assigned to you or archived")
+    sync_task_inbox(ctx.db, [id])
+    ctx.db.add(TaskEventModel(task_id=id, actor_id=ctx.current.id, type="released"))
+    ctx.audit("release", "task", id)
+    ctx.changed.update((entity_key("task", id), DASHBOARD_PREFIX))
+    return {"id": id, "version": version}
+
+
+def _take_vehicle(ctx: _Ctx, op: SyncOperation) -> dict:
+    id = op.vehicle_id
+    if id is None:
+        raise HTTPException(status_code=400, detail="vehicleId is required")
+    res = ctx.db.execute(
+        update(VehicleModel)
+        .where(
+            VehicleModel.id == id,
+            VehicleModel.holder_id.is_(None),
+            VehicleModel.status == "available",
+            ~_reserved_by_other(ctx.current.id),
+        )
+        .values(holder_id=ctx.current.id, status="in_use", updated_at=datetime.now(tz=timezone.utc))
+        .returning(VehicleModel.id)
+    ).first()
+    if not res:
+        raise HTTPException(status_code=409, detail="Vehicle is not available")
+    ctx.db.add(VehicleLogModel(vehicle_id=id, user_id=ctx.current.id, action="take"))
+    ctx.audit("take", "vehicle", id)
+    ctx.changed.add(entity_key("vehicle", id))
+    return {"id": id}
+
+
+def _release_vehicle(ctx: _Ctx, op: SyncOperation) -> dict:
+    id = op.vehicle_id
+    if id is None:
+        raise HTTPException(status_code=400, detail="vehicleId is required")
+    res = ctx.db.execute(
+        update(VehicleModel)
+        .where(VehicleModel.id == id, VehicleModel.holder_id == ctx.current.id)
+        .values(holder_id=None, status="available", updated_at=datetime.now(tz=timezone.utc))
+        .returning(VehicleModel.id)
+    ).first()
+    if not res:
+        raise HTTPException(status_code=409, detail="Vehicle is not held by you")
+    ctx.db.add(VehicleLogModel(vehicle_id=id, user_id=ctx.current.id, action="release"))
+    ctx.audit("release", "vehicle", id)
+    ctx.changed.add(entity_key("vehicle", id))
+    return {"id": id}
+
+
+def _upload_ref(ctx: _Ctx, op: SyncOperation) -> dict:
+    task_id = ctx.task_id(op)
+    ensure_task_visible(ctx.db, ctx.current, task_id)
+    path = find_staged_upload(ctx.current.id, op.upload_id or "")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    # файл остаётся на месте: запись просто ссылается на него, откатывать на диске нечего
+    tf = TaskFileModel(
+        task_id=task_id,
+        uploader_id=ctx.current.id,
+        original_name=path.name,
+        mime=mimetypes.guess_type(path.name)[0],
+        size=path.stat().st_size,
+        storage_path=str(path),
+    )
+    ctx.db.add(tf)
+    ctx.db.flush()
+    ctx.db.add(TaskEventModel(task_id=task_id, actor_id=ctx.current.id, type="file_added",
+                              payload={"name": tf.original_name, "size": tf.size}))
+    ctx.audit("file_add", "task", task_id, {"name": tf.original_name, "size": tf.size})
+    return {"id": tf.id, "taskId": task_id}
+
+
+_HANDLERS: dict[str, Callable[[_Ctx, SyncOperation], dict]] = {
+    "create_task": _create_task,
+    "set_task_status": _set_task_status,
+    "take_task": _take_task,
+    "release_task": _release_task,
+    "take_vehicle": _take_vehicle,
+    "release_vehicle": _release_vehicle,
+    "upload_ref": _upload_ref,
+}
+
+
+def _stored(row: Any, op_id: str) -> SyncOpResult:
+    result = row.result or {}
+    return SyncOpResult(op_id=op_id, status="replayed", code=row.code or 200,
+                        detail=result.get("detail"), data=result.get("data"))
+
+
+def _apply(ctx: _Ctx, op: SyncOperation) -> SyncOpResult:
+    db = ctx.db
+    # заявка на opId: параллельный повтор того же пакета ждёт здесь на уникальном ключе
+    claim_id = db.execute(
+        pg_insert(SyncOpModel)
+        .values(user_id=ctx.current.id, client_op_id=op.op_id, type=op.type)
+        .on_conflict_do_nothing(constraint="uq_sync_ops_user_op")
+        .returning(SyncOpModel.id)
+    ).scalar_one_or_none()
+    if claim_id is None:
+        row = db.execute(
+            select(SyncOpModel.code, SyncOpModel.result)
+            .where(SyncOpModel.user_id == ctx.current.id, SyncOpModel.client_op_id == op.op_id)
+        ).one()
+        return _stored(row, op.op_id)
+
+    savepoint = db.begin_nested()
+    try:
+        data = _HANDLERS[op.type](ctx, op)
+        savepoint.commit()
+        result = SyncOpResult(op_id=op.op_id, status="applied", code=200, data=data)
+    except HTTPException as e:
+        savepoint.rollback()
+        result = SyncOpResult(op_id=op.op_id, status="failed", code=e.status_code, detail=str(e.detail))
+    except Exception as e:
+        # ошибка БД или баг обработчика не должны откатывать весь пакет: иначе клиент
+        # повторяет ту же очередь и навсегда упирается в одну плохую операцию
+        savepoint.rollback()
+        if isinstance(e, DataError):
+            code, detail = 400, "Invalid data"
+        elif isinstance(e, IntegrityError):
+            code, detail = 409, "Integrity error"
+        else:
+            code, detail = 500, "Internal server error"
+        log.exception("sync op %s (%s) failed", op.op_id, op.type)
+        result = SyncOpResult(op_id=op.op_id, status="failed", code=code, detail=detail)
+
+    db.execute(
+        update(SyncOpModel)
+        .where(SyncOpModel.id == claim_id)
+        .values(status=result.status, code=result.code,
+                result={"detail": result.detail, "data": result.data})
+    )
+    return result
+
+
+@router.post("/mutations", response_model=dict)
+def apply_mutations(
+    body: SyncBatch,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    seen: set[str] = set()
+    for op in body.ops:
+        if op.op_id in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate opId in batch: {op.op_id}")
+        seen.add(op.op_id)
+
+    ctx = _Ctx(db, current, request)
+    items = [_apply(ctx, op) for op in body.ops]
+    db.commit()
+
+    for key in ctx.changed:
+        publish(key)
+    return {"items": items}
+
+
+@router.post("/uploads", status_code=201)
+async def upload_staged(
+    f: UploadFile = File(...),
+    current: UserModel = Depends(get_current_user),
+):
+    """Загрузить файл до появления задачи; uploadId затем передаётся в операции upload_ref."""
+    data = await f.read()
+    try:
+        token, size = save_staged_upload(current.id, f.filename or "file", data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"uploadId": token, "size": size}
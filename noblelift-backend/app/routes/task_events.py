@@ -7,6 +7,7 @@ from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.task import Task as TaskModel
 from app.models.task_event import TaskEvent as TaskEventModel
+from app.routes.tasks import ensure_task_visible
 from app.schemas.task_event import TaskEvent as TaskEventSchema
 
 router = APIRouter(prefix="/tasks", tags=["Task Events"])
@@ -19,8 +20,7 @@ def list_task_events(
     db: Session = Depends(get_db),
     current = Depends(get_current_user),
 ):
-    if not db.get(TaskModel, task_id):
-        raise HTTPException(status_code=404, detail="Task not found")
+    ensure_task_visible(db, current, task_id)
 
     total = db.execute(
         select(TaskEventModel).where(TaskEventModel.task_id == task_id)
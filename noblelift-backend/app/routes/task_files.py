@@ -9,6 +9,7 @@ from app.models.task import Task as TaskModel
 from app.models.task_file import TaskFile as TaskFileModel
 from app.models.task_event import TaskEvent as TaskEventModel
 from app.models.user import User as UserModel
+from app.routes.tasks import ensure_task_visible
 from app.core.files import save_task_file
 from app.schemas.task_file import TaskFile as TaskFileSchema
 from typing import List
@@ -23,11 +24,12 @@ async def upload_task_file(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    t = db.get(TaskModel, task_id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Task not found")
+    ensure_task_visible(db, current, task_id)
     data = await f.read()
-    storage_path, size = save_task_file(task_id, f.filename, data)
+    try:
+        storage_path, size = save_task_file(task_id, f.filename, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     tf = TaskFileModel(
         task_id=task_id,
@@ -55,8 +57,7 @@ def list_task_files(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    if not db.get(TaskModel, task_id):
-        raise HTTPException(status_code=404, detail="Task not found")
+    ensure_task_visible(db, current, task_id)
     rows = db.execute(
         select(TaskFileModel).where(TaskFileModel.task_id == task_id).order_by(TaskFileModel.created_at.desc())
     ).scalars().all()
@@ -70,6 +71,7 @@ def download_task_file(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
+    ensure_task_visible(db, current, task_id)
     tf = db.get(TaskFileModel, file_id)
     if not tf or tf.task_id != task_id:
         raise HTTPException(status_code=404, detail="File not found")
@@ -88,6 +90,7 @@ def delete_task_file(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
+    ensure_task_visible(db, current, task_id)
     tf = db.get(TaskFileModel, file_id)
     if not tf or tf.task_id != task_id:
         raise HTTPException(status_code=404, detail="File not found")
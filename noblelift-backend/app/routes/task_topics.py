@@ -1,25 +1,36 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from app.core.cache import ref_cache, cached_response, DASHBOARD_PREFIX
+from app.core.invalidation import publish
 from app.db.session import get_db
 from app.routes.deps import get_current_user
+from app.models.task import Task as TaskModel
 from app.models.task_topic import TaskTopic as TaskTopicModel
 from app.schemas.task import TaskTopic as TaskTopicSchema, TaskTopicCreate, TaskTopicUpdate
 
 router = APIRouter(prefix="/task-topics", tags=["Tasks"])
 
-@router.get("")
-def list_topics(db: Session = Depends(get_db), current=Depends(get_current_user)):
+def _bump_task_versions(db: Session, topic_id: int, **values) -> None:
+    # тема вложена в карточку задачи: её ETag (версия) должен смениться вместе с темой
+    db.execute(update(TaskModel).where(TaskModel.topic_id == topic_id).values(version=TaskModel.version + 1, **values))
+
+def load_topics(db: Session) -> dict:
     rows = db.execute(select(TaskTopicModel).order_by(TaskTopicModel.name)).scalars().all()
     return {"items": [TaskTopicSchema.model_validate(r) for r in rows]}
 
+@router.get("")
+def list_topics(request: Request, db: Session = Depends(get_db), current=Depends(get_current_user)):
+    return cached_response(request, ref_cache, "ref:topics", lambda: load_topics(db))
+
 @router.post("", response_model=TaskTopicSchema, status_code=201)
 def create_topic(body: TaskTopicCreate, db: Session = Depends(get_db), current=Depends(get_current_user)):
     if db.execute(select(TaskTopicModel.id).where(TaskTopicModel.name == body.name)).first():
         raise HTTPException(status_code=400, detail="Topic already exists")
     r = TaskTopicModel(name=body.name)
     db.add(r); db.commit(); db.refresh(r)
+    publish("ref:topics")
     return TaskTopicSchema.model_validate(r)
 
 @router.patch("/{id}", response_model=TaskTopicSchema)
@@ -29,7 +40,11 @@ def update_topic(id: int, body: TaskTopicUpdate, db: Session = Depends(get_db),
         raise HTTPException(status_code=404, detail="Not found")
     if body.name is not None:
         r.name = body.name
+        _bump_task_versions(db, id, topic_name=body.name)
     db.add(r); db.commit(); db.refresh(r)
+    publish("ref:topics")
+    publish("task:")  # тема вложена в карточку задачи
+    publish(DASHBOARD_PREFIX)
     return TaskTopicSchema.model_validate(r)
 
 @router.delete("/{id}", status_code=204)
@@ -37,5 +52,9 @@ def delete_topic(id: int, db: Session = Depends(get_db), current=Depends(get_cur
     r = db.get(TaskTopicModel, id)
     if not r:
         raise HTTPException(status_code=404, detail="Not found")
+    _bump_task_versions(db, id)
     db.delete(r); db.commit()
+    publish("ref:topics")
+    publish("task:")  # тема вложена в карточку задачи
+    publish(DASHBOARD_PREFIX)
     return
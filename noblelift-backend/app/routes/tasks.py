@@ -1,24 +1,36 @@
 from __future__ import annotations
-from typing import Optional, List
-import io
+from typing import Optional, List, Union
 import csv
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from datetime import datetime, timezone
-from sqlalchemy import select, and_, func, distinct, update, delete
+from sqlalchemy import select, and_, or_, func, distinct, update, delete, insert, any_, bindparam, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session, joinedload
-from app.core.audit import write_audit
+from app.core.audit import write_audit, write_audit_many
+from app.core.cache import entity_cache, dashboard_cache, entity_key, cached_response, DASHBOARD_PREFIX
+from app.core.invalidation import publish
+from app.core.jobs import JobContext, enqueue, job_handler
+from app.core.task_inbox import sync_task_inbox
 from app.db.session import get_db
 from app.routes.deps import get_current_user
+from app.routes.jobs import job_accepted
 from app.models.task import Task as TaskModel
 from app.models.task_topic import TaskTopic as TaskTopicModel
 from app.models.task_event import TaskEvent as TaskEventModel
 from app.models.user import User as UserModel
 from app.models.role import Role as RoleModel
-from app.schemas.task import Task as TaskSchema, TaskCreate, TaskUpdate
+from app.models.team import Team as TeamModel
+from app.models.team_member import TeamMember as TeamMemberModel
+from app.models.user_task_inbox import UserTaskInbox as InboxModel
+from app.schemas.task import Task as TaskSchema, TaskCreate, TaskUpdate, TaskTopic as TaskTopicSchema, TaskBulk, TaskBulkResult
+from app.utils.pagination import Page
+from app.utils.projection import columns_for, project, project_one, parse_fieldset, sparse_schema, fieldset_key
+from app.utils.responses import page_response
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+TASK_STATUS_CODES = {"new", "in_progress", "pause", "done"}
+
 
 def is_super_admin_or_manager(u: UserModel) -> bool:
     return bool(u.role and u.role.code in ("super_admin", "manager"))
@@ -28,7 +40,131 @@ def is_super_admin(u: UserModel) -> bool:
     return bool(u.role and u.role.code == "super_admin")
 
 
-@router.get("", response_model=dict)
+def my_team_ids(u: UserModel):
+    return select(TeamMemberModel.team_id).where(TeamMemberModel.user_id == u.id)
+
+
+def task_visible_to(u: UserModel):
+    """SQL-условие видимости задачи; None — ограничений нет (super_admin, manager).
+    Личную задачу видят автор, исполнитель и участники команды задачи."""
+    if is_super_admin_or_manager(u):
+        return None
+    return or_(
+        TaskModel.is_private.is_(False),
+        TaskModel.creator_id == u.id,
+        TaskModel.assignee_id == u.id,
+        # некоррелированный подзапрос: Postgres считает его один раз (hashed SubPlan), а не на каждую строку
+        TaskModel.team_id.in_(my_team_ids(u)),
+    )
+
+
+def _check_team(db: Session, u: UserModel, team_id: int) -> None:
+    if not db.get(TeamModel, team_id):
+        raise HTTPException(status_code=400, detail="Team not found")
+    if not is_super_admin_or_manager(u) and not db.execute(
+        select(TeamMemberModel.id).where(TeamMemberModel.team_id == team_id, TeamMemberModel.user_id == u.id)
+    ).first():
+        raise HTTPException(status_code=403, detail="Not a member of the team")
+
+
+def ensure_task_visible(db: Session, u: UserModel, id: int) -> None:
+    """404, если задачи нет или она не видна пользователю (существование не раскрываем)."""
+    stmt = select(TaskModel.id).where(TaskModel.id == id)
+    visible = task_visible_to(u)
+    if visible is not None:
+        stmt = stmt.where(visible)
+    if db.execute(stmt).first() is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+
+def _task_changed(id: int) -> None:
+    """Сбросить закэшированную карточку задачи и сводки во всех воркерах (после commit)."""
+    publish(entity_key("task", id))
+    publish(DASHBOARD_PREFIX)
+
+
+def task_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+# ожидаемая версия: одна (операция /sync) или список тегов из If-Match, подходит любая
+ExpectedVersion = Union[int, tuple[int, ...], None]
+
+
+def _if_match_version(request: Request) -> Optional[tuple[int, ...]]:
+    """Версии из If-Match ("3", W/"3" или список "3", "4"); None — заголовка нет или "*"."""
+    raw = request.headers.get("if-match")
+    if raw is None:
+        return None
+    tags = [tag.strip() for tag in raw.split(",") if tag.strip()]
+    if not tags or "*" in tags:
+        return None
+    try:
+        return tuple(int(tag.removeprefix("W/").strip('"')) for tag in tags)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+
+
+def _versions(expected_version: ExpectedVersion) -> tuple[int, ...]:
+    return (expected_version,) if isinstance(expected_version, int) else expected_version
+
+
+def _task_update(id: int, expected_version: ExpectedVersion = None):
+    """UPDATE задачи с увеличением версии; при expected_version — только если версия совпала."""
+    stmt = update(TaskModel).where(TaskModel.id == id)
+    if expected_version is not None:
+        stmt = stmt.where(TaskModel.version.in_(_versions(expected_version)))
+    return stmt.values(version=TaskModel.version + 1).returning(TaskModel.version)
+
+
+def _raise_update_failed(db: Session, id: int, expected_version: ExpectedVersion,
+                         archived_detail: str = "Task not found") -> None:
+    current_version = db.execute(select(TaskModel.version).where(TaskModel.id == id)).scalar_one_or_none()
+    if current_version is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if expected_version is not None and current_version not in _versions(expected_version):
+        raise HTTPException(status_code=412, detail="Task has been modified", headers={"ETag": task_etag(current_version)})
+    raise HTTPException(status_code=404, detail=archived_detail)
+
+
+def _task_out(db: Session, id: int, response: Response) -> TaskSchema:
+    t = db.execute(
+        select(TaskModel)
+        .options(joinedload(TaskModel.topic))
+        .where(TaskModel.id == id)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+    response.headers["ETag"] = task_etag(t.version)
+    return TaskSchema.model_validate(t)
+
+
+TASK_RELATIONS = ("topic",)
+
+
+def task_list_select(schema=TaskSchema, expand=TASK_RELATIONS):
+    """Колонки схемы + тема, если раскрыта; без ORM-объектов и join-ов на пользователей."""
+    stmt = select(*columns_for(schema, TaskModel))
+    if "topic" in expand:
+        stmt = (
+            stmt.add_columns(*columns_for(TaskTopicSchema, TaskTopicModel, prefix="topic"))
+            .outerjoin(TaskTopicModel, TaskTopicModel.id == TaskModel.topic_id)
+        )
+    return stmt
+
+
+def _task_fieldset(fields: Optional[str], expand: Optional[str]):
+    """Схема ответа и раскрытые связи для ?fields=&expand=; без параметров — полная TaskSchema."""
+    fs = parse_fieldset(TaskSchema, TASK_RELATIONS, fields, expand)
+    if fs is None:
+        return TaskSchema, TASK_RELATIONS, None
+    return sparse_schema(TaskSchema, fs[0] | fs[1]), fs[1], fs
+
+
+_FIELDS_QUERY = Query(None, description="Поля через запятую, например id,title,statusCode")
+_EXPAND_QUERY = Query(None, description="Связи через запятую: topic")
+
+
+@router.get("", response_model=Page[TaskSchema])
 def list_tasks(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
@@ -38,10 +174,13 @@ def list_tasks(
     status_code: Optional[str] = Query(None, alias="status"),
     assignee_id: Optional[int] = Query(None),
     topic_id: Optional[int] = Query(None),
+    team_id: Optional[int] = Query(None),
     is_private: Optional[bool] = Query(None),
     archived: Optional[bool] = Query(None),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
 ):
-    stmt = select(TaskModel)
+    schema, relations, _ = _task_fieldset(fields, expand)
     filters = []
 
     if q:
@@ -53,6 +192,8 @@ def list_tasks(
         filters.append(TaskModel.assignee_id == assignee_id)
     if topic_id is not None:
         filters.append(TaskModel.topic_id == topic_id)
+    if team_id is not None:
+        filters.append(TaskModel.team_id == team_id)
     if is_private is not None:
         filters.append(TaskModel.is_private == is_private)
     if archived is not None:
@@ -60,54 +201,189 @@ def list_tasks(
             filters.append(TaskModel.archived_at.is_not(None))
         else:
             filters.append(TaskModel.archived_at.is_(None))
-
-    if filters:
-        stmt = stmt.where(and_(*filters))
+    # видимость — в SQL, чтобы total и страницы считались только по доступным задачам
+    visible = task_visible_to(current)
+    if visible is not None:
+        filters.append(visible)
 
     total = db.execute(
         select(func.count(distinct(TaskModel.id))).select_from(TaskModel).where(and_(*filters)) if filters
         else select(func.count(distinct(TaskModel.id)))
     ).scalar_one()
 
-    data_stmt = (
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-    )
+    data_stmt = task_list_select(schema, relations)
     if filters:
         data_stmt = data_stmt.where(and_(*filters))
 
-    rows = db.execute(
-        data_stmt.order_by(TaskModel.created_at.desc()).limit(limit).offset(offset)
-    ).scalars().all()
+    items: List[TaskSchema] = project(
+        db.execute(data_stmt.order_by(TaskModel.created_at.desc()).limit(limit).offset(offset)),
+        schema,
+    )
+    return page_response(schema, items, total, limit, offset)
 
-    items: List[TaskSchema] = [TaskSchema.model_validate(t) for t in rows]
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+@router.get("/available", response_model=Page[TaskSchema])
+def list_available_tasks(
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
+):
+    schema, relations, _ = _task_fieldset(fields, expand)
+    filters = [
+        TaskModel.type == "common",
+        TaskModel.is_private.is_(False),
+        TaskModel.archived_at.is_(None),
+        TaskModel.assignee_id.is_(None),
+    ]
 
-@router.get("/{id}", response_model=TaskSchema)
-def get_task(id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
+    total = db.execute(
+        select(func.count(distinct(TaskModel.id))).where(and_(*filters))
+    ).scalar_one()
+
+    items = project(
+        db.execute(
+            task_list_select(schema, relations)
+            .where(and_(*filters))
+            .order_by(TaskModel.created_at.desc())
+            .limit(limit).offset(offset)
+        ),
+        schema,
+    )
+    return page_response(schema, items, total, limit, offset)
+
+DASHBOARD_PAGE_SIZE = 20
+
+
+def inbox_select(user_id: int, role: str, schema=TaskSchema, expand=TASK_RELATIONS):
+    """Неархивные задачи пользователя в роли creator|assignee, новые первыми — диапазон по user_task_inbox."""
+    return (
+        task_list_select(schema, expand)
+        .join(InboxModel, InboxModel.task_id == TaskModel.id)
+        .where(InboxModel.user_id == user_id, InboxModel.role == role)
+        .order_by(InboxModel.sort_key.desc(), InboxModel.task_id.desc())
+    )
+
+
+@router.get("/mine", response_model=Page[TaskSchema])
+def list_my_tasks(
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
+):
+    """Неархивные задачи, назначенные мне, — через user_task_inbox, а не фильтром по tasks."""
+    schema, relations, _ = _task_fieldset(fields, expand)
+    total = db.execute(
+        select(func.count()).select_from(InboxModel)
+        .where(InboxModel.user_id == current.id, InboxModel.role == "assignee")
+    ).scalar_one()
+    items = project(
+        db.execute(inbox_select(current.id, "assignee", schema, relations).limit(limit).offset(offset)),
+        schema,
+    )
+    return page_response(schema, items, total, limit, offset)
+
+
+def _available_filter():
+    return and_(
+        TaskModel.type == "common",
+        TaskModel.is_private.is_(False),
+        TaskModel.assignee_id.is_(None),
+    )
+
+
+def _load_dashboard(db: Session, user_id: int) -> dict:
+    mine = TaskModel.assignee_id == user_id
+    created = TaskModel.creator_id == user_id
+    available = _available_filter()
+    overdue = and_(mine, TaskModel.due_date < func.now(), TaskModel.status_code != "done")
+    # все счётчики одним проходом: по строке на статус, FILTER на каждый срез
+    rows = db.execute(
+        select(
+            TaskModel.status_code,
+            func.count().filter(mine).label("mine"),
+            func.count().filter(created).label("created"),
+            func.count().filter(available).label("available"),
+            func.count().filter(overdue).label("overdue"),
         )
-        .where(TaskModel.id == id)
-    ).scalar_one_or_none()
-    if not t:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return TaskSchema.model_validate(t)
+        .where(TaskModel.archived_at.is_(None), or_(mine, created, available))
+        .group_by(TaskModel.status_code)
+    ).all()
+    counts: dict[str, dict[str, int]] = {k: {"total": 0} for k in ("mine", "created", "available", "overdue")}
+    for row in rows:
+        for k, c in counts.items():
+            n = getattr(row, k)
+            if n:
+                c[row.status_code] = n
+                c["total"] += n
+
+    def first_page(stmt, name: str):
+        items = project(db.execute(stmt.limit(DASHBOARD_PAGE_SIZE)), TaskSchema)
+        # total берётся из счётчиков — отдельный COUNT не нужен
+        return Page[TaskSchema].model_construct(items=items, total=counts[name]["total"], limit=DASHBOARD_PAGE_SIZE, offset=0)
+
+    return {
+        "counts": counts,
+        "mine": first_page(inbox_select(user_id, "assignee"), "mine"),
+        "created": first_page(inbox_select(user_id, "creator"), "created"),
+        "available": first_page(
+            task_list_select().where(TaskModel.archived_at.is_(None), available).order_by(TaskModel.created_at.desc()),
+            "available",
+        ),
+    }
+
+
+@router.get("/dashboard")
+def get_dashboard(request: Request, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    """Счётчики по статусам (мои / созданные мной / доступные / просроченные) и первые страницы списков."""
+    return cached_response(request, dashboard_cache, f"{DASHBOARD_PREFIX}{current.id}:", lambda: _load_dashboard(db, current.id))
 
-@router.post("", response_model=TaskSchema, status_code=201)
-def create_task(body: TaskCreate, request: Request, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+@router.get("/{id}", response_model=TaskSchema)
+def get_task(
+    id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
+):
+    schema, relations, fs = _task_fieldset(fields, expand)
+    # кэш общий для всех пользователей, поэтому доступ проверяется до него
+    ensure_task_visible(db, current, id)
+    if fs is not None:
+        def load_sparse():
+            t = project_one(db.execute(task_list_select(schema, relations).where(TaskModel.id == id)), schema)
+            if not t:
+                raise HTTPException(status_code=404, detail="Task not found")
+            return t
+        # ETag по версии только если она есть в ответе, иначе — хэш тела
+        etag = (lambda t: task_etag(t.version)) if "version" in fs[0] else None
+        return cached_response(request, entity_cache, entity_key("task", id) + fieldset_key(fs), load_sparse, etag=etag)
+
+    def load():
+        t = db.execute(
+            select(TaskModel)
+            .options(joinedload(TaskModel.topic))
+            .where(TaskModel.id == id)
+        ).scalar_one_or_none()
+        if not t:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return TaskSchema.model_validate(t)
+    return cached_response(request, entity_cache, entity_key("task", id), load, etag=lambda t: task_etag(t.version))
+
+def insert_task(db: Session, current: UserModel, body: TaskCreate) -> TaskModel:
+    """Проверить ссылки и вставить задачу с событием created, без commit
+    (общая часть POST /tasks и операции create_task в /sync)."""
     if body.topic_id is not None and not db.get(TaskTopicModel, body.topic_id):
         raise HTTPException(status_code=400, detail="Topic not found")
     if body.assignee_id is not None and not db.get(UserModel, body.assignee_id):
         raise HTTPException(status_code=400, detail="Assignee not found")
+    if body.team_id is not None:
+        _check_team(db, current, body.team_id)
 
     t = TaskModel(
         title=body.title,
@@ -119,321 +395,242 @@ def create_task(body: TaskCreate, request: Request, db: Session = Depends(get_db
         type=body.type or "regular",
         topic_id=body.topic_id,
         assignee_id=body.assignee_id,
+        team_id=body.team_id,
         creator_id=current.id,
     )
-    db.add(t); db.commit(); db.refresh(t)
+    db.add(t); db.flush()
+    sync_task_inbox(db, [t.id])
     db.add(TaskEventModel(task_id=t.id, actor_id=current.id, type="created", payload={"title": t.title}))
+    return t
+
+@router.post("", response_model=TaskSchema, status_code=201)
+def create_task(body: TaskCreate, request: Request, response: Response, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    t = insert_task(db, current, body)
     db.commit()
 
     write_audit(db, actor_id=current.id, action="create",
                 entity="task", entity_id=t.id, payload={"title": t.title},
                 request=request)
+    publish(DASHBOARD_PREFIX)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == t.id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, t.id, response)
 
 @router.patch("/{id}", response_model=TaskSchema)
-def update_task(id: int, body: TaskUpdate, request: Request, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
-    t = db.get(TaskModel, id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Task not found")
+def update_task(id: int, body: TaskUpdate, request: Request, response: Response, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    ensure_task_visible(db, current, id)
+    expected = _if_match_version(request)
 
-    ALLOWED_STATUS_CODES = {"new", "in_progress", "pause", "done"}
+    values: dict = {}
     if body.status_code is not None:
         code = str(body.status_code).strip().lower()
-        if code not in ALLOWED_STATUS_CODES:
-            raise HTTPException(status_code=400, detail=f"Invalid status_code. Allowed: {sorted(ALLOWED_STATUS_CODES)}")
-        t.status_code = code
-    if body.title is not None: t.title = body.title
-    if body.content is not None: t.content = body.content
-    if body.due_date is not None: t.due_date = body.due_date
-    if body.priority_code is not None: t.priority_code = body.priority_code
-    if body.is_private is not None: t.is_private = body.is_private
-    if body.type is not None: t.type = body.type
+        if code not in TASK_STATUS_CODES:
+            raise HTTPException(status_code=400, detail=f"Invalid status_code. Allowed: {sorted(TASK_STATUS_CODES)}")
+        values["status_code"] = code
+    if body.title is not None: values["title"] = body.title
+    if body.content is not None: values["content"] = body.content
+    if body.due_date is not None: values["due_date"] = body.due_date
+    if body.priority_code is not None: values["priority_code"] = body.priority_code
+    if body.is_private is not None: values["is_private"] = body.is_private
+    if body.type is not None: values["type"] = body.type
     if body.topic_id is not None:
         if body.topic_id and not db.get(TaskTopicModel, body.topic_id):
             raise HTTPException(status_code=400, detail="Topic not found")
-        t.topic_id = body.topic_id
+        values["topic_id"] = body.topic_id
     if body.assignee_id is not None:
         if body.assignee_id and not db.get(UserModel, body.assignee_id):
             raise HTTPException(status_code=400, detail="Assignee not found")
-        t.assignee_id = body.assignee_id
-
-    db.add(t); db.commit(); db.refresh(t)
+        values["assignee_id"] = body.assignee_id
+    if body.team_id is not None:
+        if body.team_id:
+            _check_team(db, current, body.team_id)
+        values["team_id"] = body.team_id or None
+
+    if not values:
+        # пустой PATCH ничего не меняет: без записи, новой версии, события и публикации
+        version = db.execute(select(TaskModel.version).where(TaskModel.id == id)).scalar_one_or_none()
+        if version is None or (expected is not None and version not in expected):
+            _raise_update_failed(db, id, expected)
+        return _task_out(db, id, response)
+
+    # одно условное UPDATE вместо чтения и записи: версия сверяется в WHERE
+    if not db.execute(_task_update(id, expected).values(**values)).first():
+        _raise_update_failed(db, id, expected)
+    if "assignee_id" in values:
+        sync_task_inbox(db, [id])
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="updated"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="update", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
-
-@router.get("/available", response_model=dict)
-def list_available_tasks(
-    db: Session = Depends(get_db),
-    current: UserModel = Depends(get_current_user),
-    limit: int = Query(20, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-):
-    filters = [
-        TaskModel.type == "common",
-        TaskModel.is_private.is_(False),
-        TaskModel.archived_at.is_(None),
-        TaskModel.assignee_id.is_(None),
-    ]
-
-    total = db.execute(
-        select(func.count(distinct(TaskModel.id))).where(and_(*filters))
-    ).scalar_one()
-
-    rows = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(and_(*filters))
-        .order_by(TaskModel.created_at.desc())
-        .limit(limit).offset(offset)
-    ).scalars().all()
-
-    items = [TaskSchema.model_validate(t) for t in rows]
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+    return _task_out(db, id, response)
 
 @router.post("/{id}/take", response_model=TaskSchema)
 def take_task(
     id: int,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    stmt = (
-        update(TaskModel)
-        .where(
-            TaskModel.id == id,
-            TaskModel.assignee_id.is_(None),
-            TaskModel.type == "common",
-            TaskModel.is_private.is_(False),
-            TaskModel.archived_at.is_(None),
-        )
-        .values(assignee_id=current.id, status_code="in_progress")
-        .returning(TaskModel.id)
-    )
+    stmt = _task_update(id).where(
+        TaskModel.assignee_id.is_(None),
+        TaskModel.type == "common",
+        TaskModel.is_private.is_(False),
+        TaskModel.archived_at.is_(None),
+    ).values(assignee_id=current.id, status_code="in_progress")
     res = db.execute(stmt).first()
     if not res:
         raise HTTPException(status_code=409, detail="Task is not available to take")
 
+    sync_task_inbox(db, [id])
     db.commit()
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="taken"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="take", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 @router.post("/{id}/release", response_model=TaskSchema)
 def release_task(
     id: int,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    stmt = (
-        update(TaskModel)
-        .where(TaskModel.id == id, TaskModel.assignee_id == current.id, TaskModel.archived_at.is_(None))
-        .values(assignee_id=None, status_code="new")
-        .returning(TaskModel.id)
-    )
+    stmt = _task_update(id).where(
+        TaskModel.assignee_id == current.id, TaskModel.archived_at.is_(None)
+    ).values(assignee_id=None, status_code="new")
     res = db.execute(stmt).first()
     if not res:
         raise HTTPException(status_code=409, detail="Task is not assigned to you or archived")
 
+    sync_task_inbox(db, [id])
     db.commit()
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="released"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="release", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 @router.post("/{id}/assign", response_model=TaskSchema)
 def assign_task(
     id: int,
     request: Request,
+    response: Response,
     assigneeId: int = Query(..., alias="assigneeId"),
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
     if not is_super_admin_or_manager(current):
         raise HTTPException(status_code=403, detail="Forbidden")
+    expected = _if_match_version(request)
 
     if not db.get(UserModel, assigneeId):
       raise HTTPException(status_code=400, detail="Assignee not found")
 
-    stmt = (
-        update(TaskModel)
-        .where(TaskModel.id == id, TaskModel.archived_at.is_(None))
-        .values(assignee_id=assigneeId)
-        .returning(TaskModel.id)
-    )
+    stmt = _task_update(id, expected).where(TaskModel.archived_at.is_(None)).values(assignee_id=assigneeId)
     res = db.execute(stmt).first()
     if not res:
-        raise HTTPException(status_code=404, detail="Task not found or archived")
+        _raise_update_failed(db, id, expected, archived_detail="Task not found or archived")
 
+    sync_task_inbox(db, [id])
     db.commit()
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="assigned", payload={"assigneeId": assigneeId}))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="assign",
                 entity="task", entity_id=id, payload={"assigneeId": assigneeId},
                 request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 @router.post("/{id}/unassign", response_model=TaskSchema)
 def unassign_task(
     id: int,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
     if not is_super_admin_or_manager(current):
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    stmt = (
-        update(TaskModel)
-        .where(TaskModel.id == id, TaskModel.archived_at.is_(None))
-        .values(assignee_id=None)
-        .returning(TaskModel.id)
-    )
+    stmt = _task_update(id).where(TaskModel.archived_at.is_(None)).values(assignee_id=None)
     res = db.execute(stmt).first()
     if not res:
         raise HTTPException(status_code=404, detail="Task not found or archived")
 
+    sync_task_inbox(db, [id])
     db.commit()
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="unassigned"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="unassign", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 @router.post("/{id}/archive", response_model=TaskSchema)
 def archive_task(
     id: int,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    t = db.get(TaskModel, id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if t.archived_at is not None:
-        raise HTTPException(status_code=409, detail="Already archived")
-    if t.status_code != "done":
+    ensure_task_visible(db, current, id)
+    expected = _if_match_version(request)
+    stmt = _task_update(id, expected).where(
+        TaskModel.archived_at.is_(None), TaskModel.status_code == "done"
+    ).values(archived_at=datetime.now(tz=timezone.utc))
+    if not db.execute(stmt).first():
+        # причину отказа выясняем только на неуспешном пути
+        t = db.get(TaskModel, id)
+        if not t:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if expected is not None and t.version != expected:
+            raise HTTPException(status_code=412, detail="Task has been modified", headers={"ETag": task_etag(t.version)})
+        if t.archived_at is not None:
+            raise HTTPException(status_code=409, detail="Already archived")
         raise HTTPException(status_code=400, detail="Only done tasks can be archived")
-
-    t.archived_at = datetime.now(tz=timezone.utc)
-    db.add(t); db.commit(); db.refresh(t)
+    sync_task_inbox(db, [id])
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="archived"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="archive", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 @router.post("/{id}/unarchive", response_model=TaskSchema)
 def unarchive_task(
     id: int,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    t = db.get(TaskModel, id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Task not found")
-    if t.archived_at is None:
+    ensure_task_visible(db, current, id)
+    stmt = _task_update(id).where(TaskModel.archived_at.is_not(None)).values(archived_at=None)
+    if not db.execute(stmt).first():
+        if not db.get(TaskModel, id):
+            raise HTTPException(status_code=404, detail="Task not found")
         raise HTTPException(status_code=409, detail="Not archived")
-
-    t.archived_at = None
-    db.add(t); db.commit(); db.refresh(t)
+    sync_task_inbox(db, [id])
     db.add(TaskEventModel(task_id=id, actor_id=current.id, type="unarchived"))
     db.commit()
 
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="unarchive", entity="task", entity_id=id, request=request)
 
-    t = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.topic),
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-        )
-        .where(TaskModel.id == id)
-    ).scalar_one()
-    return TaskSchema.model_validate(t)
+    return _task_out(db, id, response)
 
 
 @router.delete("/{id}", status_code=204)
@@ -451,10 +648,123 @@ def delete_task(
         raise HTTPException(status_code=404, detail="Task not found")
     db.delete(t)
     db.commit()
+    _task_changed(id)
     write_audit(db, actor_id=current.id, action="delete", entity="task", entity_id=id, request=request)
     return
 
 
+# При большем числе задач в пакете сбрасываем кэш карточек целиком, а не по ключу
+BULK_PUBLISH_EACH_MAX = 20
+
+# action -> (тип события, действие аудита)
+_BULK_ACTIONS = {
+    "assign": ("assigned", "assign"),
+    "unassign": ("unassigned", "unassign"),
+    "status": ("updated", "update"),
+    "archive": ("archived", "archive"),
+    "delete": (None, "delete"),
+}
+
+
+def _ids_param(ids: list[int]):
+    # один параметр-массив: = ANY(%(ids)s) вместо IN с параметром на каждый id
+    return bindparam("ids", ids, type_=ARRAY(BigInteger))
+
+
+def _bulk_failures(db: Session, action: str, ids: list[int], visible) -> dict[int, tuple[int, str]]:
+    """Причины отказа для задач, не попавших в RETURNING (только неуспешный путь)."""
+    stmt = select(TaskModel.id, TaskModel.archived_at, TaskModel.status_code).where(TaskModel.id == any_(_ids_param(ids)))
+    if visible is not None:
+        stmt = stmt.where(visible)
+    found = {r.id: r for r in db.execute(stmt)}
+    out = {}
+    for id in ids:
+        r = found.get(id)
+        if r is None:
+            out[id] = (404, "Task not found")
+        elif r.archived_at is not None:
+            out[id] = (409, "Already archived" if action == "archive" else "Task is archived")
+        else:
+            out[id] = (400, "Only done tasks can be archived")
+    return out
+
+
+@router.post("/bulk", response_model=list[TaskBulkResult])
+def bulk_tasks(
+    body: TaskBulk,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    """Пакетное действие над задачами: один UPDATE/DELETE ... WHERE id = ANY(...) RETURNING,
+    события и аудит одним INSERT, всё в одной транзакции. Результат — по каждому id."""
+    if body.action in ("assign", "unassign") and not is_super_admin_or_manager(current):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if body.action == "delete" and not is_super_admin(current):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    ids = list(dict.fromkeys(body.ids))
+    visible = task_visible_to(current)
+    where = [TaskModel.id == any_(_ids_param(ids))]
+    if visible is not None:
+        where.append(visible)
+
+    payload = None
+    if body.action == "delete":
+        done = {r.id: None for r in db.execute(delete(TaskModel).where(*where).returning(TaskModel.id))}
+    else:
+        values: dict = {"version": TaskModel.version + 1}
+        where.append(TaskModel.archived_at.is_(None))
+        if body.action == "assign":
+            if body.assignee_id is None or not db.get(UserModel, body.assignee_id):
+                raise HTTPException(status_code=400, detail="Assignee not found")
+            values["assignee_id"] = body.assignee_id
+            payload = {"assigneeId": body.assignee_id}
+        elif body.action == "unassign":
+            values["assignee_id"] = None
+        elif body.action == "status":
+            code = str(body.status_code or "").strip().lower()
+            if code not in TASK_STATUS_CODES:
+                raise HTTPException(status_code=400, detail=f"Invalid status_code. Allowed: {sorted(TASK_STATUS_CODES)}")
+            values["status_code"] = code
+            payload = {"statusCode": code}
+        else:
+            where.append(TaskModel.status_code == "done")
+            values["archived_at"] = datetime.now(tz=timezone.utc)
+        stmt = update(TaskModel).where(*where).values(**values).returning(TaskModel.id, TaskModel.version)
+        done = {r.id: r.version for r in db.execute(stmt)}
+
+    event_type, audit_action = _BULK_ACTIONS[body.action]
+    changed = [id for id in ids if id in done]
+    if changed:
+        if body.action in ("assign", "unassign", "archive"):
+            sync_task_inbox(db, changed)
+        if event_type:
+            db.execute(insert(TaskEventModel), [
+                {"task_id": id, "actor_id": current.id, "type": event_type, "payload": payload} for id in changed
+            ])
+        write_audit_many(db, actor_id=current.id, action=audit_action, entity="task",
+                         entity_ids=changed, payload={**(payload or {}), "bulk": True}, request=request)
+    failed = _bulk_failures(db, body.action, [id for id in ids if id not in done], visible) if len(changed) < len(ids) else {}
+    db.commit()
+
+    if changed:
+        if len(changed) <= BULK_PUBLISH_EACH_MAX:
+            for id in changed:
+                publish(entity_key("task", id))
+        else:
+            publish("task:")
+        publish(DASHBOARD_PREFIX)
+
+    results = []
+    for id in ids:
+        if id in done:
+            results.append(TaskBulkResult(id=id, ok=True, code=204 if body.action == "delete" else 200, version=done[id]))
+        else:
+            code, detail = failed[id]
+            results.append(TaskBulkResult(id=id, ok=False, code=code, detail=detail))
+    return results
+
+
 # Перевод кодов и флагов в русский для CSV-архива
 _PRIORITY_RU = {"low": "низкий", "medium": "средний", "high": "высокий", "urgent": "срочный"}
 _STATUS_RU = {"new": "Новая", "in_progress": "В работе", "pause": "Пауза", "done": "Завершена"}
@@ -466,59 +776,88 @@ def _fmt_dt(dt: Optional[datetime]) -> str:
     return dt.strftime("%d.%m.%Y %H:%M") if hasattr(dt, "strftime") else str(dt)
 
 
-@router.post("/archive/download-and-clear")
+# Выгрузка архива пачками: прогресс и удаление по ARCHIVE_BATCH задач
+ARCHIVE_BATCH = 2000
+
+_ARCHIVE_HEADER = [
+    "ID", "Название", "Тема", "Описание", "Срок", "Приоритет", "Статус",
+    "Личная", "Тип задачи", "ID создателя", "ID исполнителя", "Исполнитель", "Создатель", "Создано"
+]
+
+
+def _archive_row(t) -> list:
+    pc = (t.priority_code or "").strip().lower()
+    sc = (t.status_code or "").strip().lower()
+    tc = (t.type or "").strip().lower()
+    return [
+        t.id,
+        (t.title or "").replace("\n", " ").replace("\r", ""),
+        (t.topic_name or "").replace("\n", " ").replace("\r", ""),
+        ((t.content or "")[:500]).replace("\n", " ").replace("\r", ""),
+        _fmt_dt(t.due_date),
+        _PRIORITY_RU.get(pc, pc or "средний"),
+        _STATUS_RU.get(sc, sc or "Новая"),
+        "Да" if t.is_private else "Нет",
+        _TYPE_RU.get(tc, tc or "Личная"),
+        t.creator_id,
+        t.assignee_id or "",
+        (t.assignee_name or "").replace("\n", " ").replace("\r", ""),
+        (t.creator_name or "").replace("\n", " ").replace("\r", ""),
+        _fmt_dt(t.created_at),
+    ]
+
+
+@job_handler("tasks.archive_done")
+def archive_done_job(ctx: JobContext) -> dict:
+    """CSV всех завершённых задач в артефакт задачи, затем удаление выгруженных.
+    Удаление идёт в одной транзакции: при сбое повтор выгрузит те же задачи заново."""
+    db = ctx.db
+    done = TaskModel.status_code == "done"
+    total = db.execute(select(func.count()).select_from(TaskModel).where(done)).scalar_one()
+    path = ctx.artifact_path("archive_tasks.csv", "text/csv; charset=utf-8")
+    ids: list[int] = []
+    # только колонки tasks: имена темы и людей денормализованы, join-ы не нужны
+    rows = db.execute(
+        select(
+            TaskModel.id, TaskModel.title, TaskModel.topic_name, TaskModel.content, TaskModel.due_date,
+            TaskModel.priority_code, TaskModel.status_code, TaskModel.is_private, TaskModel.type,
+            TaskModel.creator_id, TaskModel.assignee_id, TaskModel.assignee_name, TaskModel.creator_name,
+            TaskModel.created_at,
+        )
+        .where(done)
+        .order_by(TaskModel.id)
+        .execution_options(yield_per=ARCHIVE_BATCH)
+    )
+    # UTF-8 with BOM для корректного отображения кириллицы в Excel и браузере
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=";", quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(_ARCHIVE_HEADER)
+        for t in rows:
+            writer.writerow(_archive_row(t))
+            ids.append(t.id)
+            if len(ids) % ARCHIVE_BATCH == 0:
+                ctx.progress(50 * len(ids) // max(total, 1), f"exported {len(ids)}/{total}")
+    for i in range(0, len(ids), ARCHIVE_BATCH):
+        chunk = ids[i:i + ARCHIVE_BATCH]
+        db.execute(delete(TaskModel).where(TaskModel.id.in_(chunk), done))
+        ctx.progress(50 + 50 * (i + len(chunk)) // len(ids), f"deleted {i + len(chunk)}/{len(ids)}")
+    db.commit()
+    publish("task:")
+    publish(DASHBOARD_PREFIX)
+    return {"exported": len(ids)}
+
+
+@router.post("/archive/download-and-clear", status_code=202)
 def archive_download_and_clear(
     request: Request,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
-    """Скачать CSV всех завершённых задач и удалить их из БД. Только super_admin."""
+    """Выгрузить CSV всех завершённых задач и удалить их из БД. Только super_admin.
+    Выполняется фоном: ответ 202 с задачей, CSV — GET /jobs/{id}/artifact после завершения."""
     if not is_super_admin(current):
         raise HTTPException(status_code=403, detail="Forbidden")
-    rows = db.execute(
-        select(TaskModel)
-        .options(
-            joinedload(TaskModel.assignee),
-            joinedload(TaskModel.creator),
-            joinedload(TaskModel.topic),
-        )
-        .where(TaskModel.status_code == "done")
-        .order_by(TaskModel.id)
-    ).scalars().all()
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=";", quoting=csv.QUOTE_MINIMAL)
-    writer.writerow([
-        "ID", "Название", "Тема", "Описание", "Срок", "Приоритет", "Статус",
-        "Личная", "Тип задачи", "ID создателя", "ID исполнителя", "Исполнитель", "Создатель", "Создано"
-    ])
-    for t in rows:
-        pc = (t.priority_code or "").strip().lower()
-        sc = (t.status_code or "").strip().lower()
-        tc = (t.type or "").strip().lower()
-        writer.writerow([
-            t.id,
-            (t.title or "").replace("\n", " ").replace("\r", ""),
-            (t.topic.name if t.topic else "").replace("\n", " ").replace("\r", ""),
-            ((t.content or "")[:500]).replace("\n", " ").replace("\r", ""),
-            _fmt_dt(t.due_date),
-            _PRIORITY_RU.get(pc, pc or "средний"),
-            _STATUS_RU.get(sc, sc or "Новая"),
-            "Да" if t.is_private else "Нет",
-            _TYPE_RU.get(tc, tc or "Личная"),
-            t.creator_id,
-            t.assignee_id or "",
-            (t.assignee.full_name if t.assignee else "").replace("\n", " ").replace("\r", ""),
-            (t.creator.full_name if t.creator else "").replace("\n", " ").replace("\r", ""),
-            _fmt_dt(t.created_at),
-        ])
-    db.execute(delete(TaskModel).where(TaskModel.status_code == "done"))
+    job = enqueue(db, "tasks.archive_done", created_by=current.id)
     db.commit()
-    output.seek(0)
-    csv_content = output.getvalue()
-    # UTF-8 with BOM для корректного отображения кириллицы в Excel и браузере
-    body = csv_content.encode("utf-8-sig")
-    return StreamingResponse(
-        iter([body]),
-        media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": "attachment; filename=archive_tasks.csv"},
-    )
\ No newline at end of file
+    write_audit(db, actor_id=current.id, action="archive_clear", entity="job", entity_id=job.id, request=request)
+    return job_accepted(job)
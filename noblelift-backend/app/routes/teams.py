@@ -1,15 +1,24 @@
 from __future__ import annotations
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, and_, func, distinct
+from sqlalchemy import select, and_, func, distinct, delete, update, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.core.cache import DASHBOARD_PREFIX
+from app.core.invalidation import publish
 from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.user import User as UserModel
 from app.models.team import Team as TeamModel
 from app.models.team_member import TeamMember as TeamMemberModel
-from app.schemas.team import Team as TeamSchema, TeamCreate, TeamUpdate, TeamMember as TeamMemberSchema, TeamMemberAdd
+from app.models.task import Task as TaskModel
+from app.routes.tasks import task_list_select, task_visible_to
+from app.schemas.task import Task as TaskSchema
+from app.schemas.team import Team as TeamSchema, TeamCreate, TeamUpdate, TeamMember as TeamMemberSchema, TeamMemberAdd, TeamMembersReplace
+from app.utils.pagination import Page
+from app.utils.projection import project
+from app.utils.responses import page_response
 
 router = APIRouter(prefix="/teams", tags=["Teams"])
 
@@ -36,6 +45,33 @@ def list_teams(
     items: List[TeamSchema] = [TeamSchema.model_validate(t) for t in rows]
     return {"items": items, "total": total, "limit": limit, "offset": offset}
 
+@router.get("/task-counts", response_model=dict)
+def team_task_counts(
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    team_id: Optional[int] = Query(None, alias="teamId"),
+):
+    """Неархивные задачи по командам: всего, по статусам и просроченные — одним GROUP BY."""
+    filters = [TaskModel.team_id.is_not(None), TaskModel.archived_at.is_(None)]
+    if team_id is not None:
+        filters.append(TaskModel.team_id == team_id)
+    visible = task_visible_to(current)
+    if visible is not None:
+        filters.append(visible)
+    overdue = and_(TaskModel.due_date < func.now(), TaskModel.status_code != "done")
+    rows = db.execute(
+        select(TaskModel.team_id, TaskModel.status_code, func.count().label("n"), func.count().filter(overdue).label("overdue"))
+        .where(*filters)
+        .group_by(TaskModel.team_id, TaskModel.status_code)
+    ).all()
+    teams: dict[int, dict] = {}
+    for r in rows:
+        t = teams.setdefault(r.team_id, {"teamId": r.team_id, "total": 0, "overdue": 0, "byStatus": {}})
+        t["total"] += r.n
+        t["overdue"] += r.overdue
+        t["byStatus"][r.status_code] = r.n
+    return {"items": sorted(teams.values(), key=lambda t: t["teamId"])}
+
 @router.get("/{id}", response_model=TeamSchema)
 def get_team(id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
     t = db.get(TeamModel, id)
@@ -70,7 +106,11 @@ def delete_team(id: int, db: Session = Depends(get_db), current: UserModel = Dep
     if not is_manager(current): raise HTTPException(status_code=403, detail="Forbidden")
     t = db.get(TeamModel, id)
     if not t: raise HTTPException(status_code=404, detail="Not found")
+    # team_id задач обнулит FK (SET NULL): карточка и видимость меняются, ETag тоже должен
+    db.execute(update(TaskModel).where(TaskModel.team_id == id).values(version=TaskModel.version + 1))
     db.delete(t); db.commit()
+    publish("task:")
+    publish(DASHBOARD_PREFIX)
     return
 
 @router.get("/{id}/members", response_model=dict)
@@ -84,15 +124,75 @@ def list_members(id: int, db: Session = Depends(get_db), current: UserModel = De
 def add_member(id: int, body: TeamMemberAdd, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
     if not is_manager(current): raise HTTPException(status_code=403, detail="Forbidden")
     if not db.get(TeamModel, id): raise HTTPException(status_code=404, detail="Not found")
-    exists = db.execute(
-        select(TeamMemberModel.id).where(TeamMemberModel.team_id == id, TeamMemberModel.user_id == body.user_id)
-    ).first()
-    if exists:
+    # уникальный ключ (team_id, user_id) решает гонку сам, без предварительного SELECT
+    m = db.execute(
+        pg_insert(TeamMemberModel)
+        .values(team_id=id, user_id=body.user_id, role=body.role or "member")
+        .on_conflict_do_nothing(constraint="uq_team_user")
+        .returning(TeamMemberModel)
+    ).scalar_one_or_none()
+    if m is None:
         raise HTTPException(status_code=409, detail="Already in team")
-    m = TeamMemberModel(team_id=id, user_id=body.user_id, role=body.role or "member")
-    db.add(m); db.commit(); db.refresh(m)
+    db.commit()
     return TeamMemberSchema.model_validate(m)
 
+@router.put("/{id}/members", response_model=dict)
+def replace_members(id: int, body: TeamMembersReplace, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    """Задать полный состав команды: добавить новых, обновить роли, убрать отсутствующих — одной транзакцией."""
+    if not is_manager(current): raise HTTPException(status_code=403, detail="Forbidden")
+    if not db.get(TeamModel, id): raise HTTPException(status_code=404, detail="Not found")
+    wanted = {m.user_id: m.role or "member" for m in body.members}
+    ids = list(wanted)
+    if ids:
+        known = set(db.execute(select(UserModel.id).where(UserModel.id.in_(ids))).scalars())
+        unknown = sorted(set(ids) - known)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Users not found: {unknown}")
+
+    removed = db.execute(
+        delete(TeamMemberModel).where(TeamMemberModel.team_id == id, TeamMemberModel.user_id.not_in(ids))
+    ).rowcount
+    added = updated = 0
+    if ids:
+        stmt = pg_insert(TeamMemberModel).values([{"team_id": id, "user_id": u, "role": r} for u, r in wanted.items()])
+        # строки без изменений не трогаем; xmax = 0 отличает вставку от обновления
+        rows = db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_team_user",
+                set_={"role": stmt.excluded.role},
+                where=TeamMemberModel.role.is_distinct_from(stmt.excluded.role),
+            ).returning(literal_column("xmax = 0").label("inserted"))
+        ).scalars().all()
+        added = sum(1 for inserted in rows if inserted)
+        updated = len(rows) - added
+    db.commit()
+    return {"added": added, "updated": updated, "removed": removed, "total": len(ids)}
+
+@router.get("/{id}/tasks", response_model=Page[TaskSchema])
+def list_team_tasks(
+    id: int,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    archived: bool = Query(False),
+):
+    if not db.get(TeamModel, id): raise HTTPException(status_code=404, detail="Not found")
+    filters = [
+        TaskModel.team_id == id,
+        TaskModel.archived_at.is_not(None) if archived else TaskModel.archived_at.is_(None),
+    ]
+    visible = task_visible_to(current)
+    if visible is not None:
+        filters.append(visible)
+    total = db.execute(select(func.count()).select_from(TaskModel).where(*filters)).scalar_one()
+    # диапазон по ix_tasks_team_created
+    items = project(
+        db.execute(task_list_select().where(*filters).order_by(TaskModel.created_at.desc()).limit(limit).offset(offset)),
+        TaskSchema,
+    )
+    return page_response(TaskSchema, items, total, limit, offset)
+
 @router.delete("/{id}/members/{user_id}", status_code=204)
 def remove_member(id: int, user_id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
     if not is_manager(current): raise HTTPException(status_code=403, detail="Forbidden")
@@ -2,14 +2,20 @@ from __future__ import annotations
 
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import select, and_, func, distinct, delete, or_
+from datetime import timedelta
+
+from sqlalchemy import select, and_, func, distinct, delete, update, or_, case
 from sqlalchemy.orm import Session, joinedload
 
 from app.db.session import get_db
 from app.routes.deps import get_current_user
+from app.routes.jobs import job_accepted
 from app.core.security import hash_password
+from app.core.cache import entity_cache, ref_cache, entity_key, cached_response, DASHBOARD_PREFIX
+from app.core.invalidation import publish
+from app.core.jobs import JobContext, enqueue, job_handler
 from app.models.user import User as UserModel
 from app.models.role import Role as RoleModel
 from app.models.profile import Profile as ProfileModel
@@ -17,6 +23,11 @@ from app.models.status import ProfileStatus as ProfileStatusModel
 from app.models.task import Task as TaskModel
 
 from app.schemas.user import User as UserSchema
+from app.schemas.role import Role as RoleSchema
+from app.schemas.profile import Profile as ProfileSchema, ProfileStatus as ProfileStatusSchema
+from app.utils.pagination import Page
+from app.utils.projection import columns_for, project, project_one, parse_fieldset, sparse_schema, fieldset_key
+from app.utils.responses import page_response
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -47,8 +58,72 @@ class UserUpdate(BaseModel):
     isActive: Optional[bool] = None
 
 
+USER_RELATIONS = ("role", "profile")
+
+
+def user_list_select(schema=UserSchema, expand=USER_RELATIONS, join_role: bool = False, join_profile: bool = False):
+    """Колонки схемы с раскрытыми ролью и профилем одним запросом, без ORM-объектов.
+    join_role/join_profile — присоединить таблицу только ради фильтра, не выбирая колонки."""
+    stmt = select(*columns_for(schema, UserModel))
+    if "role" in expand:
+        stmt = stmt.add_columns(*columns_for(RoleSchema, RoleModel, prefix="role"))
+    if "role" in expand or join_role:
+        stmt = stmt.join(RoleModel, UserModel.role_id == RoleModel.id)
+    if "profile" in expand:
+        stmt = (
+            stmt.add_columns(
+                *columns_for(ProfileSchema, ProfileModel, prefix="profile"),
+                *columns_for(ProfileStatusSchema, ProfileStatusModel, prefix="profile__status"),
+            )
+            .outerjoin(ProfileModel, ProfileModel.user_id == UserModel.id)
+            .outerjoin(ProfileStatusModel, ProfileStatusModel.code == ProfileModel.status_code)
+        )
+    elif join_profile:
+        stmt = stmt.outerjoin(ProfileModel, ProfileModel.user_id == UserModel.id)
+    return stmt
+
+
+def _user_fieldset(fields: Optional[str], expand: Optional[str]):
+    """Схема ответа и раскрытые связи для ?fields=&expand=; без параметров — полная UserSchema."""
+    fs = parse_fieldset(UserSchema, USER_RELATIONS, fields, expand)
+    if fs is None:
+        return UserSchema, USER_RELATIONS, None
+    return sparse_schema(UserSchema, fs[0] | fs[1]), fs[1], fs
+
+
+def load_user(db: Session, id: int, schema=UserSchema, relations=USER_RELATIONS):
+    user = project_one(db.execute(user_list_select(schema, relations).where(UserModel.id == id)), schema)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+# компактный справочник сотрудников для пикеров: [id, ФИО, аватар] по активным пользователям
+USER_DIRECTORY_KEY = "ref:users"
+USER_DIRECTORY_COLUMNS = ["id", "fullName", "avatarUrl"]
+
+
+def load_user_directory(db: Session) -> dict:
+    rows = db.execute(
+        select(UserModel.id, UserModel.full_name, UserModel.avatar_url)
+        .where(UserModel.is_active.is_(True))
+        .order_by(UserModel.full_name, UserModel.id)
+    ).all()
+    return {"columns": USER_DIRECTORY_COLUMNS, "items": [list(r) for r in rows]}
+
+
+def users_changed(id: int) -> None:
+    """Сбросить карточку пользователя и справочник сотрудников во всех воркерах (после commit)."""
+    publish(entity_key("user", id))
+    publish(USER_DIRECTORY_KEY)
+
+
+_FIELDS_QUERY = Query(None, description="Поля через запятую, например id,fullName,avatarUrl")
+_EXPAND_QUERY = Query(None, description="Связи через запятую: role,profile")
+
+
 # ---------- Список пользователей ----------
-@router.get("", response_model=dict)
+@router.get("", response_model=Page[UserSchema])
 def list_users(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
@@ -57,9 +132,10 @@ def list_users(
     q: Optional[str] = Query(None, description="Поиск по email/ФИО"),
     role: Optional[str] = Query(None, description="Код роли: super_admin|manager|employee"),
     status_code: Optional[str] = Query(None, alias="status", description="Код статуса профиля"),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
 ):
-    base_stmt = select(UserModel)
-
+    schema, relations, _ = _user_fieldset(fields, expand)
     filters = []
     join_role = False
     join_profile = False
@@ -74,14 +150,6 @@ def list_users(
         join_profile = True
         filters.append(ProfileModel.status_code == status_code)
 
-    stmt = base_stmt
-    if join_role:
-        stmt = stmt.join(RoleModel, UserModel.role_id == RoleModel.id)
-    if join_profile:
-        stmt = stmt.join(ProfileModel, ProfileModel.user_id == UserModel.id)
-    if filters:
-        stmt = stmt.where(and_(*filters))
-
     total_stmt = select(func.count(distinct(UserModel.id)))
     if join_role or join_profile or filters:
         total_stmt = total_stmt.select_from(UserModel)
@@ -94,46 +162,98 @@ def list_users(
 
     total = db.execute(total_stmt).scalar_one()
 
-    data_stmt = (
-        select(UserModel)
-        .options(
-            joinedload(UserModel.role),
-            joinedload(UserModel.profile).joinedload(ProfileModel.status),
-        )
-    )
-    if join_role:
-        data_stmt = data_stmt.join(RoleModel, UserModel.role_id == RoleModel.id)
-    if join_profile:
-        data_stmt = data_stmt.join(ProfileModel, ProfileModel.user_id == UserModel.id)
+    # нераскрытые роль и профиль присоединяются, только если по ним есть фильтр
+    data_stmt = user_list_select(schema, relations, join_role=join_role, join_profile=join_profile)
     if filters:
         data_stmt = data_stmt.where(and_(*filters))
 
-    rows = db.execute(
-        data_stmt.order_by(UserModel.created_at.desc()).limit(limit).offset(offset)
-    ).scalars().all()
+    items: List[UserSchema] = project(
+        db.execute(data_stmt.order_by(UserModel.created_at.desc()).limit(limit).offset(offset)),
+        schema,
+    )
+    return page_response(schema, items, total, limit, offset)
+
+
+# ---------- Справочник и подсказки для пикеров ----------
+@router.get("/lookup")
+def lookup_users(
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    """Все активные сотрудники кортежами [id, fullName, avatarUrl]; с ETag, без лимита."""
+    return cached_response(request, ref_cache, USER_DIRECTORY_KEY, lambda: load_user_directory(db))
+
 
-    items: List[UserSchema] = [UserSchema.model_validate(u) for u in rows]
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+SUGGEST_INTERACTION_DAYS = 90
+
+
+def _like_escape(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("/suggest")
+def suggest_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    """Подсказки по ФИО/email: сначала те, с кем текущий пользователь недавно работал по задачам."""
+    needle = q.strip().lower()
+    pattern = _like_escape(needle)
+    name = func.lower(UserModel.full_name)
+    email = func.lower(UserModel.email)
+
+    # собеседник по задаче: исполнитель задач, которые я поставил, и автор задач, поставленных мне
+    other = case((TaskModel.creator_id == current.id, TaskModel.assignee_id), else_=TaskModel.creator_id)
+    interactions = (
+        select(other.label("user_id"), func.count().label("n"))
+        .where(
+            or_(TaskModel.creator_id == current.id, TaskModel.assignee_id == current.id),
+            TaskModel.assignee_id.is_not(None),
+            TaskModel.created_at > func.now() - timedelta(days=SUGGEST_INTERACTION_DAYS),
+        )
+        .group_by(other)
+        .subquery()
+    )
+
+    # все условия поддержаны GIN-индексами по триграммам (ix_users_*_trgm)
+    match = or_(
+        name.like(f"%{pattern}%", escape="\\"),
+        email.like(f"{pattern}%", escape="\\"),
+        name.op("%")(needle),
+    )
+    prefix = or_(name.like(f"{pattern}%", escape="\\"), name.like(f"% {pattern}%", escape="\\"))
+    rows = db.execute(
+        select(UserModel.id, UserModel.full_name, UserModel.avatar_url)
+        .outerjoin(interactions, interactions.c.user_id == UserModel.id)
+        .where(UserModel.is_active.is_(True), UserModel.id != current.id, match)
+        .order_by(
+            func.coalesce(interactions.c.n, 0).desc(),
+            prefix.desc(),
+            func.similarity(name, needle).desc(),
+            UserModel.full_name,
+        )
+        .limit(limit)
+    ).all()
+    return {"columns": USER_DIRECTORY_COLUMNS, "items": [list(r) for r in rows]}
 
 
 # ---------- Карточка пользователя ----------
 @router.get("/{id}", response_model=UserSchema)
 def get_user(
     id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
+    fields: Optional[str] = _FIELDS_QUERY,
+    expand: Optional[str] = _EXPAND_QUERY,
 ):
-    user = db.execute(
-        select(UserModel)
-        .options(
-            joinedload(UserModel.role),
-            joinedload(UserModel.profile).joinedload(ProfileModel.status),
-        )
-        .where(UserModel.id == id)
-    ).scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return UserSchema.model_validate(user)
+    schema, relations, fs = _user_fieldset(fields, expand)
+
+    key = entity_key("user", id) + (fieldset_key(fs) if fs is not None else "")
+    return cached_response(request, entity_cache, key, lambda: load_user(db, id, schema, relations))
 
 
 # ---------- Создать пользователя ----------
@@ -169,6 +289,7 @@ def create_user(
     if not db.get(ProfileModel, user.id):
         db.add(ProfileModel(user_id=user.id, status_code="in_office"))
         db.commit()
+    publish(USER_DIRECTORY_KEY)
 
     user = db.execute(
         select(UserModel)
@@ -182,6 +303,19 @@ def create_user(
     return UserSchema.model_validate(user)
 
 
+def _rename_in_tasks(db: Session, user_id: int, name: str) -> None:
+    """Обновить копии ФИО в tasks (assignee_name/creator_name) одним UPDATE; версии задач растут."""
+    db.execute(
+        update(TaskModel)
+        .where(or_(TaskModel.assignee_id == user_id, TaskModel.creator_id == user_id))
+        .values(
+            assignee_name=case((TaskModel.assignee_id == user_id, name), else_=TaskModel.assignee_name),
+            creator_name=case((TaskModel.creator_id == user_id, name), else_=TaskModel.creator_name),
+            version=TaskModel.version + 1,
+        )
+    )
+
+
 # ---------- Обновить пользователя ----------
 @router.patch("/{id}", response_model=UserSchema)
 def update_user(
@@ -207,6 +341,7 @@ def update_user(
             raise HTTPException(status_code=400, detail="Email already in use")
         user.email = str(body.email)
 
+    renamed = body.fullName is not None and body.fullName != user.full_name
     if body.fullName is not None:
         user.full_name = body.fullName
     if body.phone is not None:
@@ -224,7 +359,13 @@ def update_user(
         user.is_active = body.isActive
 
     db.add(user)
+    if renamed:
+        _rename_in_tasks(db, id, user.full_name)
     db.commit()
+    users_changed(id)
+    if renamed:
+        publish("task:")
+        publish(DASHBOARD_PREFIX)
 
     user = db.execute(
         select(UserModel)
@@ -238,13 +379,48 @@ def update_user(
     return UserSchema.model_validate(user)
 
 
+# Задачи удаляемого пользователя удаляются пачками, с прогрессом
+DELETE_USER_BATCH = 1000
+
+
+@job_handler("users.delete")
+def delete_user_job(ctx: JobContext) -> dict:
+    """Удалить задачи пользователя (созданные им или назначенные на него), затем его самого.
+    Пачки коммитятся по отдельности: при сбое повтор продолжит с оставшихся."""
+    db = ctx.db
+    id = int(ctx.payload["userId"])
+    mine = or_(TaskModel.creator_id == id, TaskModel.assignee_id == id)
+    total = db.execute(select(func.count()).select_from(TaskModel).where(mine)).scalar_one()
+    deleted = 0
+    while True:
+        # связанные файлы, события и строки inbox удалятся каскадно по ondelete=CASCADE
+        n = db.execute(
+            delete(TaskModel).where(TaskModel.id.in_(select(TaskModel.id).where(mine).limit(DELETE_USER_BATCH)))
+        ).rowcount
+        db.commit()
+        deleted += n
+        if n < DELETE_USER_BATCH:
+            break
+        ctx.progress(90 * deleted // max(total, 1), f"deleted tasks {deleted}/{total}")
+
+    # Профиль и прочие связанные сущности с ondelete=CASCADE удалятся вместе с пользователем.
+    db.execute(delete(UserModel).where(UserModel.id == id))
+    db.commit()
+    users_changed(id)
+    publish("task:")
+    publish(DASHBOARD_PREFIX)
+    return {"userId": id, "deletedTasks": deleted}
+
+
 # ---------- Удалить пользователя (с его задачами) ----------
-@router.delete("/{id}", status_code=204)
+@router.delete("/{id}", status_code=202)
 def delete_user(
     id: int,
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
 ):
+    """Пользователь сразу деактивируется (вход и токены перестают работать),
+    удаление с задачами выполняется фоном: ответ 202 с задачей."""
     ensure_super_admin(current)
 
     user = db.get(UserModel, id)
@@ -255,16 +431,8 @@ def delete_user(
     if current.id == user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
 
-    # Удаляем все задачи, созданные этим пользователем или назначенные на него.
-    # Связанные файлы и события удалятся каскадно по ondelete=CASCADE.
-    db.execute(
-        delete(TaskModel).where(
-            or_(TaskModel.creator_id == id, TaskModel.assignee_id == id)
-        )
-    )
-    db.commit()
-
-    # Профиль и прочие связанные сущности с ondelete=CASCADE удалятся вместе с пользователем.
-    db.delete(user)
+    user.is_active = False
+    job = enqueue(db, "users.delete", {"userId": id}, created_by=current.id)
     db.commit()
-    return
+    users_changed(id)
+    return job_accepted(job)
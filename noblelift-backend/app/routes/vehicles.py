@@ -1,18 +1,29 @@
 from __future__ import annotations
 from typing import Optional, List
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
-from sqlalchemy import select, and_, func, distinct, update
+from sqlalchemy import select, and_, func, distinct, update, exists
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
 from app.core.audit import write_audit
+from app.core.cache import entity_cache, entity_key, cached_response
+from app.core.invalidation import publish
 from app.db.session import get_db
 from app.routes.deps import get_current_user
 from app.models.vehicle import Vehicle as VehicleModel
 from app.models.vehicle_log import VehicleLog as VehicleLogModel
+from app.models.vehicle_reservation import VehicleReservation as ReservationModel
+from app.models.vehicle_usage import VehicleUsageDaily as UsageDailyModel
 from app.models.user import User as UserModel
 
 from app.schemas.vehicle import Vehicle as VehicleSchema, VehicleCreate, VehicleUpdate, VehicleLog as VehicleLogSchema
+from app.schemas.vehicle import VehicleReservation as ReservationSchema, VehicleReservationCreate, VehicleAvailability
+from app.schemas.vehicle import VehicleUsageStat
+from app.utils.pagination import Page
+from app.utils.projection import columns_for, project
+from app.utils.responses import page_response
 
 router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
 
@@ -23,7 +34,20 @@ def is_manager(u: UserModel) -> bool:
 def is_super_admin(u: UserModel) -> bool:
     return bool(u.role and u.role.code == "super_admin")
 
-@router.get("", response_model=dict)
+
+def _from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _reserved_by_other(user_id: int):
+    """Условие: на машину прямо сейчас действует чужая бронь."""
+    return exists().where(
+        ReservationModel.vehicle_id == VehicleModel.id,
+        ReservationModel.user_id != user_id,
+        ReservationModel.during.contains(func.now()),
+    )
+
+@router.get("", response_model=Page[VehicleSchema])
 def list_vehicles(
     db: Session = Depends(get_db),
     current: UserModel = Depends(get_current_user),
@@ -47,7 +71,7 @@ def list_vehicles(
     if holder_id is not None:
         filters.append(VehicleModel.holder_id == holder_id)
 
-    base = select(VehicleModel)
+    base = select(*columns_for(VehicleSchema, VehicleModel))
     if filters: base = base.where(and_(*filters))
 
     total = db.execute(
@@ -55,19 +79,100 @@ def list_vehicles(
         else select(func.count(distinct(VehicleModel.id)))
     ).scalar_one()
 
+    items: List[VehicleSchema] = project(
+        db.execute(base.order_by(VehicleModel.created_at.desc()).limit(limit).offset(offset)),
+        VehicleSchema,
+    )
+    return page_response(VehicleSchema, items, total, limit, offset)
+
+@router.get("/availability", response_model=dict)
+def vehicles_availability(
+    start: int = Query(..., description="ms"),
+    end: int = Query(..., description="ms"),
+    only_free: bool = Query(False),
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    """Свободен ли каждый автомобиль в окне [start, end): один запрос по GiST-индексу броней."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    window = func.tstzrange(_from_ms(start), _from_ms(end), "[)")
+    busy = exists().where(ReservationModel.vehicle_id == VehicleModel.id, ReservationModel.during.overlaps(window))
+    available = and_(~busy, VehicleModel.status.in_(("available", "in_use")))
+
+    stmt = select(VehicleModel, available.label("available")).order_by(VehicleModel.number)
+    if only_free:
+        stmt = stmt.where(available)
+    rows = db.execute(stmt).all()
+    items = [VehicleAvailability(vehicle=VehicleSchema.model_validate(v), available=bool(free)) for v, free in rows]
+    return {"items": items}
+
+@router.get("/stats", response_model=dict)
+def vehicles_stats(
+    since: Optional[int] = Query(None, description="ms, по умолчанию — 30 дней назад"),
+    until: Optional[int] = Query(None, description="ms, по умолчанию — сейчас"),
+    group_by: str = Query("vehicle", pattern="^(vehicle|user|day)$"),
+    vehicle_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    """Использование автопарка по суточным агрегатам (app.workers.vehicle_rollup), без чтения vehicle_logs."""
+    if not is_manager(current):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    now = datetime.now(tz=timezone.utc)
+    day_from = (_from_ms(since) if since is not None else now - timedelta(days=30)).date()
+    day_to = (_from_ms(until) if until is not None else now).date()
+    if day_to < day_from:
+        raise HTTPException(status_code=400, detail="until must not be earlier than since")
+
+    key = {
+        "vehicle": UsageDailyModel.vehicle_id,
+        "user": UsageDailyModel.user_id,
+        "day": UsageDailyModel.day,
+    }[group_by]
+    filters = [UsageDailyModel.day >= day_from, UsageDailyModel.day <= day_to]
+    if vehicle_id is not None:
+        filters.append(UsageDailyModel.vehicle_id == vehicle_id)
+    if user_id is not None:
+        filters.append(UsageDailyModel.user_id == user_id)
+
+    seconds = func.sum(UsageDailyModel.seconds_in_use)
     rows = db.execute(
-        base.order_by(VehicleModel.created_at.desc()).limit(limit).offset(offset)
-    ).scalars().all()
+        select(key.label("key"), seconds.label("seconds"), func.sum(UsageDailyModel.takes).label("takes"))
+        .where(and_(*filters))
+        .group_by(key)
+        .order_by(key if group_by == "day" else seconds.desc())
+    ).all()
 
-    items: List[VehicleSchema] = [VehicleSchema.model_validate(v) for v in rows]
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+    # простой машины имеет смысл, только когда в группе одна машина
+    period_hours = ((day_to - day_from).days + 1) * 24
+    items: List[VehicleUsageStat] = []
+    for r in rows:
+        hours = round(int(r.seconds or 0) / 3600, 2)
+        idle = None
+        if group_by == "vehicle" and user_id is None:
+            idle = round(max(period_hours - hours, 0), 2)
+        elif group_by == "day" and vehicle_id is not None and user_id is None:
+            idle = round(max(24 - hours, 0), 2)
+        items.append(VehicleUsageStat(
+            vehicle_id=r.key if group_by == "vehicle" else vehicle_id,
+            user_id=r.key if group_by == "user" else user_id,
+            day=r.key if group_by == "day" else None,
+            hours_in_use=hours,
+            takes=int(r.takes or 0),
+            idle_hours=idle,
+        ))
+    return {"items": items, "since": day_from.isoformat(), "until": day_to.isoformat(), "groupBy": group_by}
 
 @router.get("/{id}", response_model=VehicleSchema)
-def get_vehicle(id: int, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
-    v = db.get(VehicleModel, id)
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    return VehicleSchema.model_validate(v)
+def get_vehicle(id: int, request: Request, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
+    def load():
+        v = db.get(VehicleModel, id)
+        if not v:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        return VehicleSchema.model_validate(v)
+    return cached_response(request, entity_cache, entity_key("vehicle", id), load)
 
 @router.post("", response_model=VehicleSchema, status_code=201)
 def create_vehicle(body: VehicleCreate, request: Request, db: Session = Depends(get_db), current: UserModel = Depends(get_current_user)):
@@ -110,6 +215,7 @@ def update_vehicle(id: int, body: VehicleUpdate, request: Request, db: Session =
     db.add(VehicleLogModel(vehicle_id=v.id, user_id=current.id, action="update"))
     db.commit()
 
+    publish(entity_key("vehicle", id))
     write_audit(db, actor_id=current.id, action="update", entity="vehicle", entity_id=id, request=request)
 
     return VehicleSchema.model_validate(v)
@@ -126,18 +232,26 @@ def take_vehicle(id: int, request: Request, db: Session = Depends(get_db), curre
     )
     stmt = (
         update(VehicleModel)
-        .where(VehicleModel.id == id, VehicleModel.holder_id.is_(None), VehicleModel.status == "available")
+        .where(
+            VehicleModel.id == id,
+            VehicleModel.holder_id.is_(None),
+            VehicleModel.status == "available",
+            ~_reserved_by_other(current.id),
+        )
         .values(holder_id=current.id, status="in_use", updated_at=datetime.now(tz=timezone.utc))
         .returning(VehicleModel.id)
     )
     res = db.execute(stmt).first()
     if not res:
+        if db.execute(select(VehicleModel.id).where(VehicleModel.id == id, _reserved_by_other(current.id))).first():
+            raise HTTPException(status_code=409, detail="Vehicle is reserved by another user")
         raise HTTPException(status_code=409, detail="Vehicle is not available")
     db.commit()
     v = db.get(VehicleModel, id)
     db.add(VehicleLogModel(vehicle_id=id, user_id=current.id, action="take"))
     db.commit()
 
+    publish(entity_key("vehicle", id))
     write_audit(db, actor_id=current.id, action="take", entity="vehicle", entity_id=id, request=request)
 
     return VehicleSchema.model_validate(v)
@@ -158,6 +272,7 @@ def release_vehicle(id: int, request: Request, db: Session = Depends(get_db), cu
     db.add(VehicleLogModel(vehicle_id=id, user_id=current.id, action="release"))
     db.commit()
 
+    publish(entity_key("vehicle", id))
     write_audit(db, actor_id=current.id, action="release", entity="vehicle", entity_id=id, request=request)
 
     return VehicleSchema.model_validate(v)
@@ -178,6 +293,7 @@ def delete_vehicle(
         raise HTTPException(status_code=409, detail="Cannot delete vehicle in use")
     db.delete(v)
     db.commit()
+    publish(entity_key("vehicle", id))
     write_audit(db, actor_id=current.id, action="delete", entity="vehicle", entity_id=id, request=request)
     return
 
@@ -202,3 +318,86 @@ def vehicle_logs(
     ).scalars().all()
     items: List[VehicleLogSchema] = [VehicleLogSchema.model_validate(r) for r in rows]
     return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+
+@router.get("/{id}/reservations", response_model=dict)
+def list_reservations(
+    id: int,
+    since: Optional[int] = Query(None, description="ms, по умолчанию — сейчас"),
+    until: Optional[int] = Query(None, description="ms"),
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    if not db.get(VehicleModel, id):
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    lower = _from_ms(since) if since is not None else datetime.now(tz=timezone.utc)
+    upper = _from_ms(until) if until is not None else None
+    rows = db.execute(
+        select(ReservationModel)
+        .where(
+            ReservationModel.vehicle_id == id,
+            ReservationModel.during.overlaps(func.tstzrange(lower, upper, "[)")),
+        )
+        .order_by(ReservationModel.during)
+    ).scalars().all()
+    items: List[ReservationSchema] = [ReservationSchema.model_validate(r) for r in rows]
+    return {"items": items}
+
+@router.post("/{id}/reservations", response_model=ReservationSchema, status_code=201)
+def create_reservation(
+    id: int,
+    body: VehicleReservationCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    if body.ends_at <= body.starts_at:
+        raise HTTPException(status_code=400, detail="endsAt must be greater than startsAt")
+    if not db.get(VehicleModel, id):
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    r = ReservationModel(
+        vehicle_id=id,
+        user_id=current.id,
+        during=Range(body.starts_at, body.ends_at, bounds="[)"),
+        note=body.note,
+    )
+    db.add(r)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == "23P01":  # exclusion_violation
+            raise HTTPException(status_code=409, detail="Vehicle is already reserved for this time")
+        raise
+    db.refresh(r)
+    db.add(VehicleLogModel(vehicle_id=id, user_id=current.id, action="reserve",
+                           payload={"reservationId": r.id}))
+    db.commit()
+
+    write_audit(db, actor_id=current.id, action="reserve", entity="vehicle", entity_id=id,
+                payload={"reservationId": r.id}, request=request)
+
+    return ReservationSchema.model_validate(r)
+
+@router.delete("/{id}/reservations/{reservation_id}", status_code=204)
+def cancel_reservation(
+    id: int,
+    reservation_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: UserModel = Depends(get_current_user),
+):
+    r = db.get(ReservationModel, reservation_id)
+    if not r or r.vehicle_id != id:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    if r.user_id != current.id and not is_manager(current):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    db.delete(r)
+    db.add(VehicleLogModel(vehicle_id=id, user_id=current.id, action="unreserve",
+                           payload={"reservationId": reservation_id}))
+    db.commit()
+
+    write_audit(db, actor_id=current.id, action="unreserve", entity="vehicle", entity_id=id,
+                payload={"reservationId": reservation_id}, request=request)
+
+    return
@@ -1,11 +1,20 @@
-from typing import Any
-from pydantic import BaseModel, ConfigDict, field_serializer
-from datetime import datetime, timezone
+from typing import Annotated, Any
+from pydantic import BaseModel, ConfigDict, PlainSerializer, field_serializer
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS = timedelta(milliseconds=1)
 
 def to_ms(dt: datetime | None) -> int | None:
+    # целочисленная арифметика: без float-погрешности и в разы быстрее timestamp() * 1000
     if dt is None:
         return None
-    return int(dt.replace(tzinfo=dt.tzinfo or timezone.utc).timestamp() * 1000)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MS
+
+# datetime, который в ответе отдаётся миллисекундами; сериализатор без self/info вызывается напрямую из pydantic-core
+MsDatetime = Annotated[datetime, PlainSerializer(to_ms, return_type=int)]
 
 class CamelModel(BaseModel):
     model_config = ConfigDict(
@@ -1,18 +1,8 @@
 from __future__ import annotations
-from datetime import datetime, timezone
-from pydantic import BaseModel, ConfigDict, field_serializer
+from datetime import datetime
+from pydantic import field_serializer
 from typing import Optional
-
-def to_ms(dt: datetime | None):
-    if dt is None: return None
-    return int(dt.replace(tzinfo=dt.tzinfo or timezone.utc).timestamp() * 1000)
-
-class CamelModel(BaseModel):
-    model_config = ConfigDict(
-        alias_generator=lambda s: "".join([s.split("_")[0]] + [p.capitalize() for p in s.split("_")[1:]]),
-        populate_by_name=True,
-        from_attributes=True,
-    )
+from app.schemas import CamelModel, MsDatetime, to_ms
 
 class Directory(CamelModel):
     id: int
@@ -36,10 +26,8 @@ class Document(CamelModel):
     title: str
     description: str | None = None
     created_by: int | None = None
-    created_at: datetime
-    updated_at: datetime
-    @field_serializer("created_at","updated_at")
-    def _s2(self, v: datetime): return to_ms(v)
+    created_at: MsDatetime
+    updated_at: MsDatetime
 
 class DocumentCreate(CamelModel):
     directory_id: int | None = None
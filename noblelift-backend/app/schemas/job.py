@@ -0,0 +1,19 @@
+from __future__ import annotations
+from typing import Any, Optional
+from app.schemas import CamelModel, MsDatetime
+
+class Job(CamelModel):
+    id: int
+    type: str
+    status: str
+    progress: int
+    progress_message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    has_artifact: bool = False
+    run_at: MsDatetime
+    created_at: MsDatetime
+    started_at: Optional[MsDatetime] = None
+    finished_at: Optional[MsDatetime] = None
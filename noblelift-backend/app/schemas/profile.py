@@ -1,7 +1,5 @@
 from typing import Any
-from datetime import datetime
-from pydantic import field_serializer
-from app.schemas import CamelModel, to_ms
+from app.schemas import CamelModel, MsDatetime
 
 class ProfileStatus(CamelModel):
     code: str
@@ -18,9 +16,5 @@ class Profile(CamelModel):
     status: ProfileStatus
     status_payload: dict[str, Any] | None = None
     links: ProfileLinks | None = None
-    arrived_at: datetime | None = None
-    last_seen_at: datetime | None = None
-
-    @field_serializer("arrived_at", "last_seen_at")
-    def _ser_dt(self, v: datetime | None):
-        return to_ms(v)
+    arrived_at: MsDatetime | None = None
+    last_seen_at: MsDatetime | None = None
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from typing import Any, Literal, Optional
+from pydantic import Field
+from app.schemas import CamelModel
+from app.schemas.task import TaskCreate
+
+SyncOpType = Literal[
+    "create_task", "set_task_status", "take_task", "release_task",
+    "take_vehicle", "release_vehicle", "upload_ref",
+]
+
+class SyncOperation(CamelModel):
+    op_id: str = Field(min_length=1, max_length=64)  # генерируется клиентом, ключ идемпотентности
+    type: SyncOpType
+    task_id: Optional[int] = None
+    task_ref: Optional[str] = None      # opId операции create_task (в этом или прошлом пакете)
+    vehicle_id: Optional[int] = None
+    status_code: Optional[str] = None
+    version: Optional[int] = None       # ожидаемая версия задачи, как If-Match
+    task: Optional[TaskCreate] = None
+    upload_id: Optional[str] = None     # id из POST /sync/uploads
+
+class SyncBatch(CamelModel):
+    ops: list[SyncOperation] = Field(max_length=200)
+
+class SyncOpResult(CamelModel):
+    op_id: str
+    status: Literal["applied", "failed", "replayed"]
+    code: int
+    detail: Optional[str] = None
+    data: Optional[dict[str, Any]] = None
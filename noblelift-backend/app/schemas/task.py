@@ -1,26 +1,13 @@
 from __future__ import annotations
-from datetime import datetime, timezone
-from typing import Optional, Any
-from pydantic import BaseModel, ConfigDict, field_serializer
-
-def to_ms(dt: Optional[datetime]) -> Optional[int]:
-    if dt is None:
-        return None
-    return int(dt.replace(tzinfo=dt.tzinfo or timezone.utc).timestamp() * 1000)
-
-class CamelModel(BaseModel):
-    model_config = ConfigDict(
-        alias_generator=lambda s: "".join([s.split("_")[0]] + [p.capitalize() for p in s.split("_")[1:]]),
-        populate_by_name=True,
-        from_attributes=True,
-    )
+from datetime import datetime
+from typing import Optional, Any, Literal
+from pydantic import Field, field_serializer
+from app.schemas import CamelModel, MsDatetime, to_ms
 
 class TaskTopic(CamelModel):
     id: int
     name: str
-    created_at: datetime
-    @field_serializer("created_at")
-    def _s1(self, v: datetime): return to_ms(v)
+    created_at: MsDatetime
 
 class TaskTopicCreate(CamelModel):
     name: str
@@ -29,31 +16,46 @@ class TaskTopicUpdate(CamelModel):
     name: Optional[str] = None
 
 class TaskBase(CamelModel):
-    title: str
+    # длины — как у колонок tasks: слишком длинное значение иначе падает в БД (DataError)
+    title: str = Field(max_length=255)
     content: Optional[str] = None
     due_date: Optional[datetime] = None
-    priority_code: Optional[str] = None
+    priority_code: Optional[str] = Field(default=None, max_length=16)
     status_code: Optional[str] = None
     is_private: Optional[bool] = None
     type: Optional[str] = None
     topic_id: Optional[int] = None
     assignee_id: Optional[int] = None
+    team_id: Optional[int] = None
 
     @field_serializer("due_date")
     def _s2(self, v: Optional[datetime]): return to_ms(v)
 
 class TaskCreate(TaskBase):
-    title: str
+    title: str = Field(max_length=255)
 
 class TaskUpdate(TaskBase):
-    title: Optional[str] = None
+    title: Optional[str] = Field(default=None, max_length=255)
+
+class TaskBulk(CamelModel):
+    action: Literal["assign", "unassign", "status", "archive", "delete"]
+    ids: list[int] = Field(min_length=1, max_length=500)
+    assignee_id: Optional[int] = None   # для assign
+    status_code: Optional[str] = None   # для status
+
+class TaskBulkResult(CamelModel):
+    id: int
+    ok: bool
+    code: int
+    detail: Optional[str] = None
+    version: Optional[int] = None
 
 class Task(CamelModel):
     id: int
     title: str
     content: Optional[str] = None
-    due_date: Optional[datetime] = None
-    created_at: datetime
+    due_date: Optional[MsDatetime] = None
+    created_at: MsDatetime
     priority_code: str
     status_code: str
     is_private: bool
@@ -61,8 +63,10 @@ class Task(CamelModel):
     topic_id: Optional[int] = None
     assignee_id: Optional[int] = None
     creator_id: int
-    archived_at: Optional[datetime] = None
+    team_id: Optional[int] = None
+    topic_name: Optional[str] = None
+    assignee_name: Optional[str] = None
+    creator_name: Optional[str] = None
+    archived_at: Optional[MsDatetime] = None
+    version: int
     topic: Optional[TaskTopic] = None
-
-    @field_serializer("due_date", "created_at", "archived_at")
-    def _s3(self, v: Optional[datetime]): return to_ms(v)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from datetime import datetime, timezone
-from pydantic import BaseModel, ConfigDict, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 
 def to_ms(dt: datetime | None):
     if dt is None: return None
@@ -42,3 +42,6 @@ class TeamMember(CamelModel):
 class TeamMemberAdd(CamelModel):
     user_id: int
     role: str | None = None
+
+class TeamMembersReplace(CamelModel):
+    members: list[TeamMemberAdd] = Field(max_length=5000)
@@ -1,6 +1,5 @@
-from datetime import datetime
-from pydantic import EmailStr, field_serializer
-from app.schemas import CamelModel, to_ms
+from pydantic import EmailStr
+from app.schemas import CamelModel, MsDatetime
 from app.schemas.role import Role
 from app.schemas.profile import Profile
 
@@ -13,9 +12,5 @@ class User(CamelModel):
     avatar_url: str | None = None
     role: Role
     is_active: bool
-    created_at: datetime
+    created_at: MsDatetime
     profile: Profile | None = None
-
-    @field_serializer("created_at")
-    def _ser_dt(self, v: datetime):
-        return to_ms(v)
@@ -1,17 +1,7 @@
 from __future__ import annotations
-from datetime import datetime, timezone
-from pydantic import BaseModel, ConfigDict, field_serializer
-
-def to_ms(dt: datetime | None):
-    if dt is None: return None
-    return int(dt.replace(tzinfo=dt.tzinfo or timezone.utc).timestamp() * 1000)
-
-class CamelModel(BaseModel):
-    model_config = ConfigDict(
-        alias_generator=lambda s: "".join([s.split("_")[0]] + [p.capitalize() for p in s.split("_")[1:]]),
-        populate_by_name=True,
-        from_attributes=True,
-    )
+from datetime import date, datetime
+from pydantic import field_serializer
+from app.schemas import CamelModel, MsDatetime, to_ms
 
 class Vehicle(CamelModel):
     id: int
@@ -21,11 +11,8 @@ class Vehicle(CamelModel):
     model: str | None = None
     status: str
     holder_id: int | None = None
-    created_at: datetime
-    updated_at: datetime
-
-    @field_serializer("created_at","updated_at")
-    def _s(self, v: datetime): return to_ms(v)
+    created_at: MsDatetime
+    updated_at: MsDatetime
 
 class VehicleCreate(CamelModel):
     number: str
@@ -50,3 +37,31 @@ class VehicleLog(CamelModel):
     created_at: datetime
     @field_serializer("created_at")
     def _s2(self, v: datetime): return to_ms(v)
+
+class VehicleReservation(CamelModel):
+    id: int
+    vehicle_id: int
+    user_id: int
+    starts_at: datetime
+    ends_at: datetime
+    note: str | None = None
+    created_at: datetime
+    @field_serializer("starts_at","ends_at","created_at")
+    def _s3(self, v: datetime): return to_ms(v)
+
+class VehicleReservationCreate(CamelModel):
+    starts_at: datetime
+    ends_at: datetime
+    note: str | None = None
+
+class VehicleAvailability(CamelModel):
+    vehicle: Vehicle
+    available: bool
+
+class VehicleUsageStat(CamelModel):
+    vehicle_id: int | None = None
+    user_id: int | None = None
+    day: date | None = None
+    hours_in_use: float
+    takes: int
+    idle_hours: float | None = None
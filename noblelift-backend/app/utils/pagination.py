@@ -1,5 +1,14 @@
 from __future__ import annotations
-from typing import Any, Iterable
+from typing import Any, Generic, Iterable, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    total: int
+    limit: int
+    offset: int
 
 def page(items: Iterable[Any], total: int, limit: int, offset: int) -> dict:
     return {"items": list(items), "total": int(total), "limit": int(limit), "offset": int(offset)}
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Iterable, get_type_hints
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter, create_model
+from sqlalchemy.engine import Result
+
+# Проекции для списков: выбираем только колонки, нужные схеме, получаем Core-строки
+# (без ORM-объектов и каскадных joined-связей) и валидируем всю страницу одним вызовом.
+# Вложенные объекты передаются колонками с метками вида "topic__name".
+
+SEP = "__"
+
+
+def columns_for(schema: type[BaseModel], model: Any, prefix: str | None = None) -> list:
+    """Колонки модели, совпадающие с полями схемы (вложенные схемы пропускаются)."""
+    table_cols = model.__table__.columns
+    out = []
+    for name in schema.model_fields:
+        if name in table_cols:
+            col = getattr(model, name)
+            out.append(col.label(f"{prefix}{SEP}{name}") if prefix else col)
+    return out
+
+
+def _nest(keys: list[list[str]], row: Iterable[Any]) -> dict:
+    out: dict = {}
+    for path, value in zip(keys, row):
+        node = out
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return out
+
+
+def _collapse(node: dict) -> dict | None:
+    # вложенный объект из outer join без совпадения приходит набором NULL-ов
+    empty = True
+    for k, v in node.items():
+        if isinstance(v, dict):
+            v = node[k] = _collapse(v)
+        if v is not None:
+            empty = False
+    return None if empty else node
+
+
+def rows_to_dicts(result: Result) -> list[dict]:
+    keys = list(result.keys())
+    paths = [k.split(SEP) for k in keys]
+    if all(len(p) == 1 for p in paths):
+        return [dict(zip(keys, row)) for row in result]
+    out = []
+    for row in result:
+        d = _nest(paths, row)
+        for k, v in d.items():
+            if isinstance(v, dict):
+                d[k] = _collapse(v)
+        out.append(d)
+    return out
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+def project(result: Result, schema: type[BaseModel]) -> list:
+    return list_adapter(schema).validate_python(rows_to_dicts(result))
+
+
+def project_one(result: Result, schema: type[BaseModel]) -> Any | None:
+    items = project(result, schema)
+    return items[0] if items else None
+
+
+# ---------- Разреженные наборы полей (?fields=...&expand=...) ----------
+# Без параметров эндпоинт отдаёт прежний полный ответ. С любым из них — только
+# перечисленные скалярные поля (id всегда) и только раскрытые связи; схема ответа
+# строится из полной через create_model и кэшируется на набор полей, а
+# columns_for по ней выбирает из БД только нужные колонки.
+
+def parse_fieldset(schema: type[BaseModel], relations: tuple[str, ...],
+                   fields: str | None, expand: str | None) -> tuple[frozenset, frozenset] | None:
+    """(поля, связи) в именах схемы или None, если клиент не просил сокращённый ответ."""
+    if fields is None and expand is None:
+        return None
+    by_name = {}
+    for name, f in schema.model_fields.items():
+        by_name[name] = name
+        if f.alias:
+            by_name[f.alias] = name
+
+    def names(raw: str | None) -> set[str]:
+        out = set()
+        for part in (raw or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if part not in by_name:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {part}")
+            out.add(by_name[part])
+        return out
+
+    selected = names(fields)
+    expanded = names(expand)
+    if expanded - set(relations):
+        raise HTTPException(status_code=400, detail=f"Cannot expand: {', '.join(sorted(expanded - set(relations)))}")
+    # связь, названная в fields, тоже раскрывается
+    expanded |= selected & set(relations)
+    if fields is None:
+        selected = {n for n in schema.model_fields if n not in relations}
+    selected = (selected - set(relations)) | {"id"}
+    return frozenset(selected), frozenset(expanded)
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: type[BaseModel], names: frozenset) -> type[BaseModel]:
+    """Подмножество полей схемы с теми же типами, алиасами и сериализаторами."""
+    hints = get_type_hints(schema, include_extras=True)
+    defs = {}
+    for name, f in schema.model_fields.items():
+        if name in names:
+            defs[name] = (hints[name], ... if f.is_required() else f.default)
+    return create_model(f"{schema.__name__}Sparse", __config__=schema.model_config, **defs)
+
+
+def fieldset_key(fieldset: tuple[frozenset, frozenset]) -> str:
+    """Суффикс ключа кэша для сокращённого ответа."""
+    return "f=" + ",".join(sorted(fieldset[0])) + ";e=" + ",".join(sorted(fieldset[1]))
@@ -0,0 +1,26 @@
+from __future__ import annotations
+from typing import Any, Sequence
+from fastapi import Response
+from pydantic import BaseModel
+from app.utils.pagination import Page
+
+# Быстрый путь ответа: уже провалидированные модели сериализуются сразу в байты
+# Rust-сериализатором pydantic, минуя jsonable_encoder и json.dumps в FastAPI.
+# Алиасы (camelCase) те же, что и в обычном пути.
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def model_response(obj: BaseModel, status_code: int = 200, headers: dict[str, str] | None = None) -> Response:
+    return Response(
+        content=obj.model_dump_json(by_alias=True),
+        status_code=status_code,
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def page_response(schema: type[BaseModel], items: Sequence[Any], total: int, limit: int, offset: int) -> Response:
+    # model_construct: элементы уже экземпляры schema, повторная валидация не нужна
+    envelope = Page[schema].model_construct(items=list(items), total=int(total), limit=int(limit), offset=int(offset))
+    return model_response(envelope)
@@ -0,0 +1,38 @@
+"""Удаление просроченных записей idempotency_keys.
+
+    python -m app.workers.idempotency_cleanup             # один проход (для cron)
+    python -m app.workers.idempotency_cleanup --loop 3600 # раз в час
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+
+from app.core.config import settings
+from app.core.idempotency import purge_expired
+from app.core.logs import setup_logging
+
+log = logging.getLogger("app.workers.idempotency_cleanup")
+
+
+def run_once() -> int:
+    started = time.monotonic()
+    n = purge_expired()
+    log.info("idempotency cleanup: purged=%s in %.2fs", n, time.monotonic() - started)
+    return n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idempotency keys cleanup job")
+    parser.add_argument("--loop", type=int, default=0, metavar="SEC", help="повторять каждые SEC секунд")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    while True:
+        run_once()
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
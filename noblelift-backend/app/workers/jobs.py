@@ -0,0 +1,105 @@
+"""Воркер фоновых задач (таблица jobs).
+
+Запускает пул процессов; каждый забирает готовые задачи через SKIP LOCKED и
+выполняет их по одной. Процессов можно запускать сколько угодно и на разных
+машинах — задачи между ними не пересекаются.
+
+    python -m app.workers.jobs                 # пул из JOBS_WORKERS процессов
+    python -m app.workers.jobs --processes 4
+    python -m app.workers.jobs --once          # разобрать очередь одним процессом и выйти
+    python -m app.workers.jobs --purge         # удалить старые завершённые задачи и артефакты
+"""
+from __future__ import annotations
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from app.core.config import settings
+from app.core.jobs import claim, execute, heartbeat, purge_finished, requeue_stale
+from app.core.logs import setup_logging
+from app.db.session import engine
+
+log = logging.getLogger("app.workers.jobs")
+
+# модули, регистрирующие обработчики через @job_handler
+HANDLER_MODULES = ("app.routes.tasks", "app.routes.users")
+
+_stopping = False
+
+
+def _stop(signum, frame) -> None:
+    # текущая задача доделывается, новая не берётся
+    global _stopping
+    _stopping = True
+
+
+def work(once: bool = False) -> int:
+    """Цикл одного процесса. Возвращает число выполненных задач."""
+    for name in HANDLER_MODULES:
+        importlib.import_module(name)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while not _stopping:
+        ctx = claim(worker_id)
+        if ctx is None:
+            # очередь пуста — самое время подобрать задачи упавших воркеров
+            if requeue_stale():
+                continue
+            if once:
+                break
+            time.sleep(settings.JOBS_POLL_INTERVAL_SEC)
+            continue
+        log.info("job %s (%s) started, attempt %s", ctx.id, ctx.type, ctx.attempt)
+        with heartbeat(ctx):
+            execute(ctx)
+        done += 1
+    return done
+
+
+def _child() -> None:
+    # соединения пула, унаследованные через fork, принадлежат родителю
+    engine.dispose(close=False)
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    setup_logging(debug=settings.DEBUG)
+    work()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Background jobs worker")
+    parser.add_argument("--processes", type=int, default=settings.JOBS_WORKERS)
+    parser.add_argument("--once", action="store_true", help="разобрать очередь одним процессом и завершиться")
+    parser.add_argument("--purge", action="store_true", help="удалить старые завершённые задачи и выйти")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+
+    if args.purge:
+        log.info("jobs purged: %s", purge_finished())
+        return
+    if args.once:
+        log.info("jobs done: %s", work(once=True))
+        return
+
+    procs = [multiprocessing.Process(target=_child, name=f"jobs-{i}") for i in range(max(1, args.processes))]
+    for p in procs:
+        p.start()
+    log.info("jobs worker started: processes=%s", len(procs))
+
+    def shutdown(signum, frame) -> None:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()  # SIGTERM: процесс доделывает текущую задачу
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
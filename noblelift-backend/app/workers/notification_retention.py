@@ -0,0 +1,158 @@
+"""Обслуживание таблицы уведомлений: удаление старых прочитанных, лимит истории и дайджесты.
+
+Работает пачками, каждая пачка — отдельная короткая транзакция. Запуск:
+
+    python -m app.workers.notification_retention             # один проход (для cron)
+    python -m app.workers.notification_retention --loop 600  # проход раз в 10 минут
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.core.notifications import adjust_unread
+from app.db.session import SessionLocal
+
+log = logging.getLogger("app.workers.notification_retention")
+
+DIGEST_PERIODS = {"hour", "day", "week"}
+
+_PURGE_SQL = text("""
+    DELETE FROM notifications WHERE id IN (
+        SELECT id FROM notifications
+        WHERE is_read AND created_at < now() - make_interval(days => :days)
+        LIMIT :batch
+    )
+""")
+
+# Только прочитанные: непрочитанные сверх лимита не теряются, а сворачиваются в дайджест.
+_CAP_SQL = text("""
+    DELETE FROM notifications WHERE id IN (
+        SELECT id FROM (
+            SELECT id, is_read,
+                   row_number() OVER (PARTITION BY user_id ORDER BY created_at DESC, id DESC) AS rn
+            FROM notifications
+            WHERE user_id IN (
+                SELECT user_id FROM notifications GROUP BY user_id HAVING count(*) > :cap
+            )
+        ) ranked
+        WHERE rn > :cap AND is_read
+        LIMIT :batch
+    )
+""")
+
+# Группы однотипных уведомлений за закрытый период заменяются одной строкой-дайджестом.
+# Берутся только уже разосланные (pushed_at), чтобы не потерять push по исходным.
+_DIGEST_SQL = """
+    WITH g AS (
+        SELECT user_id, type, date_trunc('{period}', created_at) AS bucket,
+               count(*) AS n,
+               count(*) FILTER (WHERE NOT is_read) AS unread,
+               max(created_at) AS last_at,
+               max(read_at) AS last_read_at,
+               (array_agg(title ORDER BY created_at DESC, id DESC))[1] AS last_title
+        FROM notifications
+        WHERE created_at < date_trunc('{period}', now())
+          AND pushed_at IS NOT NULL
+          AND coalesce(data->>'digest', 'false') <> 'true'
+        GROUP BY 1, 2, 3
+        HAVING count(*) >= :min_count
+        LIMIT :batch
+    ), deleted AS (
+        DELETE FROM notifications n
+        USING g
+        WHERE n.user_id = g.user_id AND n.type = g.type
+          AND date_trunc('{period}', n.created_at) = g.bucket
+          AND n.pushed_at IS NOT NULL
+          AND coalesce(n.data->>'digest', 'false') <> 'true'
+        RETURNING n.id
+    ), inserted AS (
+        INSERT INTO notifications (user_id, type, title, message, data, is_read, created_at, read_at, pushed_at)
+        SELECT user_id, type, last_title, 'И ещё ' || (n - 1) || ' уведомл.',
+               json_build_object('digest', true, 'count', n, 'period', '{period}', 'since', bucket),
+               unread = 0, last_at, CASE WHEN unread = 0 THEN last_read_at END, now()
+        FROM g
+        RETURNING id
+    )
+    SELECT g.user_id, g.unread, (SELECT count(*) FROM deleted) AS removed FROM g
+"""
+
+
+def purge_expired(db: Session, days: int, batch: int) -> int:
+    total = 0
+    while True:
+        n = db.execute(_PURGE_SQL, {"days": days, "batch": batch}).rowcount
+        db.commit()
+        total += n
+        if n < batch:
+            return total
+
+
+def cap_history(db: Session, cap: int, batch: int) -> int:
+    total = 0
+    while True:
+        n = db.execute(_CAP_SQL, {"cap": cap, "batch": batch}).rowcount
+        db.commit()
+        total += n
+        if n < batch:
+            return total
+
+
+def build_digests(db: Session, period: str, min_count: int, batch: int) -> tuple[int, int]:
+    """Вернуть (сколько дайджестов создано, сколько исходных строк удалено)."""
+    if period not in DIGEST_PERIODS:
+        raise ValueError(f"Unsupported digest period: {period!r}")
+    sql = text(_DIGEST_SQL.format(period=period))
+    groups_total = removed_total = 0
+    while True:
+        rows = db.execute(sql, {"min_count": min_count, "batch": batch}).all()
+        deltas: dict[int, int] = {}
+        for r in rows:
+            # непрочитанные исходные заменяются одним непрочитанным дайджестом
+            if r.unread:
+                deltas[r.user_id] = deltas.get(r.user_id, 0) - int(r.unread) + 1
+        for user_id, delta in deltas.items():
+            adjust_unread(db, user_id, delta)
+        db.commit()
+        groups_total += len(rows)
+        removed_total += int(rows[0].removed) if rows else 0
+        if len(rows) < batch:
+            return groups_total, removed_total
+
+
+def run_once() -> None:
+    batch = settings.NOTIFICATIONS_CLEANUP_BATCH
+    started = time.monotonic()
+    with SessionLocal() as db:
+        digests = removed = 0
+        if settings.NOTIFICATIONS_DIGEST_PERIOD:
+            digests, removed = build_digests(
+                db, settings.NOTIFICATIONS_DIGEST_PERIOD, settings.NOTIFICATIONS_DIGEST_MIN, batch
+            )
+        purged = purge_expired(db, settings.NOTIFICATIONS_RETENTION_DAYS, batch)
+        capped = cap_history(db, settings.NOTIFICATIONS_MAX_PER_USER, batch)
+    log.info(
+        "notification retention: digests=%s collapsed=%s purged=%s capped=%s in %.2fs",
+        digests, removed, purged, capped, time.monotonic() - started,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Notification retention and digest job")
+    parser.add_argument("--loop", type=int, default=0, metavar="SEC", help="повторять каждые SEC секунд")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    while True:
+        run_once()
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
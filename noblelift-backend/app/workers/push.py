@@ -0,0 +1,228 @@
+"""Воркер доставки Web Push.
+
+Забирает неотправленные уведомления пачками, шифрует payload под каждую подписку
+и рассылает параллельно через общий пул соединений. Запуск отдельным процессом:
+
+    python -m app.workers.push          # постоянный цикл
+    python -m app.workers.push --once   # разобрать очередь и выйти
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import select, update, delete, func
+
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.core.notifications import unread_counts
+from app.core.webpush import encrypt_payload, vapid_authorization, vapid_public_key
+from app.db.session import SessionLocal
+from app.models.notification import Notification as NotificationModel
+from app.models.push_subscription import PushSubscription as PushModel
+
+log = logging.getLogger("app.workers.push")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+GONE_STATUSES = {404, 410}
+
+
+@dataclass(frozen=True)
+class PushMessage:
+    subscription_id: int
+    endpoint: str
+    p256dh: str
+    auth: str
+    payload: bytes
+
+
+def claim_batch(limit: int) -> tuple[int, list[PushMessage]]:
+    """Пометить пачку уведомлений отправленными и вернуть сообщения для их подписок.
+
+    Пачка захватывается через SKIP LOCKED, поэтому несколько воркеров не пересекаются.
+    Доставка «не более одного раза»: повторно уведомление не берётся даже при сбое.
+    """
+    with SessionLocal() as db:
+        pending = (
+            select(NotificationModel.id)
+            .where(NotificationModel.pushed_at.is_(None))
+            .order_by(NotificationModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = db.execute(
+            update(NotificationModel)
+            .where(NotificationModel.id.in_(pending.scalar_subquery()))
+            .values(pushed_at=func.now())
+            .returning(
+                NotificationModel.id, NotificationModel.user_id, NotificationModel.type,
+                NotificationModel.title, NotificationModel.message, NotificationModel.data,
+            )
+        ).all()
+        if not rows:
+            db.commit()
+            return 0, []
+
+        subs = defaultdict(list)
+        for s in db.execute(
+            select(PushModel.id, PushModel.user_id, PushModel.endpoint, PushModel.p256dh, PushModel.auth)
+            .where(PushModel.user_id.in_({r.user_id for r in rows}))
+        ).all():
+            subs[s.user_id].append(s)
+        # счётчик для бейджа приложения: push — единственный живой канал до клиента.
+        # Push уходит только с новым уведомлением, поэтому после прочтения/удаления бейдж
+        # на других устройствах обновится при следующем уведомлении или запросе /unread-count
+        unread = unread_counts(db, subs.keys())
+        db.commit()
+
+    messages: list[PushMessage] = []
+    for r in rows:
+        payload = json.dumps(
+            {"id": r.id, "type": r.type, "title": r.title, "body": r.message, "data": r.data,
+             "unread": unread.get(r.user_id, 0)},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        for s in subs.get(r.user_id, ()):
+            messages.append(PushMessage(s.id, s.endpoint, s.p256dh, s.auth, payload))
+    return len(rows), messages
+
+
+def prune_subscriptions(ids: list[int]) -> None:
+    if not ids:
+        return
+    with SessionLocal() as db:
+        db.execute(delete(PushModel).where(PushModel.id.in_(ids)))
+        db.commit()
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class PushSender:
+    """Отправка с общим лимитом параллелизма, лимитом на push-сервис и экспоненциальным backoff."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self._client = client
+        self._total = asyncio.Semaphore(settings.PUSH_CONCURRENCY)
+        self._origins: dict[str, asyncio.Semaphore] = {}
+        self._paused_until: dict[str, float] = {}
+
+    def _origin_limit(self, origin: str) -> asyncio.Semaphore:
+        sem = self._origins.get(origin)
+        if sem is None:
+            sem = self._origins[origin] = asyncio.Semaphore(settings.PUSH_PER_ORIGIN_CONCURRENCY)
+        return sem
+
+    async def send(self, msg: PushMessage) -> str:
+        """Вернуть "ok", "gone" (подписку нужно удалить) или "failed"."""
+        try:
+            return await self._send(msg)
+        except Exception:
+            # уведомление уже помечено отправленным; сбой одного сообщения не должен ронять пачку
+            log.exception("push to subscription %s failed", msg.subscription_id)
+            return "failed"
+
+    async def _send(self, msg: PushMessage) -> str:
+        origin = urlsplit(msg.endpoint).netloc
+        try:
+            body = encrypt_payload(msg.payload, msg.p256dh, msg.auth)
+        except ValueError as e:
+            # битые ключи подписки: доставить на неё ничего не получится
+            log.warning("push subscription %s has invalid keys: %s", msg.subscription_id, e)
+            return "gone"
+        headers = {
+            "Authorization": vapid_authorization(msg.endpoint),
+            "Content-Encoding": "aes128gcm",
+            "Content-Type": "application/octet-stream",
+            "TTL": str(settings.PUSH_TTL_SEC),
+        }
+
+        for attempt in range(settings.PUSH_MAX_ATTEMPTS):
+            pause = self._paused_until.get(origin, 0.0) - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            delay = settings.PUSH_BACKOFF_BASE_SEC * (2 ** attempt) * (1 + random.random())
+            async with self._origin_limit(origin), self._total:
+                try:
+                    resp = await self._client.post(msg.endpoint, content=body, headers=headers)
+                except httpx.TransportError as e:
+                    log.warning("push transport error %s: %s", origin, e)
+                    resp = None
+
+            if resp is not None:
+                if resp.status_code < 300:
+                    return "ok"
+                if resp.status_code in GONE_STATUSES:
+                    return "gone"
+                if resp.status_code not in RETRY_STATUSES:
+                    log.warning("push rejected %s: %s", origin, resp.status_code)
+                    return "failed"
+                retry_after = _retry_after(resp)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if resp.status_code == 429:
+                    self._paused_until[origin] = time.monotonic() + delay
+
+            await asyncio.sleep(delay)
+        return "failed"
+
+
+async def run(once: bool = False) -> None:
+    # ключ проверяем до захвата уведомлений: захваченные помечаются отправленными безвозвратно
+    try:
+        vapid_public_key()
+    except RuntimeError as e:
+        raise SystemExit(f"push worker: {e}")
+    limits = httpx.Limits(
+        max_connections=settings.PUSH_CONCURRENCY,
+        max_keepalive_connections=settings.PUSH_CONCURRENCY,
+    )
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(10.0)) as client:
+        sender = PushSender(client)
+        while True:
+            started = time.monotonic()
+            claimed, messages = await asyncio.to_thread(claim_batch, settings.PUSH_BATCH_SIZE)
+            if messages:
+                results = await asyncio.gather(*(sender.send(m) for m in messages))
+                gone = [m.subscription_id for m, r in zip(messages, results) if r == "gone"]
+                await asyncio.to_thread(prune_subscriptions, sorted(set(gone)))
+                log.info(
+                    "push batch: notifications=%s sent=%s failed=%s pruned=%s in %.2fs",
+                    claimed, results.count("ok"), results.count("failed"), len(set(gone)),
+                    time.monotonic() - started,
+                )
+            if claimed < settings.PUSH_BATCH_SIZE:
+                if once:
+                    return
+                await asyncio.sleep(settings.PUSH_POLL_INTERVAL_SEC)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Web Push delivery worker")
+    parser.add_argument("--once", action="store_true", help="разобрать очередь и завершиться")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    asyncio.run(run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Удаление офлайн-загрузок (POST /sync/uploads), так и не прикреплённых к задаче.
+
+Прикреплённый через upload_ref файл остаётся в staging (task_files ссылается
+на него), поэтому удаляются только каталоги старше STAGED_UPLOAD_TTL_SEC, на
+файлы которых нет ссылок.
+
+    python -m app.workers.staging_cleanup             # один проход (для cron)
+    python -m app.workers.staging_cleanup --loop 3600 # раз в час
+"""
+from __future__ import annotations
+import argparse
+import logging
+import shutil
+import time
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.files import expired_staged_uploads
+from app.core.logs import setup_logging
+from app.db.session import SessionLocal
+from app.models.task_file import TaskFile as TaskFileModel
+
+log = logging.getLogger("app.workers.staging_cleanup")
+
+BATCH = 500
+
+
+def _purge(db, dirs: list) -> int:
+    files = {str(p): d for d in dirs for p in d.iterdir() if p.is_file()}
+    used = set(db.execute(
+        select(TaskFileModel.storage_path).where(TaskFileModel.storage_path.in_(list(files)))
+    ).scalars()) if files else set()
+    keep = {files[p] for p in used}
+    n = 0
+    for d in dirs:
+        if d not in keep:
+            shutil.rmtree(d, ignore_errors=True)
+            n += 1
+    return n
+
+
+def run_once() -> int:
+    started = time.monotonic()
+    purged = 0
+    with SessionLocal() as db:
+        batch = []
+        for d in expired_staged_uploads(settings.STAGED_UPLOAD_TTL_SEC):
+            batch.append(d)
+            if len(batch) >= BATCH:
+                purged += _purge(db, batch)
+                batch = []
+        if batch:
+            purged += _purge(db, batch)
+    log.info("staging cleanup: purged=%s in %.2fs", purged, time.monotonic() - started)
+    return purged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Staged uploads cleanup job")
+    parser.add_argument("--loop", type=int, default=0, metavar="SEC", help="повторять каждые SEC секунд")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    while True:
+        run_once()
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
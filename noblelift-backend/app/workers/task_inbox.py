@@ -0,0 +1,50 @@
+"""Обслуживание user_task_inbox.
+
+    python -m app.workers.task_inbox --rebuild        # полная пересборка (бэкфилл)
+    python -m app.workers.task_inbox                  # проверка согласованности с tasks
+    python -m app.workers.task_inbox --fix            # проверка и исправление расхождений
+    python -m app.workers.task_inbox --fix --loop 3600
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.core.task_inbox import check_task_inbox, rebuild_task_inbox
+from app.db.session import SessionLocal
+
+log = logging.getLogger("app.workers.task_inbox")
+
+
+def run_once(rebuild: bool = False, fix: bool = False) -> dict:
+    started = time.monotonic()
+    with SessionLocal() as db:
+        if rebuild:
+            n = rebuild_task_inbox(db)
+            log.info("task inbox rebuilt: rows=%s in %.2fs", n, time.monotonic() - started)
+            return {"rows": n}
+        result = check_task_inbox(db, fix=fix)
+    level = logging.WARNING if result["tasks"] else logging.INFO
+    log.log(level, "task inbox check: missing=%s extra=%s tasks=%s fixed=%s in %.2fs",
+            result["missing"], result["extra"], result["tasks"], result["fixed"], time.monotonic() - started)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="User task inbox maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="пересобрать таблицу целиком")
+    parser.add_argument("--fix", action="store_true", help="исправить найденные расхождения")
+    parser.add_argument("--loop", type=int, default=0, metavar="SEC", help="повторять каждые SEC секунд")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    while True:
+        run_once(rebuild=args.rebuild, fix=args.fix)
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Инкрементальный пересчёт использования автомобилей из vehicle_logs.
+
+Берёт новые события take/release после водяного знака, склеивает их в интервалы
+(vehicle_usage_intervals) и добавляет закрытые интервалы в суточные агрегаты
+(vehicle_usage_daily). Каждая пачка — одна транзакция вместе со сдвигом знака.
+
+    python -m app.workers.vehicle_rollup             # догнать и выйти
+    python -m app.workers.vehicle_rollup --loop 60   # раз в минуту
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logs import setup_logging
+from app.db.session import SessionLocal
+from app.models.vehicle_log import VehicleLog as VehicleLogModel
+from app.models.vehicle_usage import VehicleUsageInterval, VehicleUsageDaily, RollupState
+
+log = logging.getLogger("app.workers.vehicle_rollup")
+
+ROLLUP_NAME = "vehicle_usage"
+BATCH_SIZE = 5000
+# id выдаются до коммита, поэтому свежие строки могут появиться «позади» знака;
+# события моложе этой задержки не берём
+SETTLE_DELAY = timedelta(seconds=30)
+
+
+def split_by_day(start: datetime, end: datetime) -> list[tuple[date, int]]:
+    """Разрезать интервал по границам UTC-суток: [(день, секунд), ...]."""
+    start = start.astimezone(timezone.utc)
+    end = end.astimezone(timezone.utc)
+    out: list[tuple[date, int]] = []
+    while start < end:
+        next_day = datetime.combine(start.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        chunk_end = min(end, next_day)
+        out.append((start.date(), int((chunk_end - start).total_seconds())))
+        start = chunk_end
+    return out
+
+
+def _watermark(db: Session) -> int:
+    db.execute(pg_insert(RollupState).values(name=ROLLUP_NAME, last_id=0).on_conflict_do_nothing())
+    return db.execute(
+        select(RollupState.last_id).where(RollupState.name == ROLLUP_NAME).with_for_update()
+    ).scalar_one()
+
+
+def process_batch(db: Session, batch: int = BATCH_SIZE) -> int:
+    last_id = _watermark(db)
+    events = db.execute(
+        select(VehicleLogModel.id, VehicleLogModel.vehicle_id, VehicleLogModel.user_id,
+               VehicleLogModel.action, VehicleLogModel.created_at)
+        .where(
+            VehicleLogModel.action.in_(("take", "release")),
+            VehicleLogModel.id > last_id,
+            VehicleLogModel.created_at < func.now() - SETTLE_DELAY,
+        )
+        .order_by(VehicleLogModel.id)
+        .limit(batch)
+    ).all()
+    if not events:
+        db.commit()
+        return 0
+
+    open_by_vehicle: dict[int, VehicleUsageInterval] = {
+        i.vehicle_id: i
+        for i in db.execute(
+            select(VehicleUsageInterval).where(
+                VehicleUsageInterval.released_at.is_(None),
+                VehicleUsageInterval.vehicle_id.in_({e.vehicle_id for e in events}),
+            )
+        ).scalars()
+    }
+    daily: dict[tuple[date, int, int], list[int]] = defaultdict(lambda: [0, 0])
+
+    def close(interval: VehicleUsageInterval, at: datetime, log_id: int | None) -> None:
+        interval.released_at = max(at, interval.taken_at)
+        interval.release_log_id = log_id
+        for day, seconds in split_by_day(interval.taken_at, interval.released_at):
+            daily[(day, interval.vehicle_id, interval.user_id)][0] += seconds
+
+    for e in events:
+        current = open_by_vehicle.get(e.vehicle_id)
+        if e.action == "take":
+            if current is not None:
+                # release потерялся: закрываем прошлый интервал моментом нового take
+                close(current, e.created_at, None)
+            current = VehicleUsageInterval(
+                vehicle_id=e.vehicle_id, user_id=e.user_id or 0, take_log_id=e.id, taken_at=e.created_at,
+            )
+            db.add(current)
+            open_by_vehicle[e.vehicle_id] = current
+            daily[(e.created_at.astimezone(timezone.utc).date(), e.vehicle_id, current.user_id)][1] += 1
+        elif current is not None:
+            close(current, e.created_at, e.id)
+            del open_by_vehicle[e.vehicle_id]
+
+    db.flush()
+    if daily:
+        stmt = pg_insert(VehicleUsageDaily).values([
+            {"day": day, "vehicle_id": vehicle_id, "user_id": user_id, "seconds_in_use": s, "takes": t}
+            for (day, vehicle_id, user_id), (s, t) in daily.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[VehicleUsageDaily.day, VehicleUsageDaily.vehicle_id, VehicleUsageDaily.user_id],
+            set_={
+                "seconds_in_use": VehicleUsageDaily.seconds_in_use + stmt.excluded.seconds_in_use,
+                "takes": VehicleUsageDaily.takes + stmt.excluded.takes,
+            },
+        ))
+    db.execute(
+        update(RollupState)
+        .where(RollupState.name == ROLLUP_NAME)
+        .values(last_id=events[-1].id, updated_at=func.now())
+    )
+    db.commit()
+    return len(events)
+
+
+def run_once() -> int:
+    total = 0
+    started = time.monotonic()
+    with SessionLocal() as db:
+        while True:
+            n = process_batch(db)
+            total += n
+            if n < BATCH_SIZE:
+                break
+    log.info("vehicle rollup: events=%s in %.2fs", total, time.monotonic() - started)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vehicle utilization rollup job")
+    parser.add_argument("--loop", type=int, default=0, metavar="SEC", help="повторять каждые SEC секунд")
+    args = parser.parse_args()
+    setup_logging(debug=settings.DEBUG)
+    while True:
+        run_once()
+        if not args.loop:
+            return
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
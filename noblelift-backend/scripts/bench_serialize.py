@@ -0,0 +1,84 @@
+"""Микробенчмарк сериализации страницы задач (200 элементов).
+
+Сравнивает штатный путь FastAPI (response_model=dict -> jsonable_encoder -> json.dumps)
+с быстрым путём app.utils.responses.page_response (model_dump_json в байты).
+БД не нужна, данные синтетические.
+
+    python scripts/bench_serialize.py [--items 200] [--rounds 200]
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.task import Task
+from app.utils.responses import page_response
+
+
+def make_items(n: int) -> list[Task]:
+    now = datetime.now(timezone.utc)
+    return [
+        Task.model_validate({
+            "id": i,
+            "title": f"Задача {i}",
+            "content": "Проверить погрузчик и заполнить акт осмотра" if i % 2 else None,
+            "due_date": now + timedelta(days=i % 14) if i % 3 else None,
+            "created_at": now - timedelta(minutes=i),
+            "priority_code": "normal",
+            "status_code": "in_progress",
+            "is_private": False,
+            "type": "common",
+            "topic_id": i % 5 or None,
+            "assignee_id": i % 7 or None,
+            "creator_id": 1,
+            "archived_at": None,
+            "version": 1,
+            "topic": {"id": i % 5, "name": "Склад", "created_at": now} if i % 5 else None,
+        })
+        for i in range(n)
+    ]
+
+
+def legacy_body(items: list[Task]) -> bytes:
+    content = jsonable_encoder({"items": items, "total": len(items), "limit": len(items), "offset": 0})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_body(items: list[Task]) -> bytes:
+    return page_response(Task, items, len(items), len(items), 0).body
+
+
+def bench(fn, items: list[Task], rounds: int) -> float:
+    fn(items)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(items)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Task page serialization benchmark")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    if json.loads(legacy_body(items)) != json.loads(fast_body(items)):
+        raise SystemExit("payload mismatch between legacy and fast path")
+
+    legacy = bench(legacy_body, items, args.rounds)
+    fast = bench(fast_body, items, args.rounds)
+    print(f"items={args.items} rounds={args.rounds}")
+    print(f"jsonable_encoder + json.dumps: {legacy:8.3f} ms/page")
+    print(f"page_response (dump_json):     {fast:8.3f} ms/page  x{legacy / fast:.1f}")
+
+
+if __name__ == "__main__":
+    main()
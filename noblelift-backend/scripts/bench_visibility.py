@@ -0,0 +1,138 @@
+"""Бенчмарк предиката видимости задач (app.routes.tasks.task_visible_to) на большой таблице.
+
+Создаёт отдельную схему с копиями users/teams/team_members/tasks и индексами из
+миграций, заполняет её синтетикой (по умолчанию 1 000 000 задач, 10% личных) и
+сравнивает запросы списка задач сотрудника с предикатом и без него: COUNT,
+первая страница и глубокая страница. Нужна БД из DATABASE_URL; рабочие таблицы
+не трогаются, схема удаляется в конце (--keep — оставить).
+
+    python scripts/bench_visibility.py [--tasks 1000000] [--users 2000] [--teams 50] [--rounds 20]
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import engine
+import app.models  # noqa: F401  регистрирует все модели в Base.metadata
+from app.models.task import Task as TaskModel
+from app.routes.tasks import task_visible_to
+
+SCHEMA = "bench_visibility"
+TABLES = ["roles", "users", "task_topics", "tasks", "teams", "team_members"]
+# индексы, которые миграции создают вручную (в моделях их нет)
+INDEXES = [
+    "CREATE INDEX ix_tasks_assignee ON tasks (assignee_id)",
+    "CREATE INDEX ix_tasks_created_at ON tasks (created_at)",
+    "CREATE INDEX ix_tasks_creator_created ON tasks (creator_id, created_at)",
+    "CREATE INDEX ix_tasks_team_created ON tasks (team_id, created_at)",
+    "CREATE INDEX ix_team_members_user_team ON team_members (user_id, team_id)",
+]
+
+
+class _Employee:
+    """Достаточно для task_visible_to: роль без прав менеджера."""
+    class role:
+        code = "employee"
+
+    def __init__(self, id: int):
+        self.id = id
+
+
+def setup(conn, n_tasks: int, n_users: int, n_teams: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[t] for t in TABLES])
+    conn.execute(text("INSERT INTO roles (id, code, name) VALUES (1, 'employee', 'Сотрудник')"))
+    conn.execute(text(
+        "INSERT INTO users (id, email, password_hash, full_name, role_id, is_active) "
+        "SELECT g, 'u' || g || '@bench.local', 'x', 'Сотрудник ' || g, 1, true FROM generate_series(1, :n) g"
+    ), {"n": n_users})
+    conn.execute(text("INSERT INTO teams (id, name) SELECT g, 'Команда ' || g FROM generate_series(1, :n) g"), {"n": n_teams})
+    # каждый в одной команде, каждый пятый — ещё в одной
+    conn.execute(text(
+        "INSERT INTO team_members (team_id, user_id) SELECT 1 + g % :t, g FROM generate_series(1, :n) g "
+        "UNION SELECT 1 + (g * 7) % :t, g FROM generate_series(1, :n) g WHERE g % 5 = 0"
+    ), {"n": n_users, "t": n_teams})
+    conn.execute(text(
+        "INSERT INTO tasks (title, created_at, priority_code, status_code, is_private, type, creator_id, assignee_id, team_id) "
+        "SELECT 'Задача ' || g, now() - g * interval '1 minute', 'medium', 'new', g % 10 = 0, 'regular', "
+        "       1 + (g * 31) % :u, CASE WHEN g % 4 = 0 THEN NULL ELSE 1 + (g * 17) % :u END, "
+        "       CASE WHEN g % 3 = 0 THEN NULL ELSE 1 + g % :t END "
+        "FROM generate_series(1, :n) g"
+    ), {"n": n_tasks, "u": n_users, "t": n_teams})
+    for ddl in INDEXES:
+        conn.execute(text(ddl))
+    conn.execute(text("ANALYZE"))
+
+
+def timed(db: Session, stmt, rounds: int) -> float:
+    db.execute(stmt).all()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        db.execute(stmt).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def queries(where):
+    page = select(TaskModel.id, TaskModel.title, TaskModel.created_at).order_by(TaskModel.created_at.desc())
+    count = select(func.count()).select_from(TaskModel)
+    if where is not None:
+        page = page.where(where)
+        count = count.where(where)
+    return {
+        "count": count,
+        "page 1": page.limit(20),
+        "page 500": page.limit(20).offset(10000),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Task visibility predicate benchmark")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--user-id", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="не удалять схему после замера")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with engine.begin() as conn:
+        setup(conn, args.tasks, args.users, args.teams)
+    print(f"setup: tasks={args.tasks} users={args.users} teams={args.teams} in {time.monotonic() - started:.1f}s")
+
+    visible = task_visible_to(_Employee(args.user_id))
+    try:
+        with Session(engine) as db:
+            db.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+            base = queries(None)
+            pred = queries(visible)
+            print(f"{'query':<10} {'no predicate':>14} {'visibility':>12}")
+            for name in base:
+                a = timed(db, base[name], args.rounds)
+                b = timed(db, pred[name], args.rounds)
+                print(f"{name:<10} {a:11.2f} ms {b:9.2f} ms  x{b / a:.2f}")
+            plan = db.execute(text("EXPLAIN " + str(pred["page 1"].compile(
+                engine, compile_kwargs={"literal_binds": True})))).scalars().all()
+            print("\nplan (page 1, visibility):")
+            print("\n".join("  " + line for line in plan))
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Локальная заглушка push-сервиса для проверки воркера app.workers.push.
+
+Подпишите пользователя на endpoint вида http://127.0.0.1:8089/push/<id> и запустите воркер.
+Поведение зависит от пути:
+    /push/gone/...  -> 410 (подписка должна удалиться)
+    /push/slow/...  -> первые два запроса 429 с Retry-After: 1, затем 201
+    /push/flaky/... -> через раз 503
+    остальное       -> 201
+
+Ключ VAPID для dev:
+    python -c "import base64;from cryptography.hazmat.primitives.asymmetric import ec;\
+k=ec.generate_private_key(ec.SECP256R1());\
+print(base64.urlsafe_b64encode(k.private_numbers().private_value.to_bytes(32,'big')).rstrip(b'=').decode())"
+"""
+from __future__ import annotations
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_hits: Counter[str] = Counter()
+_lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        with _lock:
+            _hits[self.path] += 1
+            n = _hits[self.path]
+
+        ok = (
+            self.headers.get("Content-Encoding") == "aes128gcm"
+            and (self.headers.get("Authorization") or "").startswith("vapid t=")
+        )
+        if not ok:
+            status, headers = 400, {}
+        elif self.path.startswith("/push/gone/"):
+            status, headers = 410, {}
+        elif self.path.startswith("/push/slow/") and n <= 2:
+            status, headers = 429, {"Retry-After": "1"}
+        elif self.path.startswith("/push/flaky/") and n % 2:
+            status, headers = 503, {}
+        else:
+            status, headers = 201, {}
+
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, fmt, *args):
+        print(f"{self.command} {self.path} bytes={self.headers.get('Content-Length')} -> {args[1] if len(args) > 1 else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"push stub listening on http://{args.host}:{args.port}/push/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()